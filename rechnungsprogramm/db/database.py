@@ -1,6 +1,16 @@
+import re
 import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from operator import itemgetter
 from pathlib import Path
+from typing import Callable
 
+from db.profiler import QueryProfiler
+from utils.money import from_cents
 from utils.paths import get_db_path
 
 
@@ -183,6 +193,8 @@ CREATE INDEX IF NOT EXISTS idx_bank_accounts_connection ON bank_accounts(connect
 CREATE INDEX IF NOT EXISTS idx_bank_accounts_default ON bank_accounts(connection_id, is_default);
 CREATE INDEX IF NOT EXISTS idx_bank_transactions_account ON bank_transactions(account_id);
 CREATE INDEX IF NOT EXISTS idx_bank_transactions_booking_date ON bank_transactions(booking_date);
+CREATE INDEX IF NOT EXISTS idx_bank_transactions_account_date
+    ON bank_transactions(account_id, COALESCE(booking_date, value_date, ''), id);
 CREATE INDEX IF NOT EXISTS idx_bank_transactions_status ON bank_transactions(status);
 CREATE INDEX IF NOT EXISTS idx_bank_matches_status ON bank_transaction_matches(status);
 CREATE UNIQUE INDEX IF NOT EXISTS idx_bank_matches_confirmed_tx
@@ -264,83 +276,961 @@ CREATE INDEX IF NOT EXISTS idx_fs_fsnr ON firmenschreiben(fsnr);
 """
 
 
+SEARCH_INDEX_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+    vorname, nachname, firma, ort,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS customers_fts_ai AFTER INSERT ON customers BEGIN
+    INSERT INTO customers_fts (rowid, vorname, nachname, firma, ort)
+    VALUES (NEW.id, NEW.vorname, NEW.nachname, NEW.firma, NEW.ort);
+END;
+
+CREATE TRIGGER IF NOT EXISTS customers_fts_au AFTER UPDATE OF vorname, nachname, firma, ort ON customers
+BEGIN
+    UPDATE customers_fts
+    SET vorname = NEW.vorname, nachname = NEW.nachname, firma = NEW.firma, ort = NEW.ort
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS customers_fts_ad AFTER DELETE ON customers BEGIN
+    DELETE FROM customers_fts WHERE rowid = OLD.id;
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS invoices_fts USING fts5(
+    rechnungsnr, betreff, kunde,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS invoices_fts_ai AFTER INSERT ON invoices BEGIN
+    INSERT INTO invoices_fts (rowid, rechnungsnr, betreff, kunde)
+    VALUES (
+        NEW.id, NEW.rechnungsnr, NEW.betreff,
+        (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '')
+         FROM customers WHERE id = NEW.customer_id)
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS invoices_fts_au AFTER UPDATE OF rechnungsnr, betreff, customer_id ON invoices
+WHEN OLD.rechnungsnr IS NOT NEW.rechnungsnr
+    OR OLD.betreff IS NOT NEW.betreff
+    OR OLD.customer_id IS NOT NEW.customer_id
+BEGIN
+    UPDATE invoices_fts
+    SET rechnungsnr = NEW.rechnungsnr,
+        betreff = NEW.betreff,
+        kunde = (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '')
+                 FROM customers WHERE id = NEW.customer_id)
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS invoices_fts_ad AFTER DELETE ON invoices BEGIN
+    DELETE FROM invoices_fts WHERE rowid = OLD.id;
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS kv_fts USING fts5(
+    kvnr, betreff, kunde,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS kv_fts_ai AFTER INSERT ON kostenvoranschlaege BEGIN
+    INSERT INTO kv_fts (rowid, kvnr, betreff, kunde)
+    VALUES (
+        NEW.id, NEW.kvnr, NEW.betreff,
+        (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '')
+         FROM customers WHERE id = NEW.customer_id)
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS kv_fts_au AFTER UPDATE OF kvnr, betreff, customer_id ON kostenvoranschlaege
+WHEN OLD.kvnr IS NOT NEW.kvnr
+    OR OLD.betreff IS NOT NEW.betreff
+    OR OLD.customer_id IS NOT NEW.customer_id
+BEGIN
+    UPDATE kv_fts
+    SET kvnr = NEW.kvnr,
+        betreff = NEW.betreff,
+        kunde = (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '')
+                 FROM customers WHERE id = NEW.customer_id)
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS kv_fts_ad AFTER DELETE ON kostenvoranschlaege BEGIN
+    DELETE FROM kv_fts WHERE rowid = OLD.id;
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS fs_fts USING fts5(
+    fsnr, betreff, kunde,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS fs_fts_ai AFTER INSERT ON firmenschreiben BEGIN
+    INSERT INTO fs_fts (rowid, fsnr, betreff, kunde)
+    VALUES (
+        NEW.id, NEW.fsnr, NEW.betreff,
+        (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '') || ' ' || COALESCE(firma, '')
+         FROM customers WHERE id = NEW.customer_id)
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS fs_fts_au AFTER UPDATE OF fsnr, betreff, customer_id ON firmenschreiben
+WHEN OLD.fsnr IS NOT NEW.fsnr
+    OR OLD.betreff IS NOT NEW.betreff
+    OR OLD.customer_id IS NOT NEW.customer_id
+BEGIN
+    UPDATE fs_fts
+    SET fsnr = NEW.fsnr,
+        betreff = NEW.betreff,
+        kunde = (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '') || ' ' || COALESCE(firma, '')
+                 FROM customers WHERE id = NEW.customer_id)
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS fs_fts_ad AFTER DELETE ON firmenschreiben BEGIN
+    DELETE FROM fs_fts WHERE rowid = OLD.id;
+END;
+
+-- Kundennamen in den Dokument-Indizes nachziehen, wenn ein Kunde umbenannt wird.
+CREATE TRIGGER IF NOT EXISTS customers_fts_docs_au AFTER UPDATE OF vorname, nachname, firma ON customers
+WHEN OLD.vorname IS NOT NEW.vorname
+    OR OLD.nachname IS NOT NEW.nachname
+    OR OLD.firma IS NOT NEW.firma
+BEGIN
+    UPDATE invoices_fts
+    SET kunde = COALESCE(NEW.vorname, '') || ' ' || COALESCE(NEW.nachname, '')
+    WHERE rowid IN (SELECT id FROM invoices WHERE customer_id = NEW.id);
+    UPDATE kv_fts
+    SET kunde = COALESCE(NEW.vorname, '') || ' ' || COALESCE(NEW.nachname, '')
+    WHERE rowid IN (SELECT id FROM kostenvoranschlaege WHERE customer_id = NEW.id);
+    UPDATE fs_fts
+    SET kunde = COALESCE(NEW.vorname, '') || ' ' || COALESCE(NEW.nachname, '') || ' ' || COALESCE(NEW.firma, '')
+    WHERE rowid IN (SELECT id FROM firmenschreiben WHERE customer_id = NEW.id);
+END;
+"""
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """Datenmigration, die in rowid-Fenstern ueber eine Tabelle laeuft.
+
+    Die Statements erhalten :start und :end (inklusive). Jedes Fenster wird
+    einzeln festgeschrieben, die Statements muessen daher wiederholbar sein.
+    """
+
+    table: str
+    statements: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Schritt auf user_version; apply laeuft zusammen mit dem Versionssprung in einer Transaktion."""
+
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None] | None = None
+    backfills: tuple[Backfill, ...] = ()
+
+
+# Fuellt die Suchindizes aus den bestehenden Daten.
+SEARCH_INDEX_BACKFILLS = (
+    Backfill("customers", (
+        "DELETE FROM customers_fts WHERE rowid BETWEEN :start AND :end",
+        """
+        INSERT INTO customers_fts (rowid, vorname, nachname, firma, ort)
+        SELECT id, vorname, nachname, firma, ort FROM customers
+        WHERE id BETWEEN :start AND :end
+        """,
+    )),
+    Backfill("invoices", (
+        "DELETE FROM invoices_fts WHERE rowid BETWEEN :start AND :end",
+        """
+        INSERT INTO invoices_fts (rowid, rechnungsnr, betreff, kunde)
+        SELECT i.id, i.rechnungsnr, i.betreff,
+               COALESCE(c.vorname, '') || ' ' || COALESCE(c.nachname, '')
+        FROM invoices i LEFT JOIN customers c ON c.id = i.customer_id
+        WHERE i.id BETWEEN :start AND :end
+        """,
+    )),
+    Backfill("kostenvoranschlaege", (
+        "DELETE FROM kv_fts WHERE rowid BETWEEN :start AND :end",
+        """
+        INSERT INTO kv_fts (rowid, kvnr, betreff, kunde)
+        SELECT k.id, k.kvnr, k.betreff,
+               COALESCE(c.vorname, '') || ' ' || COALESCE(c.nachname, '')
+        FROM kostenvoranschlaege k LEFT JOIN customers c ON c.id = k.customer_id
+        WHERE k.id BETWEEN :start AND :end
+        """,
+    )),
+    Backfill("firmenschreiben", (
+        "DELETE FROM fs_fts WHERE rowid BETWEEN :start AND :end",
+        """
+        INSERT INTO fs_fts (rowid, fsnr, betreff, kunde)
+        SELECT f.id, f.fsnr, f.betreff,
+               COALESCE(c.vorname, '') || ' ' || COALESCE(c.nachname, '') || ' ' || COALESCE(c.firma, '')
+        FROM firmenschreiben f LEFT JOIN customers c ON c.id = f.customer_id
+        WHERE f.id BETWEEN :start AND :end
+        """,
+    )),
+)
+
+
+# Geldbetraege: massgeblich ist die Spalte <name>_cent (INTEGER, ganze Cent);
+# die alte REAL-Spalte wird fuer Backups und aeltere Programmstaende mitgeschrieben.
+MONEY_COLUMNS = {
+    "articles": ("preis",),
+    "invoices": ("netto", "mwst_betrag", "brutto"),
+    "invoice_lines": ("einzelpreis", "gesamt_netto"),
+    "kostenvoranschlaege": ("netto", "mwst_betrag", "brutto"),
+    "kv_lines": ("einzelpreis", "gesamt_netto"),
+    "bank_transactions": ("amount",),
+}
+
+
+def _cents_from_real_sql(table: str, condition: str) -> str:
+    assignments = ", ".join(
+        f"{column}_cent = CAST(ROUND({column} * 100) AS INTEGER)" for column in MONEY_COLUMNS[table]
+    )
+    return f"UPDATE {table} SET {assignments} WHERE {condition}"
+
+
+def fill_missing_cents(conn: sqlite3.Connection):
+    """Ergaenzt fehlende Cent-Werte aus den REAL-Spalten (z.B. nach Import alter Backups)."""
+    for table, columns in MONEY_COLUMNS.items():
+        missing = " OR ".join(f"({column}_cent IS NULL AND {column} IS NOT NULL)" for column in columns)
+        conn.execute(_cents_from_real_sql(table, missing))
+
+
+# Schnellere Gegenstuecke zu den Standard-Convertern aus sqlite3.dbapi2.
+sqlite3.register_converter("date", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("timestamp", lambda value: datetime.fromisoformat(value.decode()))
+
+
+class RowMapper:
+    """Baut Modelle aus Ergebniszeilen ueber Spaltenpositionen statt Spaltennamen.
+
+    Die Zuordnung Spalte -> Feld wird je Spaltenfolge einmal ermittelt und
+    wiederverwendet. Cent-Spalten aus MONEY_COLUMNS liefern die Euro-Betraege,
+    converters wandeln einzelne Felder um (z.B. bool fuer 0/1-Spalten).
+    """
+
+    def __init__(
+        self,
+        model: type,
+        table: str | None = None,
+        converters: dict[str, Callable] | None = None,
+    ):
+        self.model = model
+        self._money = MONEY_COLUMNS.get(table, ())
+        self._converters = converters or {}
+        self._layouts: dict[tuple[str, ...], Callable] = {}
+
+    def one(self, cursor: sqlite3.Cursor):
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return self.builder(cursor.description)(row)
+
+    def all(self, cursor: sqlite3.Cursor) -> list:
+        # Zeilen direkt vom Cursor abnehmen, ohne Zwischenliste aller Rows.
+        build = self.builder(cursor.description)
+        return [build(row) for row in cursor]
+
+    def builder(self, description) -> Callable:
+        """Liefert die Bau-Funktion fuer Zeilen mit der Spaltenfolge aus cursor.description."""
+        names = tuple(column[0] for column in description)
+        build = self._layouts.get(names)
+        if build is None:
+            build = self._layouts[names] = self._compile(names)
+        return build
+
+    def _compile(self, names: tuple[str, ...]) -> Callable:
+        index = {name: position for position, name in enumerate(names)}
+        model_fields = [f for f in fields(self.model) if f.init]
+        field_names: list[str] = []
+        sources: list[int] = []
+        adjustments: list[tuple[int, Callable]] = []
+        for f in model_fields:
+            column = f"{f.name}_cent" if f.name in self._money and f"{f.name}_cent" in index else f.name
+            if column not in index:
+                continue
+            if column != f.name:
+                adjustments.append((len(sources), _cents_or_real(index.get(f.name), f.default)))
+            converter = self._converters.get(f.name)
+            if converter is not None:
+                adjustments.append((len(sources), _converted(converter)))
+            field_names.append(f.name)
+            sources.append(index[column])
+
+        model = self.model
+        # Lueckenlos vorne belegte Felder koennen positionsweise uebergeben werden.
+        positional = field_names == [f.name for f in model_fields[:len(field_names)]]
+        if not sources:
+            return lambda row: model()
+        getter = itemgetter(*sources)
+        if len(sources) == 1:
+            single = getter
+            getter = lambda row: (single(row),)
+
+        if not adjustments:
+            if positional:
+                return lambda row: model(*getter(row))
+            return lambda row: model(**dict(zip(field_names, getter(row))))
+
+        def build(row):
+            values = list(getter(row))
+            for position, adjust in adjustments:
+                values[position] = adjust(row, values[position])
+            if positional:
+                return model(*values)
+            return model(**dict(zip(field_names, values)))
+
+        return build
+
+
+def _cents_or_real(real_index: int | None, default) -> Callable:
+    """Euro-Betrag aus der Cent-Spalte; fehlt der Cent-Wert, gilt die REAL-Spalte."""
+
+    def adjust(row, cents):
+        if cents is not None:
+            return from_cents(cents)
+        return row[real_index] if real_index is not None else default
+
+    return adjust
+
+
+def _converted(converter: Callable) -> Callable:
+    return lambda row, value: converter(value)
+
+
+def split_sql_script(script: str) -> list[str]:
+    """Zerlegt ein SQL-Skript in einzelne Statements (Trigger bleiben ganz)."""
+    statements = []
+    pending = ""
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ""
+    if pending.strip():
+        statements.append(pending.strip())
+    return statements
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _create_base_schema(conn: sqlite3.Connection):
+    for statement in split_sql_script(SCHEMA_SQL):
+        conn.execute(statement)
+
+    # Datenbanken aus der Zeit vor user_version auf den Stand des Basisschemas bringen.
+    columns = _columns(conn, "invoices")
+    # zeitraum_von/zeitraum_bis -> zeitraum (TEXT)
+    if "zeitraum_von" in columns and "zeitraum" not in columns:
+        conn.execute("ALTER TABLE invoices ADD COLUMN zeitraum TEXT")
+        conn.execute(
+            "UPDATE invoices SET zeitraum = zeitraum_von || ' - ' || zeitraum_bis "
+            "WHERE zeitraum_von IS NOT NULL AND zeitraum_bis IS NOT NULL"
+        )
+    if "bezahlt_am" not in columns:
+        conn.execute("ALTER TABLE invoices ADD COLUMN bezahlt_am DATE")
+
+    if "glaeubiger_id" not in _columns(conn, "suppliers"):
+        conn.execute("ALTER TABLE suppliers ADD COLUMN glaeubiger_id TEXT")
+
+    if "notizen" not in _columns(conn, "customers"):
+        conn.execute("ALTER TABLE customers ADD COLUMN notizen TEXT")
+
+    bank_account_columns = _columns(conn, "bank_accounts")
+    if "current_balance" not in bank_account_columns:
+        conn.execute("ALTER TABLE bank_accounts ADD COLUMN current_balance REAL")
+    if "available_balance" not in bank_account_columns:
+        conn.execute("ALTER TABLE bank_accounts ADD COLUMN available_balance REAL")
+    if "balance_date" not in bank_account_columns:
+        conn.execute("ALTER TABLE bank_accounts ADD COLUMN balance_date DATE")
+
+
+def _create_search_index(conn: sqlite3.Connection):
+    for statement in split_sql_script(SEARCH_INDEX_SQL):
+        conn.execute(statement)
+
+
+# Zusammengesetzte Indizes passend zu den Listen-Sortierungen (datum DESC, id DESC),
+# damit Filter nach Status/Kunde ohne temporaeren Sortierbaum auskommen.
+SORT_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_invoices_status_datum ON invoices(status, datum DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_invoices_customer_datum ON invoices(customer_id, datum DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_invoice_lines_invoice_position ON invoice_lines(invoice_id, position);
+CREATE INDEX IF NOT EXISTS idx_kv_status_datum ON kostenvoranschlaege(status, datum DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_kv_customer_datum ON kostenvoranschlaege(customer_id, datum DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_kv_lines_kv_position ON kv_lines(kv_id, position);
+CREATE INDEX IF NOT EXISTS idx_fs_status_datum ON firmenschreiben(status, datum DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_fs_customer_datum ON firmenschreiben(customer_id, datum DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_bank_transactions_account_booking
+    ON bank_transactions(account_id, booking_date DESC, id DESC);
+
+-- Durch die Indizes oben abgedeckt (gleiche fuehrende Spalte).
+DROP INDEX IF EXISTS idx_invoices_status;
+DROP INDEX IF EXISTS idx_invoices_customer;
+DROP INDEX IF EXISTS idx_invoice_lines_invoice;
+DROP INDEX IF EXISTS idx_kv_status;
+DROP INDEX IF EXISTS idx_kv_customer;
+DROP INDEX IF EXISTS idx_kv_lines_kv;
+DROP INDEX IF EXISTS idx_fs_status;
+DROP INDEX IF EXISTS idx_bank_transactions_account;
+"""
+
+
+def _create_sort_indexes(conn: sqlite3.Connection):
+    for statement in split_sql_script(SORT_INDEX_SQL):
+        conn.execute(statement)
+
+
+# Ersetzt die Trigger aus Version 2, die den Kundennamen ohne Firma in
+# invoices_fts und kv_fts schrieben (fs_fts hatte die Firma schon).
+CUSTOMER_NAME_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS invoices_fts_ai;
+DROP TRIGGER IF EXISTS invoices_fts_au;
+DROP TRIGGER IF EXISTS kv_fts_ai;
+DROP TRIGGER IF EXISTS kv_fts_au;
+DROP TRIGGER IF EXISTS customers_fts_docs_au;
+
+CREATE TRIGGER invoices_fts_ai AFTER INSERT ON invoices BEGIN
+    INSERT INTO invoices_fts (rowid, rechnungsnr, betreff, kunde)
+    VALUES (
+        NEW.id, NEW.rechnungsnr, NEW.betreff,
+        (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '') || ' ' || COALESCE(firma, '')
+         FROM customers WHERE id = NEW.customer_id)
+    );
+END;
+
+CREATE TRIGGER invoices_fts_au AFTER UPDATE OF rechnungsnr, betreff, customer_id ON invoices
+WHEN OLD.rechnungsnr IS NOT NEW.rechnungsnr
+    OR OLD.betreff IS NOT NEW.betreff
+    OR OLD.customer_id IS NOT NEW.customer_id
+BEGIN
+    UPDATE invoices_fts
+    SET rechnungsnr = NEW.rechnungsnr,
+        betreff = NEW.betreff,
+        kunde = (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '') || ' ' || COALESCE(firma, '')
+                 FROM customers WHERE id = NEW.customer_id)
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER kv_fts_ai AFTER INSERT ON kostenvoranschlaege BEGIN
+    INSERT INTO kv_fts (rowid, kvnr, betreff, kunde)
+    VALUES (
+        NEW.id, NEW.kvnr, NEW.betreff,
+        (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '') || ' ' || COALESCE(firma, '')
+         FROM customers WHERE id = NEW.customer_id)
+    );
+END;
+
+CREATE TRIGGER kv_fts_au AFTER UPDATE OF kvnr, betreff, customer_id ON kostenvoranschlaege
+WHEN OLD.kvnr IS NOT NEW.kvnr
+    OR OLD.betreff IS NOT NEW.betreff
+    OR OLD.customer_id IS NOT NEW.customer_id
+BEGIN
+    UPDATE kv_fts
+    SET kvnr = NEW.kvnr,
+        betreff = NEW.betreff,
+        kunde = (SELECT COALESCE(vorname, '') || ' ' || COALESCE(nachname, '') || ' ' || COALESCE(firma, '')
+                 FROM customers WHERE id = NEW.customer_id)
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER customers_fts_docs_au AFTER UPDATE OF vorname, nachname, firma ON customers
+WHEN OLD.vorname IS NOT NEW.vorname
+    OR OLD.nachname IS NOT NEW.nachname
+    OR OLD.firma IS NOT NEW.firma
+BEGIN
+    UPDATE invoices_fts
+    SET kunde = COALESCE(NEW.vorname, '') || ' ' || COALESCE(NEW.nachname, '') || ' ' || COALESCE(NEW.firma, '')
+    WHERE rowid IN (SELECT id FROM invoices WHERE customer_id = NEW.id);
+    UPDATE kv_fts
+    SET kunde = COALESCE(NEW.vorname, '') || ' ' || COALESCE(NEW.nachname, '') || ' ' || COALESCE(NEW.firma, '')
+    WHERE rowid IN (SELECT id FROM kostenvoranschlaege WHERE customer_id = NEW.id);
+    UPDATE fs_fts
+    SET kunde = COALESCE(NEW.vorname, '') || ' ' || COALESCE(NEW.nachname, '') || ' ' || COALESCE(NEW.firma, '')
+    WHERE rowid IN (SELECT id FROM firmenschreiben WHERE customer_id = NEW.id);
+END;
+"""
+
+CUSTOMER_NAME_BACKFILLS = (
+    Backfill("invoices", (
+        "DELETE FROM invoices_fts WHERE rowid BETWEEN :start AND :end",
+        """
+        INSERT INTO invoices_fts (rowid, rechnungsnr, betreff, kunde)
+        SELECT i.id, i.rechnungsnr, i.betreff,
+               COALESCE(c.vorname, '') || ' ' || COALESCE(c.nachname, '') || ' ' || COALESCE(c.firma, '')
+        FROM invoices i LEFT JOIN customers c ON c.id = i.customer_id
+        WHERE i.id BETWEEN :start AND :end
+        """,
+    )),
+    Backfill("kostenvoranschlaege", (
+        "DELETE FROM kv_fts WHERE rowid BETWEEN :start AND :end",
+        """
+        INSERT INTO kv_fts (rowid, kvnr, betreff, kunde)
+        SELECT k.id, k.kvnr, k.betreff,
+               COALESCE(c.vorname, '') || ' ' || COALESCE(c.nachname, '') || ' ' || COALESCE(c.firma, '')
+        FROM kostenvoranschlaege k LEFT JOIN customers c ON c.id = k.customer_id
+        WHERE k.id BETWEEN :start AND :end
+        """,
+    )),
+)
+
+
+def _recreate_customer_name_triggers(conn: sqlite3.Connection):
+    for statement in split_sql_script(CUSTOMER_NAME_TRIGGERS_SQL):
+        conn.execute(statement)
+
+
+def _add_cent_columns(conn: sqlite3.Connection):
+    for table, columns in MONEY_COLUMNS.items():
+        existing = _columns(conn, table)
+        for column in columns:
+            if f"{column}_cent" not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}_cent INTEGER")
+
+
+# Neue Schritte nur hinten anfuegen; bestehende Versionen nie aendern.
+MIGRATIONS = (
+    Migration(1, "Basisschema", apply=_create_base_schema),
+    Migration(2, "FTS5-Suchtabellen und Trigger", apply=_create_search_index),
+    Migration(3, "Suchindizes befuellen", backfills=SEARCH_INDEX_BACKFILLS),
+    Migration(4, "Geldbetraege als ganze Cent", apply=_add_cent_columns),
+    Migration(
+        5,
+        "Cent-Spalten befuellen",
+        backfills=tuple(
+            Backfill(table, (_cents_from_real_sql(table, "rowid BETWEEN :start AND :end"),))
+            for table in MONEY_COLUMNS
+        ),
+    ),
+    Migration(6, "Zusammengesetzte Indizes fuer Sortierungen", apply=_create_sort_indexes),
+    Migration(
+        7,
+        "Firmenname im Kundenfeld der Rechnungs- und KV-Suche",
+        apply=_recreate_customer_name_triggers,
+        backfills=CUSTOMER_NAME_BACKFILLS,
+    ),
+)
+
+
+def build_fts_query(query: str) -> str | None:
+    """Wandelt eine Sucheingabe in einen FTS5-Ausdruck mit Praefixsuche um.
+
+    Jedes Wort muss vorkommen; "RE-2026" wird zu '"re"* "2026"*'.
+    Gibt None zurueck, wenn die Eingabe keine suchbaren Zeichen enthaelt.
+    """
+    tokens = re.findall(r"[^\W_]+", query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+# Bleibt unter dem Variablenlimit aelterer SQLite-Versionen (999).
+IN_CHUNK_SIZE = 500
+
+
+def chunked(values: list, size: int = IN_CHUNK_SIZE):
+    """Teilt values fuer IN (...)-Abfragen in Bloecke von hoechstens size Eintraegen."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def keyset_after(after: tuple, date_expr: str, id_expr: str) -> tuple[str, list]:
+    """Bedingung fuer die Seite nach after=(datum, id) bei ORDER BY datum DESC, id DESC."""
+    after_datum, after_id = after
+    datum_str = after_datum.isoformat() if hasattr(after_datum, "isoformat") else after_datum
+    # Zeilenwert-Vergleich, damit SQLite den Datumsindex als Bereich nutzt.
+    return f"({date_expr}, {id_expr}) < (?, ?)", [datum_str, after_id]
+
+
+def sync_child_rows(
+    db: "Database",
+    table: str,
+    parent_column: str,
+    parent_id: int,
+    columns: tuple[str, ...],
+    rows: list[tuple[int | None, tuple]],
+) -> list[int]:
+    """Gleicht die Kindzeilen von parent_id mit rows=[(id, werte), ...] ab.
+
+    Geaendert wird nur, was sich unterscheidet: unveraenderte Zeilen bleiben
+    unberuehrt, fehlende werden geloescht, Zeilen ohne (gueltige) id gemeinsam
+    eingefuegt. Muss in einer Transaktion laufen; liefert die ids in der
+    Reihenfolge von rows.
+    """
+    column_list = ", ".join(columns)
+    cursor = db.execute(
+        f"SELECT id, {column_list} FROM {table} WHERE {parent_column} = ?", (parent_id,)
+    )
+    stored = {row[0]: tuple(row[1:]) for row in cursor}
+
+    ids: list[int | None] = []
+    updates: list[tuple] = []
+    inserts: list[tuple] = []
+    for row_id, values in rows:
+        if row_id in stored:
+            if stored.pop(row_id) != tuple(values):
+                updates.append((*values, row_id))
+            ids.append(row_id)
+        else:
+            inserts.append((parent_id, *values))
+            ids.append(None)
+
+    if stored:
+        db.executemany(f"DELETE FROM {table} WHERE id = ?", [(row_id,) for row_id in stored])
+    if updates:
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        db.executemany(f"UPDATE {table} SET {assignments} WHERE id = ?", updates)
+    if inserts:
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        db.executemany(
+            f"INSERT INTO {table} ({parent_column}, {column_list}) VALUES ({placeholders})", inserts
+        )
+        # AUTOINCREMENT vergibt in der Schreibtransaktion aufsteigende ids.
+        cursor = db.execute(
+            f"SELECT id FROM {table} WHERE {parent_column} = ? ORDER BY id DESC LIMIT ?",
+            (parent_id, len(inserts)),
+        )
+        new_ids = iter(reversed([row[0] for row in cursor]))
+        ids = [row_id if row_id is not None else next(new_ids) for row_id in ids]
+    return ids
+
+
+def reserve_counter(db: "Database", table: str, key_column: str, key: int, count: int = 1) -> int:
+    """Erhoeht letzter_zaehler von key in table um count und liefert den ersten Wert.
+
+    Eine einzige UPSERT-Anweisung, daher ohne Wettlauf zwischen Lesen und Schreiben;
+    die Werte erster .. erster + count - 1 gehoeren dem Aufrufer.
+    """
+    if count < 1:
+        raise ValueError("count muss mindestens 1 sein")
+    with db.transaction():
+        rows = db.execute(
+            f"""INSERT INTO {table} ({key_column}, letzter_zaehler) VALUES (?, ?)
+                ON CONFLICT({key_column}) DO UPDATE
+                SET letzter_zaehler = COALESCE(letzter_zaehler, 0) + excluded.letzter_zaehler
+                RETURNING letzter_zaehler""",
+            (key, count),
+        ).fetchall()
+    return rows[0][0] - count + 1
+
+
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL")
+TEMP_STORE_MODES = ("DEFAULT", "FILE", "MEMORY")
+SLOW_QUERY_LOG_NAME = "slow_queries.log"
+
+
+@dataclass
+class DatabaseProfile:
+    """Leistungsrelevante SQLite-Einstellungen, angewendet auf jede Verbindung."""
+
+    synchronous: str = "NORMAL"
+    cache_size_mb: int = 64
+    mmap_size_mb: int = 256
+    temp_store: str = "MEMORY"
+    busy_timeout_ms: int = 5000
+    optimize_on_close: bool = True
+    # SQL-Profiler samt Slow-Log; nur zur Fehlersuche einschalten.
+    profile_queries: bool = False
+    slow_query_ms: int = 200
+
+    def pragmas(self) -> list[str]:
+        synchronous = self.synchronous.upper() if self.synchronous.upper() in SYNCHRONOUS_MODES else "NORMAL"
+        temp_store = self.temp_store.upper() if self.temp_store.upper() in TEMP_STORE_MODES else "DEFAULT"
+        return [
+            f"PRAGMA synchronous={synchronous}",
+            # Negativer Wert = Groesse in KiB statt in Seiten.
+            f"PRAGMA cache_size=-{max(int(self.cache_size_mb), 1) * 1024}",
+            f"PRAGMA mmap_size={max(int(self.mmap_size_mb), 0) * 1024 * 1024}",
+            f"PRAGMA temp_store={temp_store}",
+            f"PRAGMA busy_timeout={max(int(self.busy_timeout_ms), 0)}",
+        ]
+
+
+# PRAGMAs ohne "=", die trotzdem schreiben.
+_WRITING_PRAGMAS = ("OPTIMIZE", "WAL_CHECKPOINT", "INCREMENTAL_VACUUM")
+# Hinter einer CTE kann auch ein INSERT/UPDATE/DELETE stehen. Im Zweifel (z. B.
+# replace() oder ein Literal mit dem Wort) geht die Anweisung an den Schreiber.
+_CTE_WRITE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+def _is_read_statement(sql: str) -> bool:
+    stripped = sql.lstrip()
+    head = stripped[:8].upper()
+    if head.startswith(("SELECT", "EXPLAIN", "VALUES")):
+        return True
+    if head.startswith("WITH"):
+        return _CTE_WRITE.search(stripped) is None
+    if not head.startswith("PRAGMA") or "=" in sql:
+        return False
+    return not stripped[6:].lstrip().upper().startswith(_WRITING_PRAGMAS)
+
+
+class DatabaseBusyError(sqlite3.OperationalError):
+    """Die Schreibverbindung blieb laenger als busy_timeout_ms belegt."""
+
+
+class _ReaderSlot:
+    """Haelt die Leseverbindung eines Threads; endet der Thread, wird sie geschlossen."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
 class Database:
+    """Verbindungspool: eine Leseverbindung je Thread plus eine Schreibverbindung.
+
+    Lesezugriffe laufen unter WAL parallel auf der Verbindung des jeweiligen
+    Threads. Schreibzugriffe gehen ueber die gemeinsame Schreibverbindung; der
+    schreibende Thread haelt sie bis commit()/rollback() exklusiv und liest
+    solange ebenfalls ueber sie, damit er seine eigenen Aenderungen sieht.
+    Wer sie nicht binnen busy_timeout_ms bekommt, erhaelt DatabaseBusyError.
+    Leseverbindungen beendeter Threads werden automatisch geschlossen.
+    """
+
     _instance = None
 
-    def __init__(self, db_path: Path | None = None):
+    def __init__(self, db_path: Path | None = None, profile: DatabaseProfile | None = None):
         self.db_path = db_path or get_db_path()
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = None
+        self.profile = profile or DatabaseProfile()
+        self._pool_lock = threading.Lock()
+        self._readers: dict[int, sqlite3.Connection] = {}
+        self._local = threading.local()
+        self._writer: sqlite3.Connection | None = None
+        self._write_lock = threading.Lock()
+        self._write_owner: int | None = None
+        # Schachtelungstiefe von transaction(); nur der Besitzer der Schreibverbindung aendert sie.
+        self._tx_depth = 0
+        self._after_commit: list[Callable[[], None]] = []
+        self.profiler: QueryProfiler | None = None
+        if self.profile.profile_queries:
+            self.profiler = QueryProfiler(
+                self.profile.slow_query_ms, self.db_path.with_name(SLOW_QUERY_LOG_NAME)
+            )
 
     @classmethod
-    def get_instance(cls, db_path: Path | None = None) -> "Database":
+    def get_instance(cls, db_path: Path | None = None, profile: DatabaseProfile | None = None) -> "Database":
         if cls._instance is None:
-            cls._instance = cls(db_path)
+            cls._instance = cls(db_path, profile)
         return cls._instance
 
+    def _open_connection(self) -> sqlite3.Connection:
+        # Jede Verbindung wird nur von einem Thread zur Zeit benutzt; close() darf
+        # sie aber aus dem Haupt-Thread schliessen.
+        conn = sqlite3.connect(
+            str(self.db_path),
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        for pragma in self.profile.pragmas():
+            conn.execute(pragma)
+        return conn
+
     @property
     def connection(self) -> sqlite3.Connection:
-        if self._conn is None:
-            self._conn = sqlite3.connect(
-                str(self.db_path),
-                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
-            )
-            self._conn.row_factory = sqlite3.Row
-            self._conn.execute("PRAGMA journal_mode=WAL")
-            self._conn.execute("PRAGMA foreign_keys=ON")
-        return self._conn
+        """Schreibverbindung; der aufrufende Thread haelt sie bis commit()/rollback()."""
+        thread_id = threading.get_ident()
+        if self._write_owner != thread_id:
+            # Ein langer Schreibvorgang (z. B. Bank-Sync) darf die Oberflaeche nicht
+            # unbegrenzt blockieren; gewartet wird hoechstens busy_timeout_ms.
+            timeout = max(int(self.profile.busy_timeout_ms), 0) / 1000
+            if not self._write_lock.acquire(timeout=timeout):
+                raise DatabaseBusyError(
+                    "Datenbank beschaeftigt: ein anderer Vorgang schreibt gerade. "
+                    "Bitte in einem Moment erneut versuchen."
+                )
+            self._write_owner = thread_id
+        if self._writer is None:
+            self._writer = self._open_connection()
+        return self._writer
+
+    @property
+    def reader(self) -> sqlite3.Connection:
+        """Leseverbindung des aufrufenden Threads."""
+        thread_id = threading.get_ident()
+        if self._write_owner == thread_id:
+            return self._writer
+        slot = getattr(self._local, "reader", None)
+        if slot is None:
+            slot = _ReaderSlot(self._open_connection())
+            weakref.finalize(slot, self._drop_reader, thread_id, slot.conn)
+            with self._pool_lock:
+                self._readers[thread_id] = slot.conn
+            self._local.reader = slot
+        return slot.conn
+
+    def _drop_reader(self, thread_id: int, conn: sqlite3.Connection):
+        with self._pool_lock:
+            if self._readers.get(thread_id) is conn:
+                del self._readers[thread_id]
+        conn.close()
+
+    def _connection_for(self, sql: str) -> sqlite3.Connection:
+        if _is_read_statement(sql):
+            return self.reader
+        return self.connection
+
+    def _release_writer(self):
+        if self._write_owner == threading.get_ident():
+            self._write_owner = None
+            self._write_lock.release()
 
     def initialize(self):
-        self.connection.executescript(SCHEMA_SQL)
-        self._migrate()
-        self.connection.commit()
-
-    def _migrate(self):
-        """Migriert bestehende DB-Schemas auf aktuelle Version."""
-        cursor = self.connection.execute("PRAGMA table_info(invoices)")
-        columns = {row[1] for row in cursor.fetchall()}
-        # zeitraum_von/zeitraum_bis -> zeitraum (TEXT)
-        if "zeitraum_von" in columns and "zeitraum" not in columns:
-            self.connection.execute("ALTER TABLE invoices ADD COLUMN zeitraum TEXT")
-            self.connection.execute(
-                "UPDATE invoices SET zeitraum = zeitraum_von || ' - ' || zeitraum_bis "
-                "WHERE zeitraum_von IS NOT NULL AND zeitraum_bis IS NOT NULL"
-            )
-        if "bezahlt_am" not in columns:
-            self.connection.execute("ALTER TABLE invoices ADD COLUMN bezahlt_am DATE")
-
-        supplier_cursor = self.connection.execute("PRAGMA table_info(suppliers)")
-        supplier_columns = {row[1] for row in supplier_cursor.fetchall()}
-        if "glaeubiger_id" not in supplier_columns:
-            self.connection.execute("ALTER TABLE suppliers ADD COLUMN glaeubiger_id TEXT")
-
-        customer_cursor = self.connection.execute("PRAGMA table_info(customers)")
-        customer_columns = {row[1] for row in customer_cursor.fetchall()}
-        if "notizen" not in customer_columns:
-            self.connection.execute("ALTER TABLE customers ADD COLUMN notizen TEXT")
-
-        bank_account_cursor = self.connection.execute("PRAGMA table_info(bank_accounts)")
-        bank_account_columns = {row[1] for row in bank_account_cursor.fetchall()}
-        if bank_account_columns and "current_balance" not in bank_account_columns:
-            self.connection.execute("ALTER TABLE bank_accounts ADD COLUMN current_balance REAL")
-        if bank_account_columns and "available_balance" not in bank_account_columns:
-            self.connection.execute("ALTER TABLE bank_accounts ADD COLUMN available_balance REAL")
-        if bank_account_columns and "balance_date" not in bank_account_columns:
-            self.connection.execute("ALTER TABLE bank_accounts ADD COLUMN balance_date DATE")
+        """Bringt das Schema per PRAGMA user_version auf den neuesten Stand."""
+        version = self.execute("PRAGMA user_version").fetchone()[0]
+        for migration in MIGRATIONS:
+            if migration.version > version:
+                self._apply_migration(migration)
+
+    def _apply_migration(self, migration: Migration):
+        for backfill in migration.backfills:
+            self._run_backfill(backfill)
+        with self.transaction() as conn:
+            if migration.apply is not None:
+                migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+
+    def _run_backfill(self, backfill: Backfill):
+        """Jedes Fenster in eigener Transaktion, damit die Datei nicht lange gesperrt bleibt."""
+        low, high = self.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {backfill.table}").fetchone()
+        if low is None:
+            return
+        for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+            params = {"start": start, "end": start + BACKFILL_BATCH_SIZE - 1}
+            with self.transaction() as conn:
+                for statement in backfill.statements:
+                    conn.execute(statement, params)
 
     def close(self):
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        if self.profile.optimize_on_close:
+            self._optimize()
+        with self._pool_lock:
+            connections = list(self._readers.values())
+            self._readers.clear()
+        # Verwirft die Slots aller Threads, damit sie neue Verbindungen oeffnen.
+        self._local = threading.local()
+        if self._writer is not None:
+            connections.append(self._writer)
+            self._writer = None
+        for conn in connections:
+            conn.close()
+        if self._write_owner is not None:
+            self._write_owner = None
+            self._write_lock.release()
+        self._tx_depth = 0
+        self._after_commit = []
+        if self.profiler is not None:
+            self.profiler.close()
+
+    def _optimize(self):
+        """Aktualisiert die Planer-Statistiken, sofern kein anderer Thread schreibt."""
+        if self._write_owner not in (None, threading.get_ident()):
+            return
+        try:
+            self.connection.execute("PRAGMA optimize")
+            self.commit()
+        except sqlite3.Error:
+            self.rollback()
+
+    def active_pragmas(self) -> dict[str, object]:
+        """Aktuelle Werte der Profil-PRAGMAs auf der Verbindung dieses Threads."""
+        names = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+        return {name: self.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+
+    def interrupt(self, thread_id: int):
+        """Bricht die laufende Abfrage des Threads thread_id ab (threadsicher)."""
+        conn = self._readers.get(thread_id)
+        if conn is not None:
+            conn.interrupt()
+        if self._write_owner == thread_id and self._writer is not None:
+            self._writer.interrupt()
 
     def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
-        return self.connection.execute(sql, params)
+        conn = self._connection_for(sql)
+        if self.profiler is not None:
+            return self.profiler.execute(conn, sql, params)
+        return conn.execute(sql, params)
 
     def executemany(self, sql: str, params_list: list[tuple]) -> sqlite3.Cursor:
+        if self.profiler is not None:
+            return self.profiler.executemany(self.connection, sql, params_list)
         return self.connection.executemany(sql, params_list)
 
+    @contextmanager
+    def transaction(self):
+        """Arbeitseinheit: alle Schreibzugriffe darin werden gemeinsam festgeschrieben.
+
+        Verschachtelte Aufrufe treten der aeusseren Einheit als SAVEPOINT bei; ein
+        Fehler darin verwirft nur ihren Teil. commit() ist innerhalb wirkungslos.
+        """
+        conn = self.connection
+        depth = self._tx_depth
+        pending = len(self._after_commit)
+        if depth == 0:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+        else:
+            conn.execute(f"SAVEPOINT unit_{depth}")
+        self._tx_depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            self._tx_depth = depth
+            if depth == 0:
+                self._end_write(conn.rollback, committed=False)
+            else:
+                conn.execute(f"ROLLBACK TO unit_{depth}")
+                conn.execute(f"RELEASE unit_{depth}")
+                del self._after_commit[pending:]
+            raise
+        self._tx_depth = depth
+        if depth == 0:
+            self._end_write(conn.commit, committed=True)
+        else:
+            conn.execute(f"RELEASE unit_{depth}")
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Ruft callback auf, sobald die laufende Schreibtransaktion festgeschrieben ist.
+
+        Ohne offene Transaktion sofort; bei einem Rollback entfaellt der Aufruf.
+        """
+        if self._write_owner != threading.get_ident():
+            callback()
+            return
+        self._after_commit.append(callback)
+
+    def _end_write(self, finish, committed: bool):
+        callbacks, self._after_commit = self._after_commit, []
+        try:
+            finish()
+        finally:
+            self._release_writer()
+        if committed:
+            for callback in callbacks:
+                callback()
+
     def commit(self):
-        self.connection.commit()
+        if self._write_owner != threading.get_ident() or self._tx_depth:
+            return
+        self._end_write(self._writer.commit, committed=True)
 
     def rollback(self):
-        self.connection.rollback()
+        # In einer Arbeitseinheit entscheidet transaction() beim Verlassen.
+        if self._write_owner != threading.get_ident() or self._tx_depth:
+            return
+        self._end_write(self._writer.rollback, committed=False)
+
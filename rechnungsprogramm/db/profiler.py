@@ -0,0 +1,202 @@
+import logging
+import math
+import re
+import sqlite3
+import sys
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from time import perf_counter
+
+# Laufzeiten je Anweisung, aus denen das p95 berechnet wird.
+SAMPLE_SIZE = 1000
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 3
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Fasst Anweisungen zusammen, die sich nur in Literalen oder IN-Listen unterscheiden."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("IN (?, ...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def _caller() -> str:
+    """Repo-Methode, die die Anweisung ausgeloest hat, sonst der erste Aufrufer ausserhalb von db."""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("db.repos."):
+            return frame.f_code.co_qualname
+        if fallback is None and module not in (__name__, "db.database"):
+            fallback = f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return fallback or "?"
+
+
+@dataclass(frozen=True)
+class QueryStats:
+    sql: str
+    count: int
+    total_ms: float
+    p95_ms: float
+    rows: int
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class _Entry:
+    __slots__ = ("count", "total_ms", "samples", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.samples: deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.rows = 0
+
+
+class _CountingCursor(sqlite3.Cursor):
+    """Zaehlt die gelesenen Zeilen fuer den Eintrag der ausgefuehrten Anweisung."""
+
+    entry: _Entry | None = None
+    lock = None
+
+    def _count(self, rows: int):
+        if rows and self.entry is not None:
+            with self.lock:
+                self.entry.rows += rows
+
+    def fetchone(self):
+        row = super().fetchone()
+        self._count(0 if row is None else 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        self._count(1)
+        return row
+
+
+class QueryProfiler:
+    """Sammelt Anzahl, Laufzeit und Zeilen je normalisierter SQL-Anweisung.
+
+    Gemessen wird der execute-Aufruf; bei SELECT enthaelt er den ersten Schritt
+    (inkl. Sortierung), die Zeilen werden beim Abholen gezaehlt. Anweisungen ueber
+    slow_query_ms landen mit aufrufender Repo-Methode im rotierenden Slow-Log.
+    """
+
+    def __init__(self, slow_query_ms: float = 200.0, log_path: Path | None = None):
+        self.slow_query_ms = slow_query_ms
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+        self._slow_log: logging.Logger | None = None
+
+    def execute(self, conn: sqlite3.Connection, sql: str, params=()) -> sqlite3.Cursor:
+        cursor = conn.cursor(_CountingCursor)
+        start = perf_counter()
+        cursor.execute(sql, params)
+        cursor.entry = self._record(sql, (perf_counter() - start) * 1000, cursor.rowcount)
+        cursor.lock = self._lock
+        return cursor
+
+    def executemany(self, conn: sqlite3.Connection, sql: str, params_list) -> sqlite3.Cursor:
+        start = perf_counter()
+        cursor = conn.executemany(sql, params_list)
+        self._record(sql, (perf_counter() - start) * 1000, cursor.rowcount)
+        return cursor
+
+    def _record(self, sql: str, elapsed_ms: float, rowcount: int) -> _Entry:
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            entry.count += 1
+            entry.total_ms += elapsed_ms
+            entry.samples.append(elapsed_ms)
+            # SELECT liefert -1; dort zaehlt der Cursor beim Abholen.
+            entry.rows += max(rowcount, 0)
+        if elapsed_ms >= self.slow_query_ms:
+            self._log_slow(key, elapsed_ms)
+        return entry
+
+    def _log_slow(self, sql: str, elapsed_ms: float):
+        if self.log_path is None:
+            return
+        if self._slow_log is None:
+            logger = logging.Logger("rechnungsprogramm.slow_sql")
+            handler = RotatingFileHandler(
+                self.log_path,
+                maxBytes=SLOW_LOG_MAX_BYTES,
+                backupCount=SLOW_LOG_BACKUPS,
+                encoding="utf-8",
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            self._slow_log = logger
+        self._slow_log.warning("%8.1f ms  %s  %s", elapsed_ms, _caller(), sql)
+
+    def stats(self) -> list[QueryStats]:
+        """Momentaufnahme, teuerste Anweisungen (Gesamtzeit) zuerst."""
+        with self._lock:
+            result = [
+                QueryStats(sql, e.count, e.total_ms, _percentile(e.samples, 0.95), e.rows)
+                for sql, e in self._entries.items()
+            ]
+        return sorted(result, key=lambda s: s.total_ms, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def format_report(self) -> str:
+        stats = self.stats()
+        total_ms = sum(s.total_ms for s in stats)
+        lines = [
+            f"SQL-Profil: {sum(s.count for s in stats)} Aufrufe, {len(stats)} Anweisungen, "
+            f"{total_ms:.1f} ms gesamt (Slow-Log ab {self.slow_query_ms:.0f} ms)",
+            f"{'Anzahl':>8} {'Gesamt ms':>10} {'Mittel ms':>10} {'p95 ms':>8} {'Zeilen':>9}  SQL",
+        ]
+        for s in stats:
+            lines.append(
+                f"{s.count:>8} {s.total_ms:>10.1f} {s.avg_ms:>10.2f} {s.p95_ms:>8.2f} {s.rows:>9}  {s.sql}"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        if self._slow_log is not None:
+            for handler in self._slow_log.handlers:
+                handler.close()
+            self._slow_log = None
@@ -1,46 +1,49 @@
 from models.article import Article
-from db.database import Database
+from db.database import Database, RowMapper
+from db.repos.master_data import master_data
+from utils.money import money_params
+
+_ARTICLES = RowMapper(Article, "articles", {"beguenstigt_35a": bool})
 
 
 class ArticleRepo:
     def __init__(self, db: Database):
         self.db = db
-
-    def _row_to_article(self, row) -> Article:
-        d = {k: row[k] for k in row.keys()}
-        d["beguenstigt_35a"] = bool(d.get("beguenstigt_35a", 0))
-        return Article(**d)
+        self.cache = master_data(db)
 
     def get_all(self) -> list[Article]:
-        rows = self.db.execute(
-            "SELECT * FROM articles ORDER BY bezeichnung"
-        ).fetchall()
-        return [self._row_to_article(r) for r in rows]
+        return self.cache.all("articles", self._load_all, lambda a: a.bezeichnung)
 
     def get_by_id(self, article_id: int) -> Article | None:
-        row = self.db.execute(
-            "SELECT * FROM articles WHERE id = ?", (article_id,)
-        ).fetchone()
-        return self._row_to_article(row) if row else None
+        return self.cache.get("articles", article_id, self._load_all)
 
-    def create(self, a: Article) -> int:
+    def _load_all(self) -> list[Article]:
         cursor = self.db.execute(
-            """INSERT INTO articles (bezeichnung, beschreibung, preis, mwst, beguenstigt_35a)
-               VALUES (?, ?, ?, ?, ?)""",
-            (a.bezeichnung, a.beschreibung, a.preis, a.mwst, int(a.beguenstigt_35a)),
+            "SELECT * FROM articles ORDER BY bezeichnung"
         )
-        self.db.commit()
+        return _ARTICLES.all(cursor)
+
+    def create(self, a: Article) -> int:
+        with self.db.transaction():
+            cursor = self.db.execute(
+                """INSERT INTO articles (bezeichnung, beschreibung, mwst, beguenstigt_35a, preis, preis_cent)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (a.bezeichnung, a.beschreibung, a.mwst, int(a.beguenstigt_35a), *money_params(a.preis)),
+            )
+            self.cache.put_after_commit(self.db, "articles", _ARTICLES, cursor.lastrowid)
         return cursor.lastrowid
 
     def update(self, a: Article):
-        self.db.execute(
-            """UPDATE articles SET bezeichnung=?, beschreibung=?, preis=?, mwst=?,
-               beguenstigt_35a=?, updated_at=CURRENT_TIMESTAMP
-               WHERE id=?""",
-            (a.bezeichnung, a.beschreibung, a.preis, a.mwst, int(a.beguenstigt_35a), a.id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE articles SET bezeichnung=?, beschreibung=?, mwst=?, beguenstigt_35a=?,
+                   preis=?, preis_cent=?, updated_at=CURRENT_TIMESTAMP
+                   WHERE id=?""",
+                (a.bezeichnung, a.beschreibung, a.mwst, int(a.beguenstigt_35a), *money_params(a.preis), a.id),
+            )
+            self.cache.put_after_commit(self.db, "articles", _ARTICLES, a.id)
 
     def delete(self, article_id: int):
-        self.db.execute("DELETE FROM articles WHERE id = ?", (article_id,))
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+            self.cache.discard_after_commit(self.db, "articles", article_id)
@@ -1,40 +1,37 @@
-from db.database import Database
+from db.database import Database, RowMapper
 from models.banking import BankAccount
 
+_ACCOUNTS = RowMapper(BankAccount, converters={"is_default": bool})
+
 
 class BankAccountRepo:
     def __init__(self, db: Database):
         self.db = db
 
-    def _row_to_account(self, row) -> BankAccount:
-        data = {k: row[k] for k in row.keys()}
-        data["is_default"] = bool(data.get("is_default", 0))
-        return BankAccount(**data)
-
     def get_by_id(self, account_id: int) -> BankAccount | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM bank_accounts WHERE id = ?",
             (account_id,),
-        ).fetchone()
-        return self._row_to_account(row) if row else None
+        )
+        return _ACCOUNTS.one(cursor)
 
     def get_for_connection(self, connection_id: int) -> list[BankAccount]:
-        rows = self.db.execute(
+        cursor = self.db.execute(
             """SELECT * FROM bank_accounts
                WHERE connection_id = ?
                ORDER BY is_default DESC, display_name, iban""",
             (connection_id,),
-        ).fetchall()
-        return [self._row_to_account(row) for row in rows]
+        )
+        return _ACCOUNTS.all(cursor)
 
     def get_default_for_connection(self, connection_id: int) -> BankAccount | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             """SELECT * FROM bank_accounts
                WHERE connection_id = ? AND is_default = 1
                ORDER BY id DESC LIMIT 1""",
             (connection_id,),
-        ).fetchone()
-        return self._row_to_account(row) if row else None
+        )
+        return _ACCOUNTS.one(cursor)
 
     def _find_existing_id(self, account: BankAccount) -> int | None:
         row = self.db.execute(
@@ -54,61 +51,61 @@ class BankAccountRepo:
 
     def save(self, account: BankAccount) -> BankAccount:
         existing_id = account.id or self._find_existing_id(account)
-        if existing_id:
-            existing = self.get_by_id(existing_id)
-            self.db.execute(
-                """UPDATE bank_accounts
-                   SET iban = ?, bic = ?, account_number = ?, subaccount = ?,
-                       display_name = ?, currency = ?, is_default = ?,
-                       current_balance = ?, available_balance = ?, balance_date = ?,
-                       updated_at = CURRENT_TIMESTAMP
-                   WHERE id = ?""",
-                (
-                    account.iban,
-                    account.bic,
-                    account.account_number,
-                    account.subaccount,
-                    account.display_name,
-                    account.currency,
-                    int(account.is_default),
-                    account.current_balance if account.current_balance is not None else existing.current_balance,
-                    account.available_balance if account.available_balance is not None else existing.available_balance,
+        with self.db.transaction():
+            if existing_id:
+                existing = self.get_by_id(existing_id)
+                self.db.execute(
+                    """UPDATE bank_accounts
+                       SET iban = ?, bic = ?, account_number = ?, subaccount = ?,
+                           display_name = ?, currency = ?, is_default = ?,
+                           current_balance = ?, available_balance = ?, balance_date = ?,
+                           updated_at = CURRENT_TIMESTAMP
+                       WHERE id = ?""",
                     (
-                        account.balance_date.isoformat()
-                        if account.balance_date
-                        else (
-                            existing.balance_date.isoformat()
-                            if existing and existing.balance_date
-                            else None
-                        )
+                        account.iban,
+                        account.bic,
+                        account.account_number,
+                        account.subaccount,
+                        account.display_name,
+                        account.currency,
+                        int(account.is_default),
+                        account.current_balance if account.current_balance is not None else existing.current_balance,
+                        account.available_balance if account.available_balance is not None else existing.available_balance,
+                        (
+                            account.balance_date.isoformat()
+                            if account.balance_date
+                            else (
+                                existing.balance_date.isoformat()
+                                if existing and existing.balance_date
+                                else None
+                            )
+                        ),
+                        existing_id,
                     ),
-                    existing_id,
-                ),
-            )
-            account.id = existing_id
-        else:
-            cursor = self.db.execute(
-                """INSERT INTO bank_accounts (
-                       connection_id, iban, bic, account_number, subaccount,
-                       display_name, currency, is_default, current_balance,
-                       available_balance, balance_date
-                   ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    account.connection_id,
-                    account.iban,
-                    account.bic,
-                    account.account_number,
-                    account.subaccount,
-                    account.display_name,
-                    account.currency,
-                    int(account.is_default),
-                    account.current_balance,
-                    account.available_balance,
-                    account.balance_date.isoformat() if account.balance_date else None,
-                ),
-            )
-            account.id = cursor.lastrowid
-        self.db.commit()
+                )
+                account.id = existing_id
+            else:
+                cursor = self.db.execute(
+                    """INSERT INTO bank_accounts (
+                           connection_id, iban, bic, account_number, subaccount,
+                           display_name, currency, is_default, current_balance,
+                           available_balance, balance_date
+                       ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        account.connection_id,
+                        account.iban,
+                        account.bic,
+                        account.account_number,
+                        account.subaccount,
+                        account.display_name,
+                        account.currency,
+                        int(account.is_default),
+                        account.current_balance,
+                        account.available_balance,
+                        account.balance_date.isoformat() if account.balance_date else None,
+                    ),
+                )
+                account.id = cursor.lastrowid
         return self.get_by_id(account.id)
 
     def save_many(
@@ -124,15 +121,15 @@ class BankAccountRepo:
         return self.get_for_connection(connection_id)
 
     def set_default(self, connection_id: int, account_id: int):
-        self.db.execute(
-            "UPDATE bank_accounts SET is_default = 0, updated_at = CURRENT_TIMESTAMP WHERE connection_id = ?",
-            (connection_id,),
-        )
-        self.db.execute(
-            "UPDATE bank_accounts SET is_default = 1, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (account_id,),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                "UPDATE bank_accounts SET is_default = 0, updated_at = CURRENT_TIMESTAMP WHERE connection_id = ?",
+                (connection_id,),
+            )
+            self.db.execute(
+                "UPDATE bank_accounts SET is_default = 1, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (account_id,),
+            )
 
     def update_balance(
         self,
@@ -141,16 +138,16 @@ class BankAccountRepo:
         available_balance: float | None,
         balance_date,
     ):
-        self.db.execute(
-            """UPDATE bank_accounts
-               SET current_balance = ?, available_balance = ?, balance_date = ?,
-                   updated_at = CURRENT_TIMESTAMP
-               WHERE id = ?""",
-            (
-                current_balance,
-                available_balance,
-                balance_date.isoformat() if balance_date else None,
-                account_id,
-            ),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE bank_accounts
+                   SET current_balance = ?, available_balance = ?, balance_date = ?,
+                       updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                (
+                    current_balance,
+                    available_balance,
+                    balance_date.isoformat() if balance_date else None,
+                    account_id,
+                ),
+            )
@@ -1,99 +1,162 @@
-from db.database import Database
+from db.database import Database, RowMapper, chunked
 from models.banking import BankTransactionMatch
 
+_MATCHES = RowMapper(BankTransactionMatch)
+
 
 class BankMatchRepo:
     def __init__(self, db: Database):
         self.db = db
 
-    def _row_to_match(self, row) -> BankTransactionMatch:
-        return BankTransactionMatch(**{k: row[k] for k in row.keys()})
-
     def get_for_transaction(self, transaction_id: int) -> list[BankTransactionMatch]:
-        rows = self.db.execute(
+        cursor = self.db.execute(
             """SELECT * FROM bank_transaction_matches
                WHERE bank_transaction_id = ?
                ORDER BY created_at DESC, id DESC""",
             (transaction_id,),
-        ).fetchall()
-        return [self._row_to_match(row) for row in rows]
+        )
+        return _MATCHES.all(cursor)
 
     def get_pair(self, transaction_id: int, invoice_id: int) -> BankTransactionMatch | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             """SELECT * FROM bank_transaction_matches
                WHERE bank_transaction_id = ? AND invoice_id = ?""",
             (transaction_id, invoice_id),
-        ).fetchone()
-        return self._row_to_match(row) if row else None
+        )
+        return _MATCHES.one(cursor)
 
     def get_confirmed_for_invoice(self, invoice_id: int) -> BankTransactionMatch | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             """SELECT * FROM bank_transaction_matches
                WHERE invoice_id = ? AND status = 'confirmed'
                ORDER BY confirmed_at DESC, id DESC
                LIMIT 1""",
             (invoice_id,),
-        ).fetchone()
-        return self._row_to_match(row) if row else None
+        )
+        return _MATCHES.one(cursor)
 
     def get_confirmed_for_transaction(self, transaction_id: int) -> BankTransactionMatch | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             """SELECT * FROM bank_transaction_matches
                WHERE bank_transaction_id = ? AND status = 'confirmed'
                ORDER BY confirmed_at DESC, id DESC
                LIMIT 1""",
             (transaction_id,),
-        ).fetchone()
-        return self._row_to_match(row) if row else None
+        )
+        return _MATCHES.one(cursor)
+
+    def get_pairs_by_status(self, status: str) -> set[tuple[int, int]]:
+        """Alle (bank_transaction_id, invoice_id)-Paare mit dem Status, in einer Abfrage."""
+        rows = self.db.execute(
+            "SELECT bank_transaction_id, invoice_id FROM bank_transaction_matches WHERE status = ?",
+            (status,),
+        ).fetchall()
+        return {(row[0], row[1]) for row in rows}
 
     def save(self, match: BankTransactionMatch) -> BankTransactionMatch:
-        existing = self.get_pair(match.bank_transaction_id, match.invoice_id)
-        if existing:
+        with self.db.transaction():
+            existing = self.get_pair(match.bank_transaction_id, match.invoice_id)
+            if existing:
+                self.db.execute(
+                    """UPDATE bank_transaction_matches
+                       SET status = ?, score = ?, reason_text = ?, confirmed_at = ?,
+                           updated_at = CURRENT_TIMESTAMP
+                       WHERE id = ?""",
+                    (
+                        match.status,
+                        match.score,
+                        match.reason_text,
+                        match.confirmed_at,
+                        existing.id,
+                    ),
+                )
+                match.id = existing.id
+            else:
+                cursor = self.db.execute(
+                    """INSERT INTO bank_transaction_matches (
+                           bank_transaction_id, invoice_id, status, score, reason_text, confirmed_at
+                       ) VALUES (?, ?, ?, ?, ?, ?)""",
+                    (
+                        match.bank_transaction_id,
+                        match.invoice_id,
+                        match.status,
+                        match.score,
+                        match.reason_text,
+                        match.confirmed_at,
+                    ),
+                )
+                match.id = cursor.lastrowid
+        cursor = self.db.execute(
+            "SELECT * FROM bank_transaction_matches WHERE id = ?",
+            (match.id,),
+        )
+        return _MATCHES.one(cursor)
+
+    def delete_suggestions_for_transaction(self, transaction_id: int):
+        with self.db.transaction():
             self.db.execute(
-                """UPDATE bank_transaction_matches
-                   SET status = ?, score = ?, reason_text = ?, confirmed_at = ?,
-                       updated_at = CURRENT_TIMESTAMP
-                   WHERE id = ?""",
-                (
-                    match.status,
-                    match.score,
-                    match.reason_text,
-                    match.confirmed_at,
-                    existing.id,
-                ),
+                """DELETE FROM bank_transaction_matches
+                   WHERE bank_transaction_id = ? AND status = 'suggested'""",
+                (transaction_id,),
             )
-            match.id = existing.id
-        else:
-            cursor = self.db.execute(
+
+    def replace_suggestions(
+        self,
+        transaction_ids: list[int],
+        matches: list[BankTransactionMatch],
+    ) -> list[BankTransactionMatch]:
+        """Ersetzt die Vorschlaege der Umsaetze durch matches, in einer Transaktion."""
+        with self.db.transaction():
+            for chunk in chunked(transaction_ids):
+                placeholders = ", ".join("?" for _ in chunk)
+                self.db.execute(
+                    f"""DELETE FROM bank_transaction_matches
+                        WHERE status = 'suggested' AND bank_transaction_id IN ({placeholders})""",
+                    tuple(chunk),
+                )
+            self.db.executemany(
                 """INSERT INTO bank_transaction_matches (
                        bank_transaction_id, invoice_id, status, score, reason_text, confirmed_at
-                   ) VALUES (?, ?, ?, ?, ?, ?)""",
-                (
-                    match.bank_transaction_id,
-                    match.invoice_id,
-                    match.status,
-                    match.score,
-                    match.reason_text,
-                    match.confirmed_at,
-                ),
+                   ) VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(bank_transaction_id, invoice_id) DO UPDATE SET
+                       status = excluded.status,
+                       score = excluded.score,
+                       reason_text = excluded.reason_text,
+                       confirmed_at = excluded.confirmed_at,
+                       updated_at = CURRENT_TIMESTAMP""",
+                [
+                    (
+                        match.bank_transaction_id,
+                        match.invoice_id,
+                        match.status,
+                        match.score,
+                        match.reason_text,
+                        match.confirmed_at,
+                    )
+                    for match in matches
+                ],
             )
-            match.id = cursor.lastrowid
-        self.db.commit()
-        row = self.db.execute(
-            "SELECT * FROM bank_transaction_matches WHERE id = ?",
-            (match.id,),
-        ).fetchone()
-        return self._row_to_match(row)
+            saved = self._get_pairs([(m.bank_transaction_id, m.invoice_id) for m in matches])
+        return [saved[(m.bank_transaction_id, m.invoice_id)] for m in matches]
 
-    def delete_suggestions_for_transaction(self, transaction_id: int):
-        self.db.execute(
-            """DELETE FROM bank_transaction_matches
-               WHERE bank_transaction_id = ? AND status = 'suggested'""",
-            (transaction_id,),
-        )
-        self.db.commit()
+    def _get_pairs(self, pairs: list[tuple[int, int]]) -> dict[tuple[int, int], BankTransactionMatch]:
+        wanted = set(pairs)
+        result: dict[tuple[int, int], BankTransactionMatch] = {}
+        for chunk in chunked(list({transaction_id for transaction_id, _ in wanted})):
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor = self.db.execute(
+                f"SELECT * FROM bank_transaction_matches WHERE bank_transaction_id IN ({placeholders})",
+                tuple(chunk),
+            )
+            for match in _MATCHES.all(cursor):
+                key = (match.bank_transaction_id, match.invoice_id)
+                if key in wanted:
+                    result[key] = match
+        return result
 
     def list_suggestions_for_account(self, account_id: int) -> list[dict]:
+        # CROSS JOIN legt die Reihenfolge fest: Buchungen des Kontos kommen bereits
+        # sortiert aus idx_bank_transactions_account_booking, ohne Sortierbaum.
         rows = self.db.execute(
             """SELECT
                    m.id AS match_id,
@@ -104,15 +167,15 @@ class BankMatchRepo:
                    m.reason_text,
                    t.booking_date,
                    t.value_date,
-                   t.amount,
+                   t.amount_cent / 100.0 AS amount,
                    t.currency,
                    t.purpose,
                    t.counterparty_name,
                    i.rechnungsnr,
                    i.datum AS invoice_date,
-                   i.brutto
-               FROM bank_transaction_matches m
-               JOIN bank_transactions t ON t.id = m.bank_transaction_id
+                   i.brutto_cent / 100.0 AS brutto
+               FROM bank_transactions t
+               CROSS JOIN bank_transaction_matches m ON m.bank_transaction_id = t.id
                JOIN invoices i ON i.id = m.invoice_id
                WHERE t.account_id = ? AND m.status = 'suggested'
                ORDER BY t.booking_date DESC, t.id DESC""",
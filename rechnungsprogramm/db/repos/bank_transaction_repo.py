@@ -1,112 +1,163 @@
-from db.database import Database
-from models.banking import BankTransaction
+from datetime import date
+
+from db.database import Database, RowMapper, chunked, keyset_after
+from models.banking import BankTransaction, BankTransactionChanges
+from utils.money import money_params
+
+# Sortierschluessel; passt zum Index idx_bank_transactions_account_date.
+SORT_DATE_SQL = "COALESCE(booking_date, value_date, '')"
+
+UPSERT_SQL = """INSERT INTO bank_transactions (
+        account_id, entry_hash, booking_date, value_date, amount, amount_cent, currency,
+        status, direction, counterparty_name, counterparty_iban,
+        counterparty_bic, purpose, customer_reference,
+        end_to_end_reference, prima_nota, raw_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(entry_hash) DO UPDATE SET
+        account_id = excluded.account_id,
+        booking_date = excluded.booking_date,
+        value_date = excluded.value_date,
+        amount = excluded.amount,
+        amount_cent = excluded.amount_cent,
+        currency = excluded.currency,
+        status = excluded.status,
+        direction = excluded.direction,
+        counterparty_name = excluded.counterparty_name,
+        counterparty_iban = excluded.counterparty_iban,
+        counterparty_bic = excluded.counterparty_bic,
+        purpose = excluded.purpose,
+        customer_reference = excluded.customer_reference,
+        end_to_end_reference = excluded.end_to_end_reference,
+        prima_nota = excluded.prima_nota,
+        raw_json = excluded.raw_json,
+        imported_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP"""
+
+_TRANSACTIONS = RowMapper(BankTransaction, "bank_transactions")
 
 
 class BankTransactionRepo:
     def __init__(self, db: Database):
         self.db = db
 
-    def _row_to_transaction(self, row) -> BankTransaction:
-        return BankTransaction(**{k: row[k] for k in row.keys()})
-
     def get_by_id(self, transaction_id: int) -> BankTransaction | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM bank_transactions WHERE id = ?",
             (transaction_id,),
-        ).fetchone()
-        return self._row_to_transaction(row) if row else None
+        )
+        return _TRANSACTIONS.one(cursor)
 
     def get_by_entry_hash(self, entry_hash: str) -> BankTransaction | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM bank_transactions WHERE entry_hash = ?",
             (entry_hash,),
-        ).fetchone()
-        return self._row_to_transaction(row) if row else None
+        )
+        return _TRANSACTIONS.one(cursor)
 
     def get_for_account(self, account_id: int, limit: int | None = 500) -> list[BankTransaction]:
+        return self.page(account_id, limit=limit)
+
+    def page(
+        self,
+        account_id: int,
+        after: tuple[date | None, int] | None = None,
+        limit: int | None = 200,
+        status: str | None = None,
+    ) -> list[BankTransaction]:
+        """Liefert Umsaetze eines Kontos, neueste zuerst.
+
+        after=(Buchungs- bzw. Valutadatum, id) ist der letzte Umsatz der vorherigen Seite.
+        """
+        conditions = ["account_id = ?"]
+        params: list = [account_id]
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if after:
+            after_datum, after_id = after
+            condition, after_params = keyset_after((after_datum or "", after_id), SORT_DATE_SQL, "id")
+            conditions.append(condition)
+            params.extend(after_params)
         sql = (
-            "SELECT * FROM bank_transactions WHERE account_id = ? "
-            "ORDER BY COALESCE(booking_date, value_date) DESC, id DESC"
+            "SELECT * FROM bank_transactions WHERE " + " AND ".join(conditions)
+            + f" ORDER BY {SORT_DATE_SQL} DESC, id DESC"
         )
-        params: tuple = (account_id,)
         if limit:
             sql += " LIMIT ?"
-            params = (account_id, limit)
-        rows = self.db.execute(sql, params).fetchall()
-        return [self._row_to_transaction(row) for row in rows]
+            params.append(limit)
+        cursor = self.db.execute(sql, tuple(params))
+        return _TRANSACTIONS.all(cursor)
 
     def upsert(self, transaction: BankTransaction) -> tuple[BankTransaction, bool]:
-        existing = self.get_by_entry_hash(transaction.entry_hash)
-        if existing:
-            self.db.execute(
-                """UPDATE bank_transactions
-                   SET account_id = ?, booking_date = ?, value_date = ?, amount = ?,
-                       currency = ?, status = ?, direction = ?, counterparty_name = ?,
-                       counterparty_iban = ?, counterparty_bic = ?, purpose = ?,
-                       customer_reference = ?, end_to_end_reference = ?, prima_nota = ?,
-                       raw_json = ?, imported_at = CURRENT_TIMESTAMP,
-                       updated_at = CURRENT_TIMESTAMP
-                   WHERE id = ?""",
-                (
-                    transaction.account_id,
-                    transaction.booking_date.isoformat() if transaction.booking_date else None,
-                    transaction.value_date.isoformat() if transaction.value_date else None,
-                    transaction.amount,
-                    transaction.currency,
-                    transaction.status,
-                    transaction.direction,
-                    transaction.counterparty_name,
-                    transaction.counterparty_iban,
-                    transaction.counterparty_bic,
-                    transaction.purpose,
-                    transaction.customer_reference,
-                    transaction.end_to_end_reference,
-                    transaction.prima_nota,
-                    transaction.raw_json,
-                    existing.id,
-                ),
-            )
-            self.db.commit()
-            return self.get_by_id(existing.id), False
-
-        cursor = self.db.execute(
-            """INSERT INTO bank_transactions (
-                   account_id, entry_hash, booking_date, value_date, amount, currency,
-                   status, direction, counterparty_name, counterparty_iban,
-                   counterparty_bic, purpose, customer_reference,
-                   end_to_end_reference, prima_nota, raw_json
-               ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                transaction.account_id,
-                transaction.entry_hash,
-                transaction.booking_date.isoformat() if transaction.booking_date else None,
-                transaction.value_date.isoformat() if transaction.value_date else None,
-                transaction.amount,
-                transaction.currency,
-                transaction.status,
-                transaction.direction,
-                transaction.counterparty_name,
-                transaction.counterparty_iban,
-                transaction.counterparty_bic,
-                transaction.purpose,
-                transaction.customer_reference,
-                transaction.end_to_end_reference,
-                transaction.prima_nota,
-                transaction.raw_json,
-            ),
-        )
-        self.db.commit()
-        return self.get_by_id(cursor.lastrowid), True
+        persisted, imported_count, _updated_count = self.upsert_many([transaction])
+        return persisted[0], imported_count == 1
 
     def upsert_many(self, transactions: list[BankTransaction]) -> tuple[list[BankTransaction], int, int]:
-        persisted: list[BankTransaction] = []
-        imported_count = 0
-        updated_count = 0
-        for transaction in transactions:
-            persisted_tx, inserted = self.upsert(transaction)
-            persisted.append(persisted_tx)
-            if inserted:
-                imported_count += 1
+        changes = self.upsert_changes(transactions)
+        return changes.transactions, len(changes.inserted_ids), len(changes.updated_ids)
+
+    def upsert_changes(self, transactions: list[BankTransaction]) -> BankTransactionChanges:
+        """Speichert alle Umsaetze per entry_hash in einer Transaktion.
+
+        Unveraenderte Umsaetze werden nicht geschrieben. Das Ergebnis enthaelt
+        die gespeicherten Umsaetze in Eingabereihenfolge und die ids der neuen
+        bzw. geaenderten.
+        """
+        if not transactions:
+            return BankTransactionChanges()
+        with self.db.transaction():
+            hashes = [t.entry_hash for t in transactions]
+            existing = self._get_by_entry_hashes(hashes)
+            # Pro entry_hash zaehlt die letzte Fassung im Stapel.
+            latest = {t.entry_hash: self._upsert_params(t) for t in transactions}
+            pending = [
+                params
+                for entry_hash, params in latest.items()
+                if entry_hash not in existing
+                or self._upsert_params(existing[entry_hash]) != params
+            ]
+            if pending:
+                self.db.executemany(UPSERT_SQL, pending)
+            by_hash = self._get_by_entry_hashes(hashes) if pending else existing
+
+        changes = BankTransactionChanges(transactions=[by_hash[h] for h in hashes])
+        written = {params[1] for params in pending}
+        for entry_hash in written:
+            if entry_hash in existing:
+                changes.updated_ids.add(existing[entry_hash].id)
             else:
-                updated_count += 1
-        return persisted, imported_count, updated_count
+                changes.inserted_ids.add(by_hash[entry_hash].id)
+        return changes
+
+    def _get_by_entry_hashes(self, entry_hashes: list[str]) -> dict[str, BankTransaction]:
+        unique_hashes = list(dict.fromkeys(entry_hashes))
+        result: dict[str, BankTransaction] = {}
+        for chunk in chunked(unique_hashes):
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor = self.db.execute(
+                f"SELECT * FROM bank_transactions WHERE entry_hash IN ({placeholders})",
+                tuple(chunk),
+            )
+            for transaction in _TRANSACTIONS.all(cursor):
+                result[transaction.entry_hash] = transaction
+        return result
+
+    def _upsert_params(self, transaction: BankTransaction) -> tuple:
+        return (
+            transaction.account_id,
+            transaction.entry_hash,
+            transaction.booking_date.isoformat() if transaction.booking_date else None,
+            transaction.value_date.isoformat() if transaction.value_date else None,
+            *money_params(transaction.amount),
+            transaction.currency,
+            transaction.status,
+            transaction.direction,
+            transaction.counterparty_name,
+            transaction.counterparty_iban,
+            transaction.counterparty_bic,
+            transaction.purpose,
+            transaction.customer_reference,
+            transaction.end_to_end_reference,
+            transaction.prima_nota,
+            transaction.raw_json,
+        )
@@ -1,63 +1,74 @@
 from models.customer import Customer
-from db.database import Database
+from db.database import Database, RowMapper, build_fts_query
+from db.repos.master_data import master_data
+
+_CUSTOMERS = RowMapper(Customer)
+
+
+def _customer_order(customer: Customer) -> tuple[str, str]:
+    return customer.nachname or "", customer.vorname or ""
 
 
 class CustomerRepo:
     def __init__(self, db: Database):
         self.db = db
-
-    def _row_to_customer(self, row) -> Customer:
-        return Customer(**{k: row[k] for k in row.keys()})
+        self.cache = master_data(db)
 
     def get_all(self) -> list[Customer]:
-        rows = self.db.execute(
-            "SELECT * FROM customers ORDER BY nachname, vorname"
-        ).fetchall()
-        return [self._row_to_customer(r) for r in rows]
+        return self.cache.all("customers", self._load_all, _customer_order)
 
     def get_by_id(self, customer_id: int) -> Customer | None:
-        row = self.db.execute(
-            "SELECT * FROM customers WHERE id = ?", (customer_id,)
-        ).fetchone()
-        return self._row_to_customer(row) if row else None
+        return self.cache.get("customers", customer_id, self._load_all)
 
-    def search(self, query: str) -> list[Customer]:
-        q = f"%{query}%"
-        rows = self.db.execute(
-            """SELECT * FROM customers
-               WHERE vorname LIKE ? OR nachname LIKE ? OR firma LIKE ? OR ort LIKE ?
-               ORDER BY nachname, vorname""",
-            (q, q, q, q),
-        ).fetchall()
-        return [self._row_to_customer(r) for r in rows]
+    def _load_all(self) -> list[Customer]:
+        cursor = self.db.execute(
+            "SELECT * FROM customers ORDER BY nachname, vorname"
+        )
+        return _CUSTOMERS.all(cursor)
 
-    def create(self, c: Customer) -> int:
+    def search(self, query: str) -> list[Customer]:
+        match = build_fts_query(query)
+        if match is None:
+            return self.get_all()
         cursor = self.db.execute(
-            """INSERT INTO customers (anrede, titel, vorname, nachname, firma,
-               strasse, plz, ort, email, telefon, notizen)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                c.anrede, c.titel, c.vorname, c.nachname, c.firma,
-                c.strasse, c.plz, c.ort, c.email, c.telefon, c.notizen,
-            ),
+            """SELECT c.* FROM customers_fts f
+               JOIN customers c ON c.id = f.rowid
+               WHERE customers_fts MATCH ?
+               ORDER BY f.rank, c.nachname, c.vorname""",
+            (match,),
         )
-        self.db.commit()
+        return _CUSTOMERS.all(cursor)
+
+    def create(self, c: Customer) -> int:
+        with self.db.transaction():
+            cursor = self.db.execute(
+                """INSERT INTO customers (anrede, titel, vorname, nachname, firma,
+                   strasse, plz, ort, email, telefon, notizen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    c.anrede, c.titel, c.vorname, c.nachname, c.firma,
+                    c.strasse, c.plz, c.ort, c.email, c.telefon, c.notizen,
+                ),
+            )
+            self.cache.put_after_commit(self.db, "customers", _CUSTOMERS, cursor.lastrowid)
         return cursor.lastrowid
 
     def update(self, c: Customer):
-        self.db.execute(
-            """UPDATE customers SET anrede=?, titel=?, vorname=?, nachname=?, firma=?,
-               strasse=?, plz=?, ort=?, email=?, telefon=?, notizen=?,
-               updated_at=CURRENT_TIMESTAMP
-               WHERE id=?""",
-            (
-                c.anrede, c.titel, c.vorname, c.nachname, c.firma,
-                c.strasse, c.plz, c.ort, c.email, c.telefon, c.notizen,
-                c.id,
-            ),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE customers SET anrede=?, titel=?, vorname=?, nachname=?, firma=?,
+                   strasse=?, plz=?, ort=?, email=?, telefon=?, notizen=?,
+                   updated_at=CURRENT_TIMESTAMP
+                   WHERE id=?""",
+                (
+                    c.anrede, c.titel, c.vorname, c.nachname, c.firma,
+                    c.strasse, c.plz, c.ort, c.email, c.telefon, c.notizen,
+                    c.id,
+                ),
+            )
+            self.cache.put_after_commit(self.db, "customers", _CUSTOMERS, c.id)
 
     def delete(self, customer_id: int):
-        self.db.execute("DELETE FROM customers WHERE id = ?", (customer_id,))
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute("DELETE FROM customers WHERE id = ?", (customer_id,))
+            self.cache.discard_after_commit(self.db, "customers", customer_id)
@@ -1,94 +1,129 @@
 from datetime import date
 
 from models.firmenschreiben import Firmenschreiben
-from db.database import Database
+from db.database import Database, RowMapper, build_fts_query, keyset_after
+
+
+def _parse_datum(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        parts = value.split("-")
+        return date(int(parts[0]), int(parts[1]), int(parts[2]))
+    except Exception:
+        return None
+
+
+_LETTERS = RowMapper(Firmenschreiben, converters={"datum": _parse_datum})
 
 
 class FSRepo:
     def __init__(self, db: Database):
         self.db = db
 
-    def _row_to_fs(self, row) -> Firmenschreiben:
-        d = {k: row[k] for k in row.keys()}
-        if isinstance(d.get("datum"), str):
-            try:
-                parts = d["datum"].split("-")
-                d["datum"] = date(int(parts[0]), int(parts[1]), int(parts[2]))
-            except Exception:
-                d["datum"] = None
-        return Firmenschreiben(**d)
-
     def get_all(self) -> list[Firmenschreiben]:
-        rows = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM firmenschreiben ORDER BY datum DESC, id DESC"
-        ).fetchall()
-        return [self._row_to_fs(r) for r in rows]
+        )
+        return _LETTERS.all(cursor)
+
+    def page(
+        self,
+        after: tuple[date, int] | None = None,
+        limit: int = 200,
+        status: str | None = None,
+        customer_id: int | None = None,
+    ) -> list[Firmenschreiben]:
+        """Liefert hoechstens limit Firmenschreiben, neueste zuerst.
+
+        after=(datum, id) ist der letzte Eintrag der vorherigen Seite.
+        """
+        conditions = []
+        params: list = []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if customer_id is not None:
+            conditions.append("customer_id = ?")
+            params.append(customer_id)
+        if after:
+            condition, after_params = keyset_after(after, "datum", "id")
+            conditions.append(condition)
+            params.extend(after_params)
+        sql = "SELECT * FROM firmenschreiben"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY datum DESC, id DESC LIMIT ?"
+        params.append(limit)
+        cursor = self.db.execute(sql, tuple(params))
+        return _LETTERS.all(cursor)
 
     def get_by_id(self, fs_id: int) -> Firmenschreiben | None:
-        row = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM firmenschreiben WHERE id = ?", (fs_id,)
-        ).fetchone()
-        return self._row_to_fs(row) if row else None
+        )
+        return _LETTERS.one(cursor)
 
     def search(self, query: str) -> list[Firmenschreiben]:
-        q = f"%{query}%"
-        rows = self.db.execute(
-            """SELECT f.* FROM firmenschreiben f
-               LEFT JOIN customers c ON f.customer_id = c.id
-               WHERE f.fsnr LIKE ? OR f.betreff LIKE ?
-               OR c.vorname LIKE ? OR c.nachname LIKE ? OR c.firma LIKE ?
-               ORDER BY f.datum DESC""",
-            (q, q, q, q, q),
-        ).fetchall()
-        return [self._row_to_fs(r) for r in rows]
-
-    def create(self, fs: Firmenschreiben) -> int:
+        match = build_fts_query(query)
+        if match is None:
+            return self.get_all()
         cursor = self.db.execute(
-            """INSERT INTO firmenschreiben
-               (supplier_id, customer_id, fsnr, datum, betreff, anrede,
-                brieftext, grussformel, status, pdf_path)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                fs.supplier_id, fs.customer_id, fs.fsnr,
-                fs.datum.isoformat() if fs.datum else None,
-                fs.betreff, fs.anrede, fs.brieftext,
-                fs.grussformel, fs.status, fs.pdf_path,
-            ),
+            """SELECT f.* FROM fs_fts s
+               JOIN firmenschreiben f ON f.id = s.rowid
+               WHERE fs_fts MATCH ?
+               ORDER BY s.rank, f.datum DESC, f.id DESC""",
+            (match,),
         )
-        self.db.commit()
+        return _LETTERS.all(cursor)
+
+    def create(self, fs: Firmenschreiben) -> int:
+        with self.db.transaction():
+            cursor = self.db.execute(
+                """INSERT INTO firmenschreiben
+                   (supplier_id, customer_id, fsnr, datum, betreff, anrede,
+                    brieftext, grussformel, status, pdf_path)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    fs.supplier_id, fs.customer_id, fs.fsnr,
+                    fs.datum.isoformat() if fs.datum else None,
+                    fs.betreff, fs.anrede, fs.brieftext,
+                    fs.grussformel, fs.status, fs.pdf_path,
+                ),
+            )
         return cursor.lastrowid
 
     def update(self, fs: Firmenschreiben):
-        self.db.execute(
-            """UPDATE firmenschreiben SET
-               supplier_id=?, customer_id=?, fsnr=?, datum=?, betreff=?, anrede=?,
-               brieftext=?, grussformel=?, status=?, pdf_path=?,
-               updated_at=CURRENT_TIMESTAMP
-               WHERE id=?""",
-            (
-                fs.supplier_id, fs.customer_id, fs.fsnr,
-                fs.datum.isoformat() if fs.datum else None,
-                fs.betreff, fs.anrede, fs.brieftext,
-                fs.grussformel, fs.status, fs.pdf_path,
-                fs.id,
-            ),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE firmenschreiben SET
+                   supplier_id=?, customer_id=?, fsnr=?, datum=?, betreff=?, anrede=?,
+                   brieftext=?, grussformel=?, status=?, pdf_path=?,
+                   updated_at=CURRENT_TIMESTAMP
+                   WHERE id=?""",
+                (
+                    fs.supplier_id, fs.customer_id, fs.fsnr,
+                    fs.datum.isoformat() if fs.datum else None,
+                    fs.betreff, fs.anrede, fs.brieftext,
+                    fs.grussformel, fs.status, fs.pdf_path,
+                    fs.id,
+                ),
+            )
 
     def update_status(self, fs_id: int, status: str):
-        self.db.execute(
-            "UPDATE firmenschreiben SET status=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-            (status, fs_id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                "UPDATE firmenschreiben SET status=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (status, fs_id),
+            )
 
     def update_pdf_path(self, fs_id: int, pdf_path: str):
-        self.db.execute(
-            "UPDATE firmenschreiben SET pdf_path=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-            (pdf_path, fs_id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                "UPDATE firmenschreiben SET pdf_path=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (pdf_path, fs_id),
+            )
 
     def delete(self, fs_id: int):
-        self.db.execute("DELETE FROM firmenschreiben WHERE id = ?", (fs_id,))
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute("DELETE FROM firmenschreiben WHERE id = ?", (fs_id,))
@@ -1,152 +1,273 @@
 from datetime import date
-from models.invoice import Invoice, InvoiceLine
-from db.database import Database
+from models.invoice import Invoice, InvoiceLine, InvoiceOverview
+from db.database import (
+    Database, RowMapper, build_fts_query, chunked, keyset_after, sync_child_rows,
+)
+from utils.money import from_cents, money_params
+
+_INVOICES = RowMapper(Invoice, "invoices")
+_LINES = RowMapper(InvoiceLine, "invoice_lines", {"beguenstigt_35a": bool})
+_LINE_COLUMNS = (
+    "position", "article_id", "beschreibung", "menge", "mwst", "beguenstigt_35a",
+    "einzelpreis", "gesamt_netto", "einzelpreis_cent", "gesamt_netto_cent",
+)
 
 
 class InvoiceRepo:
     def __init__(self, db: Database):
         self.db = db
 
-    def _row_to_invoice(self, row, load_lines: bool = False) -> Invoice:
-        d = {k: row[k] for k in row.keys()}
-        inv = Invoice(**d)
-        if load_lines and inv.id:
-            inv.positionen = self.get_lines(inv.id)
-        return inv
-
-    def _row_to_line(self, row) -> InvoiceLine:
-        d = {k: row[k] for k in row.keys()}
-        d["beguenstigt_35a"] = bool(d.get("beguenstigt_35a", 0))
-        return InvoiceLine(**d)
-
     def get_all(self) -> list[Invoice]:
-        rows = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM invoices ORDER BY datum DESC, id DESC"
-        ).fetchall()
-        return [self._row_to_invoice(r) for r in rows]
+        )
+        return _INVOICES.all(cursor)
+
+    def page(
+        self,
+        after: tuple[date, int] | None = None,
+        limit: int = 200,
+        status: str | None = None,
+        customer_id: int | None = None,
+    ) -> list[Invoice]:
+        """Liefert hoechstens limit Rechnungen, neueste zuerst.
+
+        after=(datum, id) ist der letzte Eintrag der vorherigen Seite.
+        """
+        conditions = []
+        params: list = []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if customer_id is not None:
+            conditions.append("customer_id = ?")
+            params.append(customer_id)
+        if after:
+            condition, after_params = keyset_after(after, "datum", "id")
+            conditions.append(condition)
+            params.extend(after_params)
+        sql = "SELECT * FROM invoices"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY datum DESC, id DESC LIMIT ?"
+        params.append(limit)
+        cursor = self.db.execute(sql, tuple(params))
+        return _INVOICES.all(cursor)
 
     def get_by_id(self, invoice_id: int) -> Invoice | None:
-        row = self.db.execute(
-            "SELECT * FROM invoices WHERE id = ?", (invoice_id,)
-        ).fetchone()
-        return self._row_to_invoice(row, load_lines=True) if row else None
+        found = self.get_many([invoice_id])
+        return found[0] if found else None
+
+    def get_many(self, invoice_ids: list[int], with_lines: bool = True) -> list[Invoice]:
+        """Laedt mehrere Rechnungen samt Positionen mit einer Abfrage je Tabelle und Block.
+
+        Reihenfolge wie in invoice_ids; unbekannte ids fehlen im Ergebnis.
+        """
+        ids = list(dict.fromkeys(invoice_ids))
+        by_id: dict[int, Invoice] = {}
+        for chunk in chunked(ids):
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor = self.db.execute(
+                f"SELECT * FROM invoices WHERE id IN ({placeholders})", tuple(chunk)
+            )
+            for item in _INVOICES.all(cursor):
+                by_id[item.id] = item
+        if with_lines and by_id:
+            for chunk in chunked(list(by_id)):
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor = self.db.execute(
+                    f"""SELECT * FROM invoice_lines WHERE invoice_id IN ({placeholders})
+                        ORDER BY invoice_id, position""",
+                    tuple(chunk),
+                )
+                for line in _LINES.all(cursor):
+                    by_id[line.invoice_id].positionen.append(line)
+        return [by_id[item_id] for item_id in ids if item_id in by_id]
 
     def search(self, query: str) -> list[Invoice]:
-        q = f"%{query}%"
-        rows = self.db.execute(
-            """SELECT i.* FROM invoices i
-               LEFT JOIN customers c ON i.customer_id = c.id
-               WHERE i.rechnungsnr LIKE ? OR i.betreff LIKE ?
-               OR c.vorname LIKE ? OR c.nachname LIKE ?
-               ORDER BY i.datum DESC""",
-            (q, q, q, q),
-        ).fetchall()
-        return [self._row_to_invoice(r) for r in rows]
+        match = build_fts_query(query)
+        if match is None:
+            return self.get_all()
+        cursor = self.db.execute(
+            """SELECT i.* FROM invoices_fts f
+               JOIN invoices i ON i.id = f.rowid
+               WHERE invoices_fts MATCH ?
+               ORDER BY f.rank, i.datum DESC, i.id DESC""",
+            (match,),
+        )
+        return _INVOICES.all(cursor)
+
+    def list_overview(
+        self,
+        status: str | None = None,
+        query: str | None = None,
+        after: tuple[date, int] | None = None,
+        limit: int | None = None,
+    ) -> list[InvoiceOverview]:
+        """Listet Rechnungen samt Kundenname mit einer einzigen JOIN-Abfrage.
+
+        Mit after=(datum, id) der letzten geladenen Zeile und limit wird
+        fensterweise nachgeladen.
+        """
+        sql = """SELECT i.id, i.rechnungsnr, i.datum, i.customer_id, i.betreff,
+                        i.brutto_cent, i.status, i.pdf_path,
+                        c.id AS c_id, c.vorname, c.nachname, c.firma
+                 FROM invoices i
+                 LEFT JOIN customers c ON i.customer_id = c.id"""
+        conditions = []
+        params: list = []
+        if status:
+            conditions.append("i.status = ?")
+            params.append(status)
+        match = build_fts_query(query) if query else None
+        if match:
+            conditions.append(
+                "i.id IN (SELECT rowid FROM invoices_fts WHERE invoices_fts MATCH ?)"
+            )
+            params.append(match)
+        if after:
+            condition, after_params = keyset_after(after, "i.datum", "i.id")
+            conditions.append(condition)
+            params.extend(after_params)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY i.datum DESC, i.id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self.db.execute(sql, tuple(params)).fetchall()
+        return [self._row_to_overview(r) for r in rows]
+
+    def _row_to_overview(self, row) -> InvoiceOverview:
+        if row["c_id"] is None:
+            kunde_name = f"ID {row['customer_id']}"
+        else:
+            name = f"{row['vorname'] or ''} {row['nachname'] or ''}".strip()
+            kunde_name = name or row["firma"] or "Unbenannter Kunde"
+        return InvoiceOverview(
+            id=row["id"],
+            rechnungsnr=row["rechnungsnr"],
+            datum=row["datum"],
+            kunde_name=kunde_name,
+            betreff=row["betreff"],
+            brutto=from_cents(row["brutto_cent"]),
+            status=row["status"],
+            pdf_path=row["pdf_path"],
+        )
 
     def get_lines(self, invoice_id: int) -> list[InvoiceLine]:
-        rows = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM invoice_lines WHERE invoice_id = ? ORDER BY position",
             (invoice_id,),
-        ).fetchall()
-        return [self._row_to_line(r) for r in rows]
+        )
+        return _LINES.all(cursor)
 
     def create(self, inv: Invoice) -> int:
-        cursor = self.db.execute(
-            """INSERT INTO invoices (supplier_id, customer_id, rechnungsnr, datum,
-               betreff, objekt_weg, ausfuehrungsdatum, zeitraum,
-               zahlungsziel, rabatt_typ, rabatt_wert, lohnanteil_35a, geraeteanteil_35a,
-               dankessatz, hinweise, status, bezahlt_am, netto, mwst_betrag, brutto, pdf_path)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                inv.supplier_id, inv.customer_id, inv.rechnungsnr,
-                inv.datum.isoformat() if inv.datum else None,
-                inv.betreff, inv.objekt_weg,
-                inv.ausfuehrungsdatum.isoformat() if inv.ausfuehrungsdatum else None,
-                inv.zeitraum,
-                inv.zahlungsziel, inv.rabatt_typ, inv.rabatt_wert,
-                inv.lohnanteil_35a, inv.geraeteanteil_35a,
-                inv.dankessatz, inv.hinweise, inv.status,
-                inv.bezahlt_am.isoformat() if inv.bezahlt_am else None,
-                inv.netto, inv.mwst_betrag, inv.brutto, inv.pdf_path,
-            ),
-        )
-        inv_id = cursor.lastrowid
-        self._save_lines(inv_id, inv.positionen)
-        self.db.commit()
+        with self.db.transaction():
+            cursor = self.db.execute(
+                """INSERT INTO invoices (supplier_id, customer_id, rechnungsnr, datum,
+                   betreff, objekt_weg, ausfuehrungsdatum, zeitraum,
+                   zahlungsziel, rabatt_typ, rabatt_wert, lohnanteil_35a, geraeteanteil_35a,
+                   dankessatz, hinweise, status, bezahlt_am, netto, mwst_betrag, brutto,
+                   netto_cent, mwst_betrag_cent, brutto_cent, pdf_path)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    inv.supplier_id, inv.customer_id, inv.rechnungsnr,
+                    inv.datum.isoformat() if inv.datum else None,
+                    inv.betreff, inv.objekt_weg,
+                    inv.ausfuehrungsdatum.isoformat() if inv.ausfuehrungsdatum else None,
+                    inv.zeitraum,
+                    inv.zahlungsziel, inv.rabatt_typ, inv.rabatt_wert,
+                    inv.lohnanteil_35a, inv.geraeteanteil_35a,
+                    inv.dankessatz, inv.hinweise, inv.status,
+                    inv.bezahlt_am.isoformat() if inv.bezahlt_am else None,
+                    *money_params(inv.netto, inv.mwst_betrag, inv.brutto), inv.pdf_path,
+                ),
+            )
+            inv_id = cursor.lastrowid
+            self._save_lines(inv_id, inv.positionen)
         return inv_id
 
     def update(self, inv: Invoice):
-        self.db.execute(
-            """UPDATE invoices SET supplier_id=?, customer_id=?, rechnungsnr=?, datum=?,
-               betreff=?, objekt_weg=?, ausfuehrungsdatum=?, zeitraum=?,
-               zahlungsziel=?, rabatt_typ=?, rabatt_wert=?, lohnanteil_35a=?,
-               geraeteanteil_35a=?, dankessatz=?, hinweise=?, status=?, bezahlt_am=?,
-               netto=?, mwst_betrag=?, brutto=?, pdf_path=?,
-               updated_at=CURRENT_TIMESTAMP
-               WHERE id=?""",
-            (
-                inv.supplier_id, inv.customer_id, inv.rechnungsnr,
-                inv.datum.isoformat() if inv.datum else None,
-                inv.betreff, inv.objekt_weg,
-                inv.ausfuehrungsdatum.isoformat() if inv.ausfuehrungsdatum else None,
-                inv.zeitraum,
-                inv.zahlungsziel, inv.rabatt_typ, inv.rabatt_wert,
-                inv.lohnanteil_35a, inv.geraeteanteil_35a,
-                inv.dankessatz, inv.hinweise, inv.status,
-                inv.bezahlt_am.isoformat() if inv.bezahlt_am else None,
-                inv.netto, inv.mwst_betrag, inv.brutto, inv.pdf_path,
-                inv.id,
-            ),
-        )
-        self.db.execute("DELETE FROM invoice_lines WHERE invoice_id = ?", (inv.id,))
-        self._save_lines(inv.id, inv.positionen)
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE invoices SET supplier_id=?, customer_id=?, rechnungsnr=?, datum=?,
+                   betreff=?, objekt_weg=?, ausfuehrungsdatum=?, zeitraum=?,
+                   zahlungsziel=?, rabatt_typ=?, rabatt_wert=?, lohnanteil_35a=?,
+                   geraeteanteil_35a=?, dankessatz=?, hinweise=?, status=?, bezahlt_am=?,
+                   netto=?, mwst_betrag=?, brutto=?,
+                   netto_cent=?, mwst_betrag_cent=?, brutto_cent=?, pdf_path=?,
+                   updated_at=CURRENT_TIMESTAMP
+                   WHERE id=?""",
+                (
+                    inv.supplier_id, inv.customer_id, inv.rechnungsnr,
+                    inv.datum.isoformat() if inv.datum else None,
+                    inv.betreff, inv.objekt_weg,
+                    inv.ausfuehrungsdatum.isoformat() if inv.ausfuehrungsdatum else None,
+                    inv.zeitraum,
+                    inv.zahlungsziel, inv.rabatt_typ, inv.rabatt_wert,
+                    inv.lohnanteil_35a, inv.geraeteanteil_35a,
+                    inv.dankessatz, inv.hinweise, inv.status,
+                    inv.bezahlt_am.isoformat() if inv.bezahlt_am else None,
+                    *money_params(inv.netto, inv.mwst_betrag, inv.brutto), inv.pdf_path,
+                    inv.id,
+                ),
+            )
+            self._save_lines(inv.id, inv.positionen)
 
     def update_status(self, invoice_id: int, status: str):
-        self.db.execute(
-            "UPDATE invoices SET status=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-            (status, invoice_id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                "UPDATE invoices SET status=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (status, invoice_id),
+            )
 
-    def get_matchable_invoices(self) -> list[Invoice]:
-        rows = self.db.execute(
-            "SELECT * FROM invoices WHERE status = 'versendet' ORDER BY datum DESC, id DESC"
-        ).fetchall()
-        return [self._row_to_invoice(r) for r in rows]
+    def get_matchable_invoices(self, supplier_id: int | None = None) -> list[Invoice]:
+        """Offene Rechnungen fuer den Bankabgleich, nur mit den dafuer noetigen Feldern."""
+        sql = """SELECT id, supplier_id, customer_id, rechnungsnr, datum, brutto_cent, status
+                 FROM invoices WHERE status = 'versendet'"""
+        params: tuple = ()
+        if supplier_id is not None:
+            sql += " AND supplier_id = ?"
+            params = (supplier_id,)
+        cursor = self.db.execute(sql + " ORDER BY datum DESC, id DESC", params)
+        return _INVOICES.all(cursor)
 
     def mark_paid(self, invoice_id: int, bezahlt_am: date | None):
-        self.db.execute(
-            """UPDATE invoices
-               SET status = 'bezahlt',
-                   bezahlt_am = ?,
-                   updated_at = CURRENT_TIMESTAMP
-               WHERE id = ?""",
-            (bezahlt_am.isoformat() if bezahlt_am else None, invoice_id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE invoices
+                   SET status = 'bezahlt',
+                       bezahlt_am = ?,
+                       updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ?""",
+                (bezahlt_am.isoformat() if bezahlt_am else None, invoice_id),
+            )
 
     def update_pdf_path(self, invoice_id: int, pdf_path: str):
-        self.db.execute(
-            "UPDATE invoices SET pdf_path=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-            (pdf_path, invoice_id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                "UPDATE invoices SET pdf_path=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (pdf_path, invoice_id),
+            )
 
     def delete(self, invoice_id: int):
-        self.db.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
 
     def _save_lines(self, invoice_id: int, lines: list[InvoiceLine]):
         for line in lines:
             line.berechne_gesamt()
-            self.db.execute(
-                """INSERT INTO invoice_lines (invoice_id, position, article_id,
-                   beschreibung, menge, einzelpreis, mwst, beguenstigt_35a, gesamt_netto)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    invoice_id, line.position, line.article_id,
-                    line.beschreibung, line.menge, line.einzelpreis,
-                    line.mwst, int(line.beguenstigt_35a), line.gesamt_netto,
-                ),
-            )
+        ids = sync_child_rows(
+            self.db, "invoice_lines", "invoice_id", invoice_id, _LINE_COLUMNS,
+            [
+                (line.id, (
+                    line.position, line.article_id, line.beschreibung, line.menge, line.mwst,
+                    int(line.beguenstigt_35a), *money_params(line.einzelpreis, line.gesamt_netto),
+                ))
+                for line in lines
+            ],
+        )
+        for line, line_id in zip(lines, ids):
+            line.id = line_id
+            line.invoice_id = invoice_id
@@ -1,123 +1,184 @@
+from datetime import date
+
 from models.kostenvoranschlag import Kostenvoranschlag, KVLine
-from db.database import Database
+from db.database import (
+    Database, RowMapper, build_fts_query, chunked, keyset_after, sync_child_rows,
+)
+from utils.money import money_params
+
+_KVS = RowMapper(Kostenvoranschlag, "kostenvoranschlaege")
+_LINES = RowMapper(KVLine, "kv_lines")
+_LINE_COLUMNS = (
+    "position", "article_id", "beschreibung", "menge", "mwst",
+    "einzelpreis", "gesamt_netto", "einzelpreis_cent", "gesamt_netto_cent",
+)
 
 
 class KVRepo:
     def __init__(self, db: Database):
         self.db = db
 
-    def _row_to_kv(self, row, load_lines: bool = False) -> Kostenvoranschlag:
-        d = {k: row[k] for k in row.keys()}
-        kv = Kostenvoranschlag(**d)
-        if load_lines and kv.id:
-            kv.positionen = self.get_lines(kv.id)
-        return kv
-
-    def _row_to_line(self, row) -> KVLine:
-        d = {k: row[k] for k in row.keys()}
-        return KVLine(**d)
-
     def get_all(self) -> list[Kostenvoranschlag]:
-        rows = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM kostenvoranschlaege ORDER BY datum DESC, id DESC"
-        ).fetchall()
-        return [self._row_to_kv(r) for r in rows]
+        )
+        return _KVS.all(cursor)
+
+    def page(
+        self,
+        after: tuple[date, int] | None = None,
+        limit: int = 200,
+        status: str | None = None,
+        customer_id: int | None = None,
+    ) -> list[Kostenvoranschlag]:
+        """Liefert hoechstens limit Kostenvoranschlaege, neueste zuerst.
+
+        after=(datum, id) ist der letzte Eintrag der vorherigen Seite.
+        """
+        conditions = []
+        params: list = []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if customer_id is not None:
+            conditions.append("customer_id = ?")
+            params.append(customer_id)
+        if after:
+            condition, after_params = keyset_after(after, "datum", "id")
+            conditions.append(condition)
+            params.extend(after_params)
+        sql = "SELECT * FROM kostenvoranschlaege"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY datum DESC, id DESC LIMIT ?"
+        params.append(limit)
+        cursor = self.db.execute(sql, tuple(params))
+        return _KVS.all(cursor)
 
     def get_by_id(self, kv_id: int) -> Kostenvoranschlag | None:
-        row = self.db.execute(
-            "SELECT * FROM kostenvoranschlaege WHERE id = ?", (kv_id,)
-        ).fetchone()
-        return self._row_to_kv(row, load_lines=True) if row else None
+        found = self.get_many([kv_id])
+        return found[0] if found else None
+
+    def get_many(self, kv_ids: list[int], with_lines: bool = True) -> list[Kostenvoranschlag]:
+        """Laedt mehrere Kostenvoranschlaege samt Positionen mit einer Abfrage je Tabelle und Block.
+
+        Reihenfolge wie in kv_ids; unbekannte ids fehlen im Ergebnis.
+        """
+        ids = list(dict.fromkeys(kv_ids))
+        by_id: dict[int, Kostenvoranschlag] = {}
+        for chunk in chunked(ids):
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor = self.db.execute(
+                f"SELECT * FROM kostenvoranschlaege WHERE id IN ({placeholders})", tuple(chunk)
+            )
+            for item in _KVS.all(cursor):
+                by_id[item.id] = item
+        if with_lines and by_id:
+            for chunk in chunked(list(by_id)):
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor = self.db.execute(
+                    f"""SELECT * FROM kv_lines WHERE kv_id IN ({placeholders})
+                        ORDER BY kv_id, position""",
+                    tuple(chunk),
+                )
+                for line in _LINES.all(cursor):
+                    by_id[line.kv_id].positionen.append(line)
+        return [by_id[item_id] for item_id in ids if item_id in by_id]
 
     def search(self, query: str) -> list[Kostenvoranschlag]:
-        q = f"%{query}%"
-        rows = self.db.execute(
-            """SELECT k.* FROM kostenvoranschlaege k
-               LEFT JOIN customers c ON k.customer_id = c.id
-               WHERE k.kvnr LIKE ? OR k.betreff LIKE ?
-               OR c.vorname LIKE ? OR c.nachname LIKE ?
-               ORDER BY k.datum DESC""",
-            (q, q, q, q),
-        ).fetchall()
-        return [self._row_to_kv(r) for r in rows]
+        match = build_fts_query(query)
+        if match is None:
+            return self.get_all()
+        cursor = self.db.execute(
+            """SELECT k.* FROM kv_fts f
+               JOIN kostenvoranschlaege k ON k.id = f.rowid
+               WHERE kv_fts MATCH ?
+               ORDER BY f.rank, k.datum DESC, k.id DESC""",
+            (match,),
+        )
+        return _KVS.all(cursor)
 
     def get_lines(self, kv_id: int) -> list[KVLine]:
-        rows = self.db.execute(
+        cursor = self.db.execute(
             "SELECT * FROM kv_lines WHERE kv_id = ? ORDER BY position",
             (kv_id,),
-        ).fetchall()
-        return [self._row_to_line(r) for r in rows]
+        )
+        return _LINES.all(cursor)
 
     def create(self, kv: Kostenvoranschlag) -> int:
-        cursor = self.db.execute(
-            """INSERT INTO kostenvoranschlaege (supplier_id, customer_id, kvnr, datum,
-               betreff, objekt_weg, gueltig_tage, rabatt_typ, rabatt_wert,
-               dankessatz, hinweise, status, netto, mwst_betrag, brutto, pdf_path)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                kv.supplier_id, kv.customer_id, kv.kvnr,
-                kv.datum.isoformat() if kv.datum else None,
-                kv.betreff, kv.objekt_weg, kv.gueltig_tage,
-                kv.rabatt_typ, kv.rabatt_wert,
-                kv.dankessatz, kv.hinweise, kv.status,
-                kv.netto, kv.mwst_betrag, kv.brutto, kv.pdf_path,
-            ),
-        )
-        kv_id = cursor.lastrowid
-        self._save_lines(kv_id, kv.positionen)
-        self.db.commit()
+        with self.db.transaction():
+            cursor = self.db.execute(
+                """INSERT INTO kostenvoranschlaege (supplier_id, customer_id, kvnr, datum,
+                   betreff, objekt_weg, gueltig_tage, rabatt_typ, rabatt_wert,
+                   dankessatz, hinweise, status, netto, mwst_betrag, brutto,
+                   netto_cent, mwst_betrag_cent, brutto_cent, pdf_path)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    kv.supplier_id, kv.customer_id, kv.kvnr,
+                    kv.datum.isoformat() if kv.datum else None,
+                    kv.betreff, kv.objekt_weg, kv.gueltig_tage,
+                    kv.rabatt_typ, kv.rabatt_wert,
+                    kv.dankessatz, kv.hinweise, kv.status,
+                    *money_params(kv.netto, kv.mwst_betrag, kv.brutto), kv.pdf_path,
+                ),
+            )
+            kv_id = cursor.lastrowid
+            self._save_lines(kv_id, kv.positionen)
         return kv_id
 
     def update(self, kv: Kostenvoranschlag):
-        self.db.execute(
-            """UPDATE kostenvoranschlaege SET supplier_id=?, customer_id=?, kvnr=?, datum=?,
-               betreff=?, objekt_weg=?, gueltig_tage=?, rabatt_typ=?, rabatt_wert=?,
-               dankessatz=?, hinweise=?, status=?,
-               netto=?, mwst_betrag=?, brutto=?, pdf_path=?,
-               updated_at=CURRENT_TIMESTAMP
-               WHERE id=?""",
-            (
-                kv.supplier_id, kv.customer_id, kv.kvnr,
-                kv.datum.isoformat() if kv.datum else None,
-                kv.betreff, kv.objekt_weg, kv.gueltig_tage,
-                kv.rabatt_typ, kv.rabatt_wert,
-                kv.dankessatz, kv.hinweise, kv.status,
-                kv.netto, kv.mwst_betrag, kv.brutto, kv.pdf_path,
-                kv.id,
-            ),
-        )
-        self.db.execute("DELETE FROM kv_lines WHERE kv_id = ?", (kv.id,))
-        self._save_lines(kv.id, kv.positionen)
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE kostenvoranschlaege SET supplier_id=?, customer_id=?, kvnr=?, datum=?,
+                   betreff=?, objekt_weg=?, gueltig_tage=?, rabatt_typ=?, rabatt_wert=?,
+                   dankessatz=?, hinweise=?, status=?,
+                   netto=?, mwst_betrag=?, brutto=?,
+                   netto_cent=?, mwst_betrag_cent=?, brutto_cent=?, pdf_path=?,
+                   updated_at=CURRENT_TIMESTAMP
+                   WHERE id=?""",
+                (
+                    kv.supplier_id, kv.customer_id, kv.kvnr,
+                    kv.datum.isoformat() if kv.datum else None,
+                    kv.betreff, kv.objekt_weg, kv.gueltig_tage,
+                    kv.rabatt_typ, kv.rabatt_wert,
+                    kv.dankessatz, kv.hinweise, kv.status,
+                    *money_params(kv.netto, kv.mwst_betrag, kv.brutto), kv.pdf_path,
+                    kv.id,
+                ),
+            )
+            self._save_lines(kv.id, kv.positionen)
 
     def update_status(self, kv_id: int, status: str):
-        self.db.execute(
-            "UPDATE kostenvoranschlaege SET status=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-            (status, kv_id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                "UPDATE kostenvoranschlaege SET status=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (status, kv_id),
+            )
 
     def update_pdf_path(self, kv_id: int, pdf_path: str):
-        self.db.execute(
-            "UPDATE kostenvoranschlaege SET pdf_path=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
-            (pdf_path, kv_id),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                "UPDATE kostenvoranschlaege SET pdf_path=?, updated_at=CURRENT_TIMESTAMP WHERE id=?",
+                (pdf_path, kv_id),
+            )
 
     def delete(self, kv_id: int):
-        self.db.execute("DELETE FROM kostenvoranschlaege WHERE id = ?", (kv_id,))
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute("DELETE FROM kostenvoranschlaege WHERE id = ?", (kv_id,))
 
     def _save_lines(self, kv_id: int, lines: list[KVLine]):
         for line in lines:
             line.berechne_gesamt()
-            self.db.execute(
-                """INSERT INTO kv_lines (kv_id, position, article_id,
-                   beschreibung, menge, einzelpreis, mwst, gesamt_netto)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    kv_id, line.position, line.article_id,
-                    line.beschreibung, line.menge, line.einzelpreis,
-                    line.mwst, line.gesamt_netto,
-                ),
-            )
+        ids = sync_child_rows(
+            self.db, "kv_lines", "kv_id", kv_id, _LINE_COLUMNS,
+            [
+                (line.id, (
+                    line.position, line.article_id, line.beschreibung, line.menge, line.mwst,
+                    *money_params(line.einzelpreis, line.gesamt_netto),
+                ))
+                for line in lines
+            ],
+        )
+        for line, line_id in zip(lines, ids):
+            line.id = line_id
+            line.kv_id = kv_id
@@ -0,0 +1,111 @@
+import threading
+import weakref
+from copy import copy
+from typing import Callable
+
+from db.database import Database, RowMapper
+
+MASTER_DATA_TABLES = ("suppliers", "customers", "articles")
+
+
+class MasterDataCache:
+    """Zwischenspeicher fuer Lieferanten, Kunden und Artikel einer Datenbank.
+
+    Eine Tabelle wird beim ersten Zugriff ganz geladen. Schreibzugriffe der Repos
+    tragen ihre Zeilen erst nach dem Commit ein und melden die Tabelle an alle
+    Abonnenten. Herausgegeben werden Kopien, damit Bearbeitungen im UI den Cache
+    nicht veraendern.
+
+    Meldungen laufen im schreibenden Thread, also auch im Bank-Worker. UI-Code
+    meldet sich daher ueber ui.widgets.subscribe_master_data an; das stellt jede
+    Meldung im GUI-Thread zu (aus Worker-Threads ueber die Event-Queue).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables: dict[str, dict[int, object]] = {}
+        self._unsorted: set[str] = set()
+        self._listeners: list[Callable[[str], None]] = []
+
+    def subscribe(self, listener: Callable[[str], None]):
+        """listener(table) wird im schreibenden Thread nach jedem Commit aufgerufen.
+
+        Qt-Objekte nicht direkt anmelden, sondern ueber ui.widgets.subscribe_master_data.
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[str], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def all(self, table: str, load: Callable[[], list], order: Callable) -> list:
+        with self._lock:
+            rows = self._loaded(table, load)
+            if table in self._unsorted:
+                rows = self._tables[table] = {
+                    item.id: item for item in sorted(rows.values(), key=order)
+                }
+                self._unsorted.discard(table)
+            return [copy(item) for item in rows.values()]
+
+    def get(self, table: str, item_id: int, load: Callable[[], list]):
+        with self._lock:
+            item = self._loaded(table, load).get(item_id)
+        return copy(item) if item is not None else None
+
+    def put(self, table: str, item):
+        with self._lock:
+            rows = self._tables.get(table)
+            if rows is not None:
+                rows[item.id] = item
+                self._unsorted.add(table)
+        self._notify(table)
+
+    def discard(self, table: str, item_id: int):
+        with self._lock:
+            rows = self._tables.get(table)
+            if rows is not None:
+                rows.pop(item_id, None)
+        self._notify(table)
+
+    def put_after_commit(self, db: Database, table: str, mapper: RowMapper, item_id: int):
+        """Liest die eben geschriebene Zeile und uebernimmt sie nach dem Commit."""
+        item = mapper.one(db.execute(f"SELECT * FROM {table} WHERE id = ?", (item_id,)))
+        if item is None:
+            self.discard_after_commit(db, table, item_id)
+        else:
+            db.after_commit(lambda: self.put(table, item))
+
+    def discard_after_commit(self, db: Database, table: str, item_id: int):
+        db.after_commit(lambda: self.discard(table, item_id))
+
+    def invalidate(self):
+        """Verwirft alle Tabellen, z.B. nachdem ein Backup eingespielt wurde."""
+        with self._lock:
+            self._tables.clear()
+            self._unsorted.clear()
+        for table in MASTER_DATA_TABLES:
+            self._notify(table)
+
+    def _notify(self, table: str):
+        for listener in list(self._listeners):
+            listener(table)
+
+    def _loaded(self, table: str, load: Callable[[], list]) -> dict[int, object]:
+        rows = self._tables.get(table)
+        if rows is None:
+            rows = self._tables[table] = {item.id: item for item in load()}
+        return rows
+
+
+_caches: "weakref.WeakKeyDictionary[Database, MasterDataCache]" = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def master_data(db: Database) -> MasterDataCache:
+    """Der Stammdaten-Cache zu db; alle Repos und Tabs derselben Datenbank teilen ihn."""
+    with _caches_lock:
+        cache = _caches.get(db)
+        if cache is None:
+            cache = _caches[db] = MasterDataCache()
+        return cache
@@ -1,6 +1,6 @@
 from datetime import date
 
-from db.database import Database
+from db.database import Database, reserve_counter
 from utils.invoice_numbers import format_rechnungsnr
 
 
@@ -9,29 +9,19 @@ class NumberRepo:
         self.db = db
 
     def naechste_nummer(self, rechnungsdatum: date | None = None) -> str:
+        return self.reserviere_nummern(1, rechnungsdatum)[0]
+
+    def reserviere_nummern(self, anzahl: int, rechnungsdatum: date | None = None) -> list[str]:
+        """Reserviert anzahl fortlaufende Rechnungsnummern mit einer einzigen Schreibanweisung.
+
+        Fuer Serienlaeufe, die viele Rechnungen auf einmal anlegen.
+        """
         if rechnungsdatum is None:
             rechnungsdatum = date.today()
 
         tagesschluessel = int(rechnungsdatum.strftime("%Y%m%d"))
-        row = self.db.execute(
-            "SELECT letzter_zaehler FROM invoice_numbers WHERE jahr = ?", (tagesschluessel,)
-        ).fetchone()
-
-        if row is None:
-            neuer_zaehler = 1
-            self.db.execute(
-                "INSERT INTO invoice_numbers (jahr, letzter_zaehler) VALUES (?, ?)",
-                (tagesschluessel, neuer_zaehler),
-            )
-        else:
-            neuer_zaehler = row["letzter_zaehler"] + 1
-            self.db.execute(
-                "UPDATE invoice_numbers SET letzter_zaehler = ? WHERE jahr = ?",
-                (neuer_zaehler, tagesschluessel),
-            )
-
-        self.db.commit()
-        return format_rechnungsnr(rechnungsdatum, neuer_zaehler)
+        erster = reserve_counter(self.db, "invoice_numbers", "jahr", tagesschluessel, anzahl)
+        return [format_rechnungsnr(rechnungsdatum, zaehler) for zaehler in range(erster, erster + anzahl)]
 
     def aktueller_zaehler(self, rechnungsdatum: date | None = None) -> int:
         if rechnungsdatum is None:
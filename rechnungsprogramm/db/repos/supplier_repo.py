@@ -1,55 +1,59 @@
 from models.supplier import Supplier
-from db.database import Database
+from db.database import Database, RowMapper
+from db.repos.master_data import master_data
+
+_SUPPLIERS = RowMapper(Supplier)
 
 
 class SupplierRepo:
     def __init__(self, db: Database):
         self.db = db
-
-    def _row_to_supplier(self, row) -> Supplier:
-        return Supplier(**{k: row[k] for k in row.keys()})
+        self.cache = master_data(db)
 
     def get_all(self) -> list[Supplier]:
-        rows = self.db.execute("SELECT * FROM suppliers ORDER BY firma").fetchall()
-        return [self._row_to_supplier(r) for r in rows]
+        return self.cache.all("suppliers", self._load_all, lambda s: s.firma)
 
     def get_by_id(self, supplier_id: int) -> Supplier | None:
-        row = self.db.execute(
-            "SELECT * FROM suppliers WHERE id = ?", (supplier_id,)
-        ).fetchone()
-        return self._row_to_supplier(row) if row else None
+        return self.cache.get("suppliers", supplier_id, self._load_all)
+
+    def _load_all(self) -> list[Supplier]:
+        cursor = self.db.execute("SELECT * FROM suppliers ORDER BY firma")
+        return _SUPPLIERS.all(cursor)
 
     def create(self, s: Supplier) -> int:
-        cursor = self.db.execute(
-            """INSERT INTO suppliers (firma, inhaber, strasse, plz, ort, postfach,
-               telefon, telefon2, mobil, telefax, email, web,
-               steuernr, ustid, bank, iban, bic, glaeubiger_id, logo_path, dankessatz)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                s.firma, s.inhaber, s.strasse, s.plz, s.ort, s.postfach,
-                s.telefon, s.telefon2, s.mobil, s.telefax, s.email, s.web,
-                s.steuernr, s.ustid, s.bank, s.iban, s.bic, s.glaeubiger_id, s.logo_path, s.dankessatz,
-            ),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            cursor = self.db.execute(
+                """INSERT INTO suppliers (firma, inhaber, strasse, plz, ort, postfach,
+                   telefon, telefon2, mobil, telefax, email, web,
+                   steuernr, ustid, bank, iban, bic, glaeubiger_id, logo_path, dankessatz)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    s.firma, s.inhaber, s.strasse, s.plz, s.ort, s.postfach,
+                    s.telefon, s.telefon2, s.mobil, s.telefax, s.email, s.web,
+                    s.steuernr, s.ustid, s.bank, s.iban, s.bic, s.glaeubiger_id, s.logo_path, s.dankessatz,
+                ),
+            )
+            self.cache.put_after_commit(self.db, "suppliers", _SUPPLIERS, cursor.lastrowid)
         return cursor.lastrowid
 
     def update(self, s: Supplier):
-        self.db.execute(
-            """UPDATE suppliers SET firma=?, inhaber=?, strasse=?, plz=?, ort=?,
-               postfach=?, telefon=?, telefon2=?, mobil=?, telefax=?, email=?, web=?,
-               steuernr=?, ustid=?, bank=?, iban=?, bic=?, glaeubiger_id=?, logo_path=?, dankessatz=?,
-               updated_at=CURRENT_TIMESTAMP
-               WHERE id=?""",
-            (
-                s.firma, s.inhaber, s.strasse, s.plz, s.ort, s.postfach,
-                s.telefon, s.telefon2, s.mobil, s.telefax, s.email, s.web,
-                s.steuernr, s.ustid, s.bank, s.iban, s.bic, s.glaeubiger_id, s.logo_path, s.dankessatz,
-                s.id,
-            ),
-        )
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute(
+                """UPDATE suppliers SET firma=?, inhaber=?, strasse=?, plz=?, ort=?,
+                   postfach=?, telefon=?, telefon2=?, mobil=?, telefax=?, email=?, web=?,
+                   steuernr=?, ustid=?, bank=?, iban=?, bic=?, glaeubiger_id=?, logo_path=?, dankessatz=?,
+                   updated_at=CURRENT_TIMESTAMP
+                   WHERE id=?""",
+                (
+                    s.firma, s.inhaber, s.strasse, s.plz, s.ort, s.postfach,
+                    s.telefon, s.telefon2, s.mobil, s.telefax, s.email, s.web,
+                    s.steuernr, s.ustid, s.bank, s.iban, s.bic, s.glaeubiger_id, s.logo_path, s.dankessatz,
+                    s.id,
+                ),
+            )
+            self.cache.put_after_commit(self.db, "suppliers", _SUPPLIERS, s.id)
 
     def delete(self, supplier_id: int):
-        self.db.execute("DELETE FROM suppliers WHERE id = ?", (supplier_id,))
-        self.db.commit()
+        with self.db.transaction():
+            self.db.execute("DELETE FROM suppliers WHERE id = ?", (supplier_id,))
+            self.cache.discard_after_commit(self.db, "suppliers", supplier_id)
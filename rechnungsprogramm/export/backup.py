@@ -2,7 +2,8 @@ import json
 from datetime import datetime, date
 from pathlib import Path
 
-from db.database import Database
+from db.database import Database, fill_missing_cents
+from db.repos.master_data import master_data
 from utils.paths import get_backups_dir
 
 
@@ -43,11 +44,13 @@ def import_backup(db: Database, input_path: Path):
         "invoice_numbers", "invoices", "invoice_lines",
     ]
 
-    for table in tables_order:
-        if table in data and data[table]:
-            _import_table(db, table, data[table])
-
-    db.commit()
+    with db.transaction() as conn:
+        for table in tables_order:
+            if table in data and data[table]:
+                _import_table(db, table, data[table])
+        # Backups aus der Zeit vor den Cent-Spalten
+        fill_missing_cents(conn)
+        db.after_commit(master_data(db).invalidate)
 
 
 def auto_backup(db: Database, max_backups: int = 10):
@@ -4,27 +4,57 @@ import sys
 # Add project root to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from utils.startup_timing import StartupTimer
+
+startup_timer = StartupTimer()
+
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 
-from db.database import Database
+from db.database import Database, DatabaseBusyError
 from services.ai_config import load_local_env
 from ui.main_window import MainWindow
+from ui.widgets import show_error
+from utils.db_settings import load_database_profile
+
+
+def _install_busy_hook():
+    """Zeigt DatabaseBusyError aus Qt-Slots als Meldung statt als Traceback."""
+    default_hook = sys.excepthook
+
+    def hook(exc_type, exc, tb):
+        if issubclass(exc_type, DatabaseBusyError):
+            show_error(QApplication.activeWindow(), str(exc))
+            return
+        default_hook(exc_type, exc, tb)
+
+    sys.excepthook = hook
 
 
 def main():
+    startup_timer.mark("Module importieren")
     load_local_env()
 
     app = QApplication(sys.argv)
     app.setApplicationName("Rechnungsprogramm")
     app.setOrganizationName("Rechnungsprogramm")
+    startup_timer.mark("QApplication")
+    _install_busy_hook()
 
-    db = Database.get_instance()
+    db = Database.get_instance(profile=load_database_profile())
     db.initialize()
+    startup_timer.mark("Datenbank initialisieren")
 
     window = MainWindow(db)
+    startup_timer.mark("Hauptfenster aufbauen")
     window.show()
 
+    def _on_first_frame():
+        startup_timer.mark("Erstes Anzeigen")
+        startup_timer.report()
+
+    QTimer.singleShot(0, _on_first_frame)
+
     exit_code = app.exec()
     db.close()
     sys.exit(exit_code)
@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Article:
     id: Optional[int] = None
     bezeichnung: str = ""
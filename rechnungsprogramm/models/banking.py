@@ -3,7 +3,7 @@ from datetime import date, datetime
 from typing import Any, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class BankConnection:
     id: Optional[int] = None
     supplier_id: Optional[int] = None
@@ -19,7 +19,7 @@ class BankConnection:
     updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BankAccount:
     id: Optional[int] = None
     connection_id: Optional[int] = None
@@ -37,7 +37,7 @@ class BankAccount:
     updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BankTransaction:
     id: Optional[int] = None
     account_id: Optional[int] = None
@@ -61,7 +61,7 @@ class BankTransaction:
     updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BankTransactionMatch:
     id: Optional[int] = None
     bank_transaction_id: Optional[int] = None
@@ -74,7 +74,7 @@ class BankTransactionMatch:
     updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingTanSession:
     connection_id: int
     action: str
@@ -89,7 +89,18 @@ class PendingTanSession:
     payload: dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
+class BankTransactionChanges:
+    transactions: list[BankTransaction] = field(default_factory=list)
+    inserted_ids: set[int] = field(default_factory=set)
+    updated_ids: set[int] = field(default_factory=set)
+
+    @property
+    def changed_ids(self) -> set[int]:
+        return self.inserted_ids | self.updated_ids
+
+
+@dataclass(slots=True)
 class BankSyncResult:
     account: BankAccount
     balance: Optional[float] = None
@@ -102,7 +113,7 @@ class BankSyncResult:
     suggestions: list[BankTransactionMatch] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class BankOperationResult:
     action: str
     connection_id: int
@@ -5,7 +5,7 @@ from typing import Optional
 from models.enums import FirmenschreibenStatus
 
 
-@dataclass
+@dataclass(slots=True)
 class Firmenschreiben:
     id: Optional[int] = None
     supplier_id: Optional[int] = None
@@ -3,9 +3,10 @@ from datetime import date, datetime
 from typing import Optional
 
 from models.enums import InvoiceStatus
+from utils.calculations import berechne_position
 
 
-@dataclass
+@dataclass(slots=True)
 class InvoiceLine:
     id: Optional[int] = None
     invoice_id: Optional[int] = None
@@ -19,10 +20,10 @@ class InvoiceLine:
     gesamt_netto: float = 0.0
 
     def berechne_gesamt(self):
-        self.gesamt_netto = round(self.menge * self.einzelpreis, 2)
+        self.gesamt_netto = berechne_position(self.menge, self.einzelpreis)
 
 
-@dataclass
+@dataclass(slots=True)
 class Invoice:
     id: Optional[int] = None
     supplier_id: Optional[int] = None
@@ -49,3 +50,17 @@ class Invoice:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     positionen: list[InvoiceLine] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class InvoiceOverview:
+    """Kompakte Listenzeile fuer Archiv und Mahnwesen."""
+
+    id: int
+    rechnungsnr: str
+    datum: Optional[date]
+    kunde_name: str
+    betreff: Optional[str]
+    brutto: Optional[float]
+    status: str
+    pdf_path: Optional[str] = None
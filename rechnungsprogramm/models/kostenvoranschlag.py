@@ -3,9 +3,10 @@ from datetime import date, datetime
 from typing import Optional
 
 from models.enums import KVStatus
+from utils.calculations import berechne_position
 
 
-@dataclass
+@dataclass(slots=True)
 class KVLine:
     id: Optional[int] = None
     kv_id: Optional[int] = None
@@ -18,10 +19,10 @@ class KVLine:
     gesamt_netto: float = 0.0
 
     def berechne_gesamt(self):
-        self.gesamt_netto = round(self.menge * self.einzelpreis, 2)
+        self.gesamt_netto = berechne_position(self.menge, self.einzelpreis)
 
 
-@dataclass
+@dataclass(slots=True)
 class Kostenvoranschlag:
     id: Optional[int] = None
     supplier_id: Optional[int] = None
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import hashlib
 import json
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation
 from typing import Any, Callable
@@ -23,15 +24,37 @@ from models.banking import (
     BankOperationResult,
     BankSyncResult,
     BankTransaction,
+    BankTransactionChanges,
     BankTransactionMatch,
     PendingTanSession,
 )
 from models.customer import Customer
+from models.invoice import Invoice
 from models.enums import (
     BankMatchStatus,
     BankTransactionDirection,
     BankTransactionStatus,
 )
+from utils.money import from_cents, to_cents
+from utils.text_matcher import TextMatcher
+
+
+def _invoice_fingerprint(invoice: Invoice) -> tuple:
+    """Alle Rechnungsfelder, die in die Bewertung eingehen."""
+    return (
+        to_cents(invoice.brutto),
+        (invoice.rechnungsnr or "").lower(),
+        invoice.customer_id,
+        invoice.datum,
+    )
+
+
+@dataclass
+class _MatchSnapshot:
+    invoices: dict[int, tuple]
+    customer_names: dict[int, frozenset[str]]
+    confirmed_pairs: set[tuple[int, int]]
+    rejected_pairs: set[tuple[int, int]]
 
 
 class BankingServiceError(Exception):
@@ -65,6 +88,11 @@ class BankingService:
         self.invoice_repo = InvoiceRepo(db)
         self.customer_repo = CustomerRepo(db)
         self.supplier_repo = SupplierRepo(db)
+        # Bleiben zwischen Abgleichen erhalten und werden nur um Aenderungen ergaenzt.
+        self._invoice_number_matcher = TextMatcher()
+        self._customer_name_matcher = TextMatcher()
+        # Eingaben des letzten Abgleichs je Konto, fuer den inkrementellen Neuaufbau.
+        self._match_snapshots: dict[int, _MatchSnapshot] = {}
 
     def get_connection_for_supplier(self, supplier_id: int) -> BankConnection | None:
         return self.connection_repo.get_by_supplier_id(supplier_id)
@@ -106,8 +134,9 @@ class BankingService:
         account = self.account_repo.get_by_id(account_id)
         if not account or account.connection_id != connection_id:
             raise BankingServiceError("Standardkonto konnte nicht gefunden werden.")
-        self.account_repo.set_default(connection_id, account_id)
-        self.connection_repo.set_default_account(connection_id, account.iban)
+        with self.db.transaction():
+            self.account_repo.set_default(connection_id, account_id)
+            self.connection_repo.set_default_account(connection_id, account.iban)
 
     def get_transactions_for_account(self, account_id: int) -> list[dict]:
         rows: list[dict] = []
@@ -176,8 +205,9 @@ class BankingService:
             )
 
         balance_amount, available_balance, balance_date = self._normalize_balance(response)
-        self.account_repo.update_balance(account_id, balance_amount, available_balance, balance_date)
-        self.connection_repo.update_client_state(connection_id, client_state_blob)
+        with self.db.transaction():
+            self.account_repo.update_balance(account_id, balance_amount, available_balance, balance_date)
+            self.connection_repo.update_client_state(connection_id, client_state_blob)
         refreshed = self._get_account(account_id, connection_id)
         return BankOperationResult(
             action=self.ACTION_FETCH_BALANCE,
@@ -228,18 +258,15 @@ class BankingService:
             )
 
         transactions = self._normalize_transactions(account, response)
-        persisted_transactions, imported_count, updated_count = self.transaction_repo.upsert_many(transactions)
-        suggested = self._rebuild_suggestions(connection, account, persisted_transactions)
-        self.connection_repo.update_client_state(connection_id, client_state_blob)
-        self.connection_repo.set_last_sync(connection_id, datetime.now())
+        changes, suggested = self._store_transactions(connection, account, transactions, client_state_blob)
         refreshed_account = self._get_account(account_id, connection_id)
         return BankOperationResult(
             action=self.ACTION_FETCH_TRANSACTIONS,
             connection_id=connection_id,
             sync_result=BankSyncResult(
                 account=refreshed_account,
-                imported_count=imported_count,
-                updated_count=updated_count,
+                imported_count=len(changes.inserted_ids),
+                updated_count=len(changes.updated_ids),
                 suggested_count=len(suggested),
                 transactions=self.transaction_repo.get_for_account(account_id),
                 suggestions=suggested,
@@ -293,8 +320,9 @@ class BankingService:
 
         if session.action == self.ACTION_FETCH_BALANCE:
             balance_amount, available_balance, balance_date = self._normalize_balance(response)
-            self.account_repo.update_balance(account_id, balance_amount, available_balance, balance_date)
-            self.connection_repo.update_client_state(connection.id, client_state_blob)
+            with self.db.transaction():
+                self.account_repo.update_balance(account_id, balance_amount, available_balance, balance_date)
+                self.connection_repo.update_client_state(connection.id, client_state_blob)
             refreshed = self._get_account(account_id, connection.id)
             return BankOperationResult(
                 action=session.action,
@@ -309,18 +337,15 @@ class BankingService:
 
         if session.action == self.ACTION_FETCH_TRANSACTIONS:
             transactions = self._normalize_transactions(account, response)
-            persisted_transactions, imported_count, updated_count = self.transaction_repo.upsert_many(transactions)
-            suggested = self._rebuild_suggestions(connection, account, persisted_transactions)
-            self.connection_repo.update_client_state(connection.id, client_state_blob)
-            self.connection_repo.set_last_sync(connection.id, datetime.now())
+            changes, suggested = self._store_transactions(connection, account, transactions, client_state_blob)
             refreshed = self._get_account(account_id, connection.id)
             return BankOperationResult(
                 action=session.action,
                 connection_id=connection.id,
                 sync_result=BankSyncResult(
                     account=refreshed,
-                    imported_count=imported_count,
-                    updated_count=updated_count,
+                    imported_count=len(changes.inserted_ids),
+                    updated_count=len(changes.updated_ids),
                     suggested_count=len(suggested),
                     transactions=self.transaction_repo.get_for_account(account_id),
                     suggestions=suggested,
@@ -330,38 +355,62 @@ class BankingService:
         raise BankingServiceError(f"Unbekannte TAN-Aktion: {session.action}")
 
     def confirm_match(self, transaction_id: int, invoice_id: int):
-        transaction = self.transaction_repo.get_by_id(transaction_id)
-        if not transaction:
-            raise BankingServiceError("Umsatz nicht gefunden.")
-        if self.match_repo.get_confirmed_for_transaction(transaction_id):
-            raise BankingServiceError("Dieser Umsatz ist bereits bestaetigt.")
-        if self.match_repo.get_confirmed_for_invoice(invoice_id):
-            raise BankingServiceError("Diese Rechnung ist bereits mit einem Umsatz verknuepft.")
-
-        self.match_repo.delete_suggestions_for_transaction(transaction_id)
-        self.match_repo.save(
-            BankTransactionMatch(
-                bank_transaction_id=transaction_id,
-                invoice_id=invoice_id,
-                status=BankMatchStatus.CONFIRMED.value,
-                confirmed_at=datetime.now(),
+        with self.db.transaction():
+            transaction = self.transaction_repo.get_by_id(transaction_id)
+            if not transaction:
+                raise BankingServiceError("Umsatz nicht gefunden.")
+            if self.match_repo.get_confirmed_for_transaction(transaction_id):
+                raise BankingServiceError("Dieser Umsatz ist bereits bestaetigt.")
+            if self.match_repo.get_confirmed_for_invoice(invoice_id):
+                raise BankingServiceError("Diese Rechnung ist bereits mit einem Umsatz verknuepft.")
+
+            self.match_repo.delete_suggestions_for_transaction(transaction_id)
+            self.match_repo.save(
+                BankTransactionMatch(
+                    bank_transaction_id=transaction_id,
+                    invoice_id=invoice_id,
+                    status=BankMatchStatus.CONFIRMED.value,
+                    confirmed_at=datetime.now(),
+                )
             )
-        )
-        paid_date = transaction.booking_date or transaction.value_date
-        self.invoice_repo.mark_paid(invoice_id, paid_date)
+            paid_date = transaction.booking_date or transaction.value_date
+            self.invoice_repo.mark_paid(invoice_id, paid_date)
 
     def reject_match(self, transaction_id: int, invoice_id: int):
-        existing = self.match_repo.get_pair(transaction_id, invoice_id)
-        self.match_repo.delete_suggestions_for_transaction(transaction_id)
-        self.match_repo.save(
-            BankTransactionMatch(
-                bank_transaction_id=transaction_id,
-                invoice_id=invoice_id,
-                status=BankMatchStatus.REJECTED.value,
-                score=existing.score if existing else 0,
-                reason_text=existing.reason_text if existing else None,
+        with self.db.transaction():
+            existing = self.match_repo.get_pair(transaction_id, invoice_id)
+            self.match_repo.delete_suggestions_for_transaction(transaction_id)
+            self.match_repo.save(
+                BankTransactionMatch(
+                    bank_transaction_id=transaction_id,
+                    invoice_id=invoice_id,
+                    status=BankMatchStatus.REJECTED.value,
+                    score=existing.score if existing else 0,
+                    reason_text=existing.reason_text if existing else None,
+                )
             )
-        )
+
+    def _store_transactions(
+        self,
+        connection: BankConnection,
+        account: BankAccount,
+        transactions: list[BankTransaction],
+        client_state_blob: bytes | None,
+    ) -> tuple[BankTransactionChanges, list[BankTransactionMatch]]:
+        """Speichert Umsaetze, Vorschlaege und Sync-Stand in einer Transaktion."""
+        try:
+            with self.db.transaction():
+                changes = self.transaction_repo.upsert_changes(transactions)
+                suggested = self._rebuild_suggestions(
+                    connection, account, changes.transactions, changed_ids=changes.changed_ids
+                )
+                self.connection_repo.update_client_state(connection.id, client_state_blob)
+                self.connection_repo.set_last_sync(connection.id, datetime.now())
+        except Exception:
+            # Vorschlaege wurden verworfen: beim naechsten Abgleich voll neu aufbauen.
+            self._match_snapshots.pop(account.id, None)
+            raise
+        return changes, suggested
 
     def _run_action(
         self,
@@ -470,11 +519,12 @@ class BankingService:
             else:
                 default_iban = fetched_accounts[0].iban
 
-        persisted = self.account_repo.save_many(connection.id, fetched_accounts, default_iban)
-        self.connection_repo.set_default_account(connection.id, default_iban)
-        default_account = next((account for account in persisted if account.iban == default_iban), None)
-        if default_account:
-            self.account_repo.set_default(connection.id, default_account.id)
+        with self.db.transaction():
+            persisted = self.account_repo.save_many(connection.id, fetched_accounts, default_iban)
+            self.connection_repo.set_default_account(connection.id, default_iban)
+            default_account = next((account for account in persisted if account.iban == default_iban), None)
+            if default_account:
+                self.account_repo.set_default(connection.id, default_account.id)
         return self.account_repo.get_for_connection(connection.id)
 
     def _resolve_sync_window(
@@ -581,58 +631,84 @@ class BankingService:
         connection: BankConnection,
         account: BankAccount,
         transactions: list[BankTransaction],
+        changed_ids: set[int] | None = None,
     ) -> list[BankTransactionMatch]:
+        """Bewertet Umsaetze neu und speichert eindeutige Zuordnungen als Vorschlag.
+
+        Mit changed_ids werden nur neue bzw. geaenderte Umsaetze und solche
+        bewertet, die von Aenderungen an Rechnungen, Kunden oder Paaren seit
+        dem letzten Abgleich dieses Kontos betroffen sind.
+        """
         if not account.is_default:
             return []
 
-        invoices = [
-            invoice
-            for invoice in self.invoice_repo.get_matchable_invoices()
-            if invoice.supplier_id == connection.supplier_id
-        ]
-        customer_cache: dict[int, Customer | None] = {}
-        suggested: list[BankTransactionMatch] = []
+        confirmed_pairs = self.match_repo.get_pairs_by_status(BankMatchStatus.CONFIRMED.value)
+        rejected_pairs = self.match_repo.get_pairs_by_status(BankMatchStatus.REJECTED.value)
+        confirmed_transaction_ids = {transaction_id for transaction_id, _ in confirmed_pairs}
+        confirmed_invoice_ids = {invoice_id for _, invoice_id in confirmed_pairs}
 
+        # Offene Rechnungen nach Bruttobetrag in Cent: pro Umsatz werden nur gleich hohe bewertet.
+        open_invoices: dict[int, Invoice] = {}
+        invoices_by_cents: dict[int, list[Invoice]] = {}
+        for invoice in self.invoice_repo.get_matchable_invoices(connection.supplier_id):
+            if invoice.id in confirmed_invoice_ids:
+                continue
+            open_invoices[invoice.id] = invoice
+            invoices_by_cents.setdefault(to_cents(invoice.brutto), []).append(invoice)
+        customers = {customer.id: customer for customer in self.customer_repo.get_all()}
+        self._invoice_number_matcher.sync(
+            {invoice.id: [invoice.rechnungsnr] for invoice in open_invoices.values() if invoice.rechnungsnr}
+        )
+        self._customer_name_matcher.sync(
+            {customer.id: self._customer_match_names(customer) for customer in customers.values()}
+        )
+
+        snapshot = _MatchSnapshot(
+            invoices={invoice.id: _invoice_fingerprint(invoice) for invoice in open_invoices.values()},
+            customer_names={
+                customer_id: frozenset(self._customer_match_names(customer))
+                for customer_id, customer in customers.items()
+            },
+            confirmed_pairs=confirmed_pairs,
+            rejected_pairs=rejected_pairs,
+        )
+        previous = self._match_snapshots.get(account.id)
+        is_affected = None
+        if changed_ids is not None and previous is not None:
+            is_affected = self._affected_by_delta(previous, snapshot)
+
+        rebuilt_ids: list[int] = []
+        matches: list[BankTransactionMatch] = []
         for transaction in transactions:
             if transaction.status != BankTransactionStatus.BOOKED.value:
                 continue
             if transaction.direction != BankTransactionDirection.INCOMING.value:
                 continue
-            if self.match_repo.get_confirmed_for_transaction(transaction.id):
+            if transaction.id in confirmed_transaction_ids:
                 continue
 
-            self.match_repo.delete_suggestions_for_transaction(transaction.id)
-            candidates: list[tuple[int, int, str]] = []
-            for invoice in invoices:
-                if self.match_repo.get_confirmed_for_invoice(invoice.id):
-                    continue
-                if round(abs(transaction.amount), 2) != round(invoice.brutto or 0.0, 2):
-                    continue
+            haystack = self._match_haystack(transaction)
+            if is_affected and transaction.id not in changed_ids and not is_affected(transaction, haystack):
+                continue
+            rebuilt_ids.append(transaction.id)
+            numbered_ids = self._invoice_number_matcher.scan(haystack)
+            named_customer_ids = self._customer_name_matcher.scan(haystack) if haystack else set()
+            same_amount = invoices_by_cents.get(to_cents(abs(transaction.amount)), [])
+            same_amount_ids = {invoice.id for invoice in same_amount}
+            # Auch Rechnungen mit abweichendem Betrag, deren Nummer im Verwendungszweck steht.
+            numbered_only = [open_invoices[i] for i in sorted(numbered_ids - same_amount_ids)]
 
-                existing_pair = self.match_repo.get_pair(transaction.id, invoice.id)
-                if existing_pair and existing_pair.status == BankMatchStatus.REJECTED.value:
+            candidates: list[tuple[int, int, str]] = []
+            for invoice in same_amount + numbered_only:
+                if (transaction.id, invoice.id) in rejected_pairs:
                     continue
-
-                score = 60
-                reasons = ["Exakter Betrag"]
-                haystack = self._match_haystack(transaction)
-                if invoice.rechnungsnr and invoice.rechnungsnr.lower() in haystack:
-                    score += 25
-                    reasons.append("Rechnungsnummer im Verwendungszweck")
-
-                if invoice.customer_id not in customer_cache:
-                    customer_cache[invoice.customer_id] = self.customer_repo.get_by_id(invoice.customer_id)
-                customer = customer_cache[invoice.customer_id]
-                if customer and self._customer_matches_transaction(customer, haystack):
-                    score += 10
-                    reasons.append("Kundenname erkannt")
-
-                if invoice.datum and transaction.booking_date:
-                    delta_days = (transaction.booking_date - invoice.datum).days
-                    if 0 <= delta_days <= 45:
-                        score += 5
-                        reasons.append("Zahlung im 45-Tage-Fenster")
-
+                score, reasons = self._score_candidate(
+                    transaction,
+                    invoice,
+                    amount_matches=invoice.id in same_amount_ids,
+                    number_found=invoice.id in numbered_ids,
+                    customer_found=invoice.customer_id in named_customer_ids,
+                )
                 candidates.append((score, invoice.id, ", ".join(reasons)))
 
             if not candidates:
@@ -646,19 +722,90 @@ class BankingService:
             if second_score is not None and top_score - second_score < 15:
                 continue
 
-            suggested.append(
-                self.match_repo.save(
-                    BankTransactionMatch(
-                        bank_transaction_id=transaction.id,
-                        invoice_id=top_invoice_id,
-                        status=BankMatchStatus.SUGGESTED.value,
-                        score=top_score,
-                        reason_text=top_reason,
-                    )
+            matches.append(
+                BankTransactionMatch(
+                    bank_transaction_id=transaction.id,
+                    invoice_id=top_invoice_id,
+                    status=BankMatchStatus.SUGGESTED.value,
+                    score=top_score,
+                    reason_text=top_reason,
                 )
             )
+        suggested = self.match_repo.replace_suggestions(rebuilt_ids, matches) if rebuilt_ids else []
+        self._match_snapshots[account.id] = snapshot
         return suggested
 
+    def _affected_by_delta(
+        self,
+        previous: _MatchSnapshot,
+        current: _MatchSnapshot,
+    ) -> Callable[[BankTransaction, str], bool]:
+        """Liefert eine Pruefung, ob ein Umsatz von den Aenderungen seit previous betroffen ist."""
+        amounts: set[int] = set()
+        texts: set[str] = set()
+        for invoice_id in previous.invoices.keys() | current.invoices.keys():
+            before = previous.invoices.get(invoice_id)
+            after = current.invoices.get(invoice_id)
+            if before == after:
+                continue
+            for fingerprint in (before, after):
+                if fingerprint:
+                    amounts.add(fingerprint[0])
+                    if fingerprint[1]:
+                        texts.add(fingerprint[1])
+        for customer_id in previous.customer_names.keys() | current.customer_names.keys():
+            before = previous.customer_names.get(customer_id, frozenset())
+            after = current.customer_names.get(customer_id, frozenset())
+            if before != after:
+                texts.update(before | after)
+        transaction_ids = {
+            transaction_id
+            for transaction_id, _ in (previous.confirmed_pairs ^ current.confirmed_pairs)
+            | (previous.rejected_pairs ^ current.rejected_pairs)
+        }
+        text_matcher = TextMatcher()
+        for text in texts:
+            text_matcher.set_patterns(text, [text])
+
+        def is_affected(transaction: BankTransaction, haystack: str) -> bool:
+            return (
+                transaction.id in transaction_ids
+                or to_cents(abs(transaction.amount)) in amounts
+                or bool(texts and text_matcher.scan(haystack))
+            )
+
+        return is_affected
+
+    def _score_candidate(
+        self,
+        transaction: BankTransaction,
+        invoice: Invoice,
+        amount_matches: bool,
+        number_found: bool,
+        customer_found: bool,
+    ) -> tuple[int, list[str]]:
+        if amount_matches:
+            score = 60
+            reasons = ["Exakter Betrag"]
+        else:
+            # Nur ueber die Rechnungsnummer gefunden: erreicht mit ihr gerade die Schwelle.
+            score = 35
+            reasons = ["Abweichender Betrag"]
+        if number_found:
+            score += 25
+            reasons.append("Rechnungsnummer im Verwendungszweck")
+
+        if customer_found:
+            score += 10
+            reasons.append("Kundenname erkannt")
+
+        if invoice.datum and transaction.booking_date:
+            delta_days = (transaction.booking_date - invoice.datum).days
+            if 0 <= delta_days <= 45:
+                score += 5
+                reasons.append("Zahlung im 45-Tage-Fenster")
+        return score, reasons
+
     def _get_connection(self, connection_id: int) -> BankConnection:
         connection = self.connection_repo.get_by_id(connection_id)
         if not connection:
@@ -699,15 +846,9 @@ class BankingService:
             if part
         )
 
-    def _customer_matches_transaction(self, customer: Customer, haystack: str) -> bool:
-        candidates = []
-        if customer.firma:
-            candidates.append(customer.firma)
-        if customer.vorname:
-            candidates.append(customer.vorname)
-        if customer.nachname:
-            candidates.append(customer.nachname)
-        return any(candidate.lower() in haystack for candidate in candidates if len(candidate) >= 3)
+    def _customer_match_names(self, customer: Customer) -> list[str]:
+        names = [customer.firma, customer.vorname, customer.nachname]
+        return [name for name in names if name and len(name) >= 3]
 
     def _preferred_match(self, transaction_id: int) -> BankTransactionMatch | None:
         matches = self.match_repo.get_for_transaction(transaction_id)
@@ -758,7 +899,7 @@ class BankingService:
         status = str(raw_status or "").upper()
         if status.startswith("D") and amount_decimal > 0:
             amount_decimal *= Decimal("-1")
-        return round(float(amount_decimal), 2), currency
+        return from_cents(to_cents(amount_decimal)), currency
 
     def _infer_transaction_status(self, data: dict[str, Any], booking_date: date | None) -> str:
         status = str(data.get("status") or data.get("booking_status") or "").strip().lower()
@@ -1,17 +1,190 @@
 import os
 import subprocess
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QComboBox, QMenu,
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, QHeaderView,
+    QComboBox, QMenu, QStyledItemDelegate, QStyle,
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import (
+    Qt, QAbstractTableModel, QEvent, QModelIndex, QRect, Signal,
+)
+from PySide6.QtGui import QColor, QPainter, QPen
 
 from db.database import Database
 from db.repos.invoice_repo import InvoiceRepo
-from db.repos.customer_repo import CustomerRepo
-from models.invoice import Invoice
+from models.invoice import Invoice, InvoiceOverview
 from models.enums import InvoiceStatus
-from ui.widgets import SearchBar, StatusBadge, confirm_delete, show_success, show_error
+from ui.theme import COLORS
+from ui.widgets import (
+    SearchBar, SearchController, StatusBadgeDelegate, confirm_delete, show_success,
+    show_error,
+)
+
+
+def _format_datum(datum) -> str:
+    if not datum:
+        return ""
+    if isinstance(datum, str):
+        parts = datum.split("-")
+        if len(parts) == 3:
+            return f"{parts[2]}.{parts[1]}.{parts[0]}"
+        return datum
+    return datum.strftime("%d.%m.%Y")
+
+
+def _format_brutto(brutto: float | None) -> str:
+    if brutto is None:
+        return "-"
+    return f"{brutto:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class ArchiveTableModel(QAbstractTableModel):
+    """Rechnungsliste, die ihre Zeilen fensterweise aus der Datenbank nachlaedt."""
+
+    HEADERS = ["Rechnungsnr.", "Datum", "Kunde", "Betreff", "Brutto", "Status", "Aktionen"]
+    COL_STATUS = 5
+    COL_ACTIONS = 6
+    FETCH_SIZE = 200
+
+    def __init__(self, invoice_repo: InvoiceRepo, parent=None):
+        super().__init__(parent)
+        self.invoice_repo = invoice_repo
+        self._rows: list[InvoiceOverview] = []
+        self._status: str | None = None
+        self._query: str | None = None
+        self._exhausted = False
+
+    def reset(self, status: str | None, query: str | None, first_window: list[InvoiceOverview]):
+        """Setzt Filter und erstes Fenster; weitere Zeilen laedt fetchMore nach."""
+        self.beginResetModel()
+        self._status = status
+        self._query = query
+        self._rows = list(first_window)
+        self._exhausted = len(first_window) < self.FETCH_SIZE
+        self.endResetModel()
+
+    def row_at(self, row: int) -> InvoiceOverview | None:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        after = None
+        if self._rows:
+            last = self._rows[-1]
+            after = (last.datum, last.id)
+        rows = self.invoice_repo.list_overview(
+            status=self._status,
+            query=self._query,
+            after=after,
+            limit=self.FETCH_SIZE,
+        )
+        if len(rows) < self.FETCH_SIZE:
+            self._exhausted = True
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        inv = self._rows[index.row()]
+        if role == Qt.ItemDataRole.UserRole:
+            return inv
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        column = index.column()
+        if column == 0:
+            return inv.rechnungsnr
+        if column == 1:
+            return _format_datum(inv.datum)
+        if column == 2:
+            return inv.kunde_name
+        if column == 3:
+            return inv.betreff or ""
+        if column == 4:
+            return _format_brutto(inv.brutto)
+        if column == self.COL_STATUS:
+            return inv.status
+        return None
+
+    def headerData(self, section: int, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+
+class ArchiveActionsDelegate(QStyledItemDelegate):
+    """Zeichnet die Aktions-Buttons je Zeile und wertet Klicks darauf aus."""
+
+    pdf_requested = Signal(str)
+    status_requested = Signal(int, str)
+
+    BUTTON_WIDTH = 50
+    SPACING = 4
+
+    def _buttons(self, rect: QRect, inv: InvoiceOverview) -> list[tuple[str, str, QRect]]:
+        buttons = []
+        if inv.pdf_path:
+            buttons.append(("pdf", "PDF"))
+        buttons.append(("status", "Status"))
+
+        result = []
+        x = rect.left() + 4
+        for key, label in buttons:
+            result.append((key, label, QRect(x, rect.top() + 2, self.BUTTON_WIDTH, rect.height() - 4)))
+            x += self.BUTTON_WIDTH + self.SPACING
+        return result
+
+    def paint(self, painter: QPainter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        inv = index.data(Qt.ItemDataRole.UserRole)
+        if inv is None:
+            return
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for _, label, rect in self._buttons(option.rect, inv):
+            painter.setPen(QPen(QColor(COLORS["border"]), 1))
+            painter.setBrush(QColor(COLORS["surface"]))
+            painter.drawRoundedRect(rect, 6, 6)
+            painter.setPen(QColor(COLORS["text"]))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if event.type() != QEvent.Type.MouseButtonRelease:
+            return False
+        if event.button() != Qt.MouseButton.LeftButton:
+            return False
+        inv = index.data(Qt.ItemDataRole.UserRole)
+        if inv is None:
+            return False
+
+        pos = event.position().toPoint()
+        for key, _, rect in self._buttons(option.rect, inv):
+            if rect.contains(pos):
+                if key == "pdf":
+                    self.pdf_requested.emit(inv.pdf_path)
+                else:
+                    self.status_requested.emit(inv.id, inv.status)
+                return True
+        return False
 
 
 class ArchiveTab(QWidget):
@@ -19,7 +192,6 @@ class ArchiveTab(QWidget):
         super().__init__()
         self.db = db
         self.invoice_repo = InvoiceRepo(db)
-        self.customer_repo = CustomerRepo(db)
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
@@ -42,21 +214,33 @@ class ArchiveTab(QWidget):
 
         # Suche
         self.search_bar = SearchBar("Suche (Rechnungsnr., Kunde, Betreff)...")
-        self.search_bar.search_input.textChanged.connect(self._on_search)
         layout.addWidget(self.search_bar)
+        self._status_filter: str | None = None
+        self.search = SearchController(db, self.search_bar.search_input, self._fetch_rows, parent=self)
+        self.search.results_ready.connect(self._on_rows_loaded)
+        self.search.failed.connect(lambda message: show_error(self, message))
 
         # Tabelle
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "Rechnungsnr.", "Datum", "Kunde", "Betreff", "Brutto", "Status", "Aktionen"
-        ])
+        self.model = ArchiveTableModel(self.invoice_repo, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(
+            ArchiveTableModel.COL_ACTIONS, QHeaderView.ResizeMode.Fixed
+        )
+        self.table.horizontalHeader().resizeSection(ArchiveTableModel.COL_ACTIONS, 116)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.table.doubleClicked.connect(self._on_double_click)
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self._show_context_menu)
+
+        self.status_delegate = StatusBadgeDelegate(self.table)
+        self.actions_delegate = ArchiveActionsDelegate(self.table)
+        self.actions_delegate.pdf_requested.connect(self._open_pdf)
+        self.actions_delegate.status_requested.connect(self._cycle_status)
+        self.table.setItemDelegateForColumn(ArchiveTableModel.COL_STATUS, self.status_delegate)
+        self.table.setItemDelegateForColumn(ArchiveTableModel.COL_ACTIONS, self.actions_delegate)
         layout.addWidget(self.table)
 
     def showEvent(self, event):
@@ -64,79 +248,27 @@ class ArchiveTab(QWidget):
         self._load_table()
 
     def _load_table(self, *_):
-        query = self.search_bar.text.strip()
-        if query:
-            invoices = self.invoice_repo.search(query)
-        else:
-            invoices = self.invoice_repo.get_all()
-
-        status_filter = self.filter_status.currentData()
-        if status_filter:
-            invoices = [i for i in invoices if i.status == status_filter]
-
-        self.table.setRowCount(len(invoices))
-        for row, inv in enumerate(invoices):
-            # Rechnungsnr
-            nr_item = QTableWidgetItem(inv.rechnungsnr)
-            nr_item.setData(Qt.ItemDataRole.UserRole, inv.id)
-            self.table.setItem(row, 0, nr_item)
-
-            # Datum
-            datum_str = ""
-            if inv.datum:
-                if isinstance(inv.datum, str):
-                    parts = inv.datum.split("-")
-                    if len(parts) == 3:
-                        datum_str = f"{parts[2]}.{parts[1]}.{parts[0]}"
-                else:
-                    datum_str = inv.datum.strftime("%d.%m.%Y")
-            self.table.setItem(row, 1, QTableWidgetItem(datum_str))
-
-            # Kunde
-            customer = self.customer_repo.get_by_id(inv.customer_id)
-            kunde_name = customer.full_name if customer else f"ID {inv.customer_id}"
-            self.table.setItem(row, 2, QTableWidgetItem(kunde_name))
-
-            # Betreff
-            self.table.setItem(row, 3, QTableWidgetItem(inv.betreff or ""))
-
-            # Brutto
-            brutto = inv.brutto or 0
-            brutto_str = f"{brutto:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
-            self.table.setItem(row, 4, QTableWidgetItem(brutto_str))
-
-            # Status Badge
-            badge = StatusBadge(inv.status)
-            self.table.setCellWidget(row, 5, badge)
-
-            # Aktionen
-            actions = QWidget()
-            actions_layout = QHBoxLayout(actions)
-            actions_layout.setContentsMargins(4, 2, 4, 2)
-            actions_layout.setSpacing(4)
-
-            if inv.pdf_path:
-                btn_pdf = QPushButton("PDF")
-                btn_pdf.setFixedWidth(50)
-                btn_pdf.clicked.connect(lambda _, p=inv.pdf_path: self._open_pdf(p))
-                actions_layout.addWidget(btn_pdf)
-
-            btn_status = QPushButton("Status")
-            btn_status.setFixedWidth(50)
-            btn_status.clicked.connect(lambda _, iid=inv.id, s=inv.status: self._cycle_status(iid, s))
-            actions_layout.addWidget(btn_status)
-
-            self.table.setCellWidget(row, 6, actions)
-
-    def _on_search(self, text: str):
-        self._load_table()
+        self._status_filter = self.filter_status.currentData()
+        self.search.run_now()
+
+    def _fetch_rows(self, db: Database, query: str):
+        # Laeuft im Such-Thread: keine Widgets anfassen.
+        status = self._status_filter
+        rows = InvoiceRepo(db).list_overview(
+            status=status,
+            query=query or None,
+            limit=ArchiveTableModel.FETCH_SIZE,
+        )
+        return status, query or None, rows
+
+    def _on_rows_loaded(self, result):
+        status, query, rows = result
+        self.model.reset(status, query, rows)
 
     def _on_double_click(self, index):
-        row = index.row()
-        item = self.table.item(row, 0)
-        if item:
-            invoice_id = item.data(Qt.ItemDataRole.UserRole)
-            invoice = self.invoice_repo.get_by_id(invoice_id)
+        inv = self.model.row_at(index.row())
+        if inv:
+            invoice = self.invoice_repo.get_by_id(inv.id)
             if invoice:
                 self._open_invoice(invoice)
 
@@ -166,14 +298,11 @@ class ArchiveTab(QWidget):
 
     def _show_context_menu(self, pos):
         row = self.table.rowAt(pos.y())
-        if row < 0:
+        inv = self.model.row_at(row)
+        if not inv:
             return
 
-        item = self.table.item(row, 0)
-        if not item:
-            return
-
-        invoice_id = item.data(Qt.ItemDataRole.UserRole)
+        invoice_id = inv.id
         invoice = self.invoice_repo.get_by_id(invoice_id)
         if not invoice:
             return
@@ -207,32 +336,34 @@ class ArchiveTab(QWidget):
         self._load_table()
 
     def _duplicate(self, invoice: Invoice):
+        from dataclasses import replace
         from db.repos.number_repo import NumberRepo
         from datetime import date
 
         nr_repo = NumberRepo(self.db)
-        new_nr = nr_repo.naechste_nummer(date.today())
-
-        new_inv = Invoice(
-            supplier_id=invoice.supplier_id,
-            customer_id=invoice.customer_id,
-            rechnungsnr=new_nr,
-            datum=date.today(),
-            betreff=invoice.betreff,
-            objekt_weg=invoice.objekt_weg,
-            zahlungsziel=invoice.zahlungsziel,
-            rabatt_typ=invoice.rabatt_typ,
-            rabatt_wert=invoice.rabatt_wert,
-            lohnanteil_35a=invoice.lohnanteil_35a,
-            geraeteanteil_35a=invoice.geraeteanteil_35a,
-            dankessatz=invoice.dankessatz,
-            hinweise=invoice.hinweise,
-            netto=invoice.netto,
-            mwst_betrag=invoice.mwst_betrag,
-            brutto=invoice.brutto,
-            positionen=invoice.positionen,
-        )
-        self.invoice_repo.create(new_inv)
+        # Nummernvergabe und Anlage gemeinsam, damit keine Nummer verloren geht.
+        with self.db.transaction():
+            new_nr = nr_repo.naechste_nummer(date.today())
+            new_inv = Invoice(
+                supplier_id=invoice.supplier_id,
+                customer_id=invoice.customer_id,
+                rechnungsnr=new_nr,
+                datum=date.today(),
+                betreff=invoice.betreff,
+                objekt_weg=invoice.objekt_weg,
+                zahlungsziel=invoice.zahlungsziel,
+                rabatt_typ=invoice.rabatt_typ,
+                rabatt_wert=invoice.rabatt_wert,
+                lohnanteil_35a=invoice.lohnanteil_35a,
+                geraeteanteil_35a=invoice.geraeteanteil_35a,
+                dankessatz=invoice.dankessatz,
+                hinweise=invoice.hinweise,
+                netto=invoice.netto,
+                mwst_betrag=invoice.mwst_betrag,
+                brutto=invoice.brutto,
+                positionen=[replace(line, id=None, invoice_id=None) for line in invoice.positionen],
+            )
+            self.invoice_repo.create(new_inv)
         self._load_table()
         show_success(self, f"Rechnung dupliziert als {new_nr}")
 
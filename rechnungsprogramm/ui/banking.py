@@ -6,6 +6,7 @@ from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal, Slot
 from PySide6.QtGui import QPixmap
 from PySide6.QtWidgets import (
     QAbstractItemView,
+    QComboBox,
     QDialog,
     QDialogButtonBox,
     QFormLayout,
@@ -39,9 +40,10 @@ class WorkerSignals(QObject):
 
 
 class BankWorker(QRunnable):
-    def __init__(self, func: Callable, *args, **kwargs):
+    def __init__(self, func: Callable, *args, db: Database | None = None, **kwargs):
         super().__init__()
         self.func = func
+        self.db = db
         self.args = args
         self.kwargs = kwargs
         self.signals = WorkerSignals()
@@ -52,6 +54,9 @@ class BankWorker(QRunnable):
             result = self.func(*self.args, **self.kwargs)
             self.signals.result.emit(result)
         except Exception as exc:
+            if self.db is not None:
+                # Eine abgebrochene Schreibtransaktion darf die Schreibverbindung nicht blockieren.
+                self.db.rollback()
             self.signals.error.emit(str(exc))
         finally:
             self.signals.finished.emit()
@@ -543,7 +548,8 @@ class BankingTab(QWidget):
             show_error(self, str(exc))
             return
         self._reload_current_connection()
-        archive_tab = getattr(self.window(), "archive_tab", None)
+        main_window = self.window()
+        archive_tab = main_window.loaded_tab("archive_tab") if hasattr(main_window, "loaded_tab") else None
         if archive_tab and hasattr(archive_tab, "_load_table"):
             archive_tab._load_table()
         show_success(self, "Zahlung bestaetigt und Rechnung als bezahlt markiert.")
@@ -558,7 +564,7 @@ class BankingTab(QWidget):
         show_success(self, "Vorschlag abgelehnt.")
 
     def _run_worker(self, func: Callable, *args, on_result: Callable):
-        worker = BankWorker(func, *args)
+        worker = BankWorker(func, *args, db=self.db)
         self._workers.add(worker)
         self._set_busy(True)
         worker.signals.result.connect(on_result)
@@ -12,7 +12,7 @@ from db.database import Database
 from db.repos.customer_repo import CustomerRepo
 from models.customer import Customer
 from ui.widgets import (
-    FormCard, SearchBar, confirm_delete, show_success, show_error,
+    FormCard, SearchBar, SearchController, confirm_delete, show_success, show_error,
     create_anrede_combo,
 )
 
@@ -107,8 +107,10 @@ class CustomersTab(QWidget):
         left_layout.addLayout(header_layout)
 
         self.search_bar = SearchBar("Kunden suchen (Name, Firma, Ort)...")
-        self.search_bar.search_input.textChanged.connect(self._on_search_changed)
         left_layout.addWidget(self.search_bar)
+        self.search = SearchController(db, self.search_bar.search_input, self._fetch_customers, parent=self)
+        self.search.results_ready.connect(self._load_table)
+        self.search.failed.connect(lambda message: show_error(self, message))
 
         self.table = QTableWidget()
         self.table.setColumnCount(4)
@@ -209,12 +211,10 @@ class CustomersTab(QWidget):
             self.table.setItem(row, 2, QTableWidgetItem(c.ort or ""))
             self.table.setItem(row, 3, QTableWidgetItem(c.telefon or ""))
 
-    def _on_search_changed(self, text: str):
-        if text.strip():
-            results = self.repo.search(text.strip())
-        else:
-            results = self.repo.get_all()
-        self._load_table(results)
+    def _fetch_customers(self, db: Database, query: str) -> list[Customer]:
+        # Laeuft im Such-Thread: keine Widgets anfassen.
+        repo = CustomerRepo(db)
+        return repo.search(query) if query else repo.get_all()
 
     def _on_table_double_click(self, index):
         row = index.row()
@@ -24,7 +24,9 @@ from db.repos.fs_repo import FSRepo
 from db.repos.supplier_repo import SupplierRepo
 from models.firmenschreiben import Firmenschreiben
 from ui.ai_text_dialog import AITextDialog
-from ui.widgets import FormCard, create_date_edit, show_error, show_success
+from ui.widgets import (
+    FormCard, SearchController, create_date_edit, show_error, show_success, subscribe_master_data,
+)
 
 
 class FirmenschreibenTab(QWidget):
@@ -35,6 +37,9 @@ class FirmenschreibenTab(QWidget):
         self.customer_repo = CustomerRepo(db)
         self.fs_repo = FSRepo(db)
         self.current_fs: Firmenschreiben | None = None
+        # Auswahllisten nur nach Aenderungen an den Stammdaten neu aufbauen.
+        self._dropdowns_stale = True
+        subscribe_master_data(db, self, self._on_master_data_changed)
 
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -155,8 +160,11 @@ class FirmenschreibenTab(QWidget):
         search_layout = QHBoxLayout()
         self.inp_suche = QLineEdit()
         self.inp_suche.setPlaceholderText("Suche (Nr., Betreff, Empfaenger)...")
-        self.inp_suche.textChanged.connect(self._load_table)
         search_layout.addWidget(self.inp_suche)
+        self._entries: list[Firmenschreiben] = []
+        self.search = SearchController(self.db, self.inp_suche, self._fetch_entries, parent=self)
+        self.search.results_ready.connect(self._fill_table)
+        self.search.failed.connect(lambda message: show_error(self, message))
         search_widget = QWidget()
         search_widget.setLayout(search_layout)
         card.add_row(search_widget)
@@ -230,13 +238,20 @@ class FirmenschreibenTab(QWidget):
 
     def showEvent(self, event):
         super().showEvent(event)
-        self.refresh_contexts()
+        if self._dropdowns_stale:
+            self.refresh_contexts()
         self._load_table()
 
+    def _on_master_data_changed(self, _table: str):
+        self._dropdowns_stale = True
+        if self.isVisible():
+            self._refresh_dropdowns()
+
     def refresh_contexts(self):
         self._refresh_dropdowns()
 
     def _refresh_dropdowns(self):
+        self._dropdowns_stale = False
         current_supplier = self.cmb_supplier.currentData()
         self.cmb_supplier.blockSignals(True)
         self.cmb_supplier.clear()
@@ -326,20 +341,29 @@ class FirmenschreibenTab(QWidget):
         self.inp_fsnr.setText(naechste_fsnr(self.db, selected_date))
 
     def _load_table(self, *_):
-        query = self.inp_suche.text().strip()
-        entries = self.fs_repo.search(query) if query else self.fs_repo.get_all()
-
-        self.tbl_liste.setRowCount(0)
+        self.search.run_now()
+
+    def _fetch_entries(self, db: Database, query: str) -> list[tuple[Firmenschreiben, str]]:
+        # Laeuft im Such-Thread: keine Widgets anfassen.
+        fs_repo = FSRepo(db)
+        customer_repo = CustomerRepo(db)
+        entries = fs_repo.search(query) if query else fs_repo.get_all()
+        customer_names: dict[int, str] = {}
+        result = []
         for fs in entries:
+            if fs.customer_id and fs.customer_id not in customer_names:
+                customer = customer_repo.get_by_id(fs.customer_id)
+                customer_names[fs.customer_id] = customer.display_name if customer else ""
+            result.append((fs, customer_names.get(fs.customer_id, "")))
+        return result
+
+    def _fill_table(self, entries: list[tuple[Firmenschreiben, str]]):
+        self._entries = [fs for fs, _ in entries]
+        self.tbl_liste.setRowCount(0)
+        for fs, customer_name in entries:
             row = self.tbl_liste.rowCount()
             self.tbl_liste.insertRow(row)
 
-            customer_name = ""
-            if fs.customer_id:
-                customer = self.customer_repo.get_by_id(fs.customer_id)
-                if customer:
-                    customer_name = customer.display_name
-
             datum_str = fs.datum.strftime("%d.%m.%Y") if isinstance(fs.datum, date) else str(fs.datum or "")
             status_label = "Entwurf" if fs.status == "entwurf" else "Versendet"
 
@@ -370,10 +394,8 @@ class FirmenschreibenTab(QWidget):
 
     def _on_table_double_click(self, index):
         row = index.row()
-        query = self.inp_suche.text().strip()
-        entries = self.fs_repo.search(query) if query else self.fs_repo.get_all()
-        if 0 <= row < len(entries):
-            self._laden_fs(entries[row])
+        if 0 <= row < len(self._entries):
+            self._laden_fs(self._entries[row])
 
     def _laden_fs(self, fs: Firmenschreiben):
         fs_full = self.fs_repo.get_by_id(fs.id)
@@ -490,11 +512,12 @@ class FirmenschreibenTab(QWidget):
             customer = self.customer_repo.get_by_id(fs.customer_id) if fs.customer_id else None
             pdf_path = generate_fs_pdf(fs, supplier, customer)
 
-            self.fs_repo.update_pdf_path(fs.id, str(pdf_path))
+            with self.db.transaction():
+                self.fs_repo.update_pdf_path(fs.id, str(pdf_path))
+                if fs.status == "entwurf":
+                    self.fs_repo.update_status(fs.id, "versendet")
             fs.pdf_path = str(pdf_path)
-
             if fs.status == "entwurf":
-                self.fs_repo.update_status(fs.id, "versendet")
                 fs.status = "versendet"
                 idx = self.cmb_status.findData("versendet")
                 if idx >= 0:
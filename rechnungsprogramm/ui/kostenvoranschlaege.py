@@ -1,7 +1,6 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QTextEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView,
-    QComboBox, QCheckBox, QDoubleSpinBox, QSpinBox, QScrollArea,
+    QPushButton, QComboBox, QCheckBox, QSpinBox, QScrollArea,
     QGroupBox, QFormLayout, QDateEdit, QRadioButton, QButtonGroup,
     QFileDialog, QAbstractSpinBox,
 )
@@ -18,10 +17,11 @@ from models.supplier import Supplier
 from models.customer import Customer
 from ui.widgets import (
     FormCard, show_success, show_error,
-    create_date_edit, create_currency_spinbox, create_mwst_combo,
-    NoScrollDoubleSpinBox, NoScrollSpinBox,
+    create_date_edit, create_currency_spinbox,
+    NoScrollDoubleSpinBox, NoScrollSpinBox, shared_article_model, subscribe_master_data,
 )
-from utils.calculations import berechne_rechnung, berechne_position
+from ui.position_table import PositionRow, PositionTableModel, create_position_table
+from utils.calculations import berechne_rechnung
 
 
 class KostenvoranschlaegeTab(QWidget):
@@ -31,8 +31,12 @@ class KostenvoranschlaegeTab(QWidget):
         self.supplier_repo = SupplierRepo(db)
         self.customer_repo = CustomerRepo(db)
         self.article_repo = ArticleRepo(db)
+        self.article_model = shared_article_model(db)
         self.kv_repo = KVRepo(db)
         self.current_kv: Kostenvoranschlag | None = None
+        # Auswahllisten nur nach Aenderungen an den Stammdaten neu aufbauen.
+        self._dropdowns_stale = True
+        subscribe_master_data(db, self, self._on_master_data_changed)
 
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -121,27 +125,13 @@ class KostenvoranschlaegeTab(QWidget):
         card = FormCard("Positionen")
 
         # 7 columns: Artikel, Beschreibung, Menge, Einzelpreis, MwSt, Gesamt, (X)
-        self.pos_table = QTableWidget()
-        self.pos_table.setColumnCount(7)
-        self.pos_table.setHorizontalHeaderLabels([
-            "Artikel", "Beschreibung", "Menge", "Einzelpreis", "MwSt", "Gesamt", ""
-        ])
-        header = self.pos_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(6, QHeaderView.ResizeMode.Fixed)
-        self.pos_table.setColumnWidth(0, 180)
-        self.pos_table.setColumnWidth(2, 80)
-        self.pos_table.setColumnWidth(3, 110)
-        self.pos_table.setColumnWidth(4, 90)
-        self.pos_table.setColumnWidth(5, 100)
-        self.pos_table.setColumnWidth(6, 40)
-        self.pos_table.verticalHeader().setDefaultSectionSize(50)
-        self.pos_table.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        # Editoren entstehen nur fuer die gerade bearbeitete Zelle (siehe ui/position_table.py)
+        self.pos_model = PositionTableModel(
+            self.article_model, self.article_repo, with_35a=False, on_change=self._update_summen,
+        )
+        self.pos_table = create_position_table(self.pos_model)
+        # Entfernen per X-Button laeuft am Editor vorbei ueber removeRows.
+        self.pos_model.rowsRemoved.connect(lambda *_: self._update_position_table_height())
         card.add_row(self.pos_table)
 
         btn_layout = QHBoxLayout()
@@ -159,7 +149,7 @@ class KostenvoranschlaegeTab(QWidget):
 
     def _update_position_table_height(self):
         header_height = self.pos_table.horizontalHeader().height()
-        rows_height = sum(self.pos_table.rowHeight(row) for row in range(self.pos_table.rowCount()))
+        rows_height = self.pos_table.verticalHeader().length()
         frame_height = self.pos_table.frameWidth() * 2
         scrollbar_height = (
             self.pos_table.horizontalScrollBar().height()
@@ -268,9 +258,16 @@ class KostenvoranschlaegeTab(QWidget):
 
     def showEvent(self, event):
         super().showEvent(event)
-        self._refresh_dropdowns()
+        if self._dropdowns_stale:
+            self._refresh_dropdowns()
+
+    def _on_master_data_changed(self, _table: str):
+        self._dropdowns_stale = True
+        if self.isVisible():
+            self._refresh_dropdowns()
 
     def _refresh_dropdowns(self):
+        self._dropdowns_stale = False
         current_supplier = self.cmb_supplier.currentData()
         self.cmb_supplier.blockSignals(True)
         self.cmb_supplier.clear()
@@ -295,28 +292,6 @@ class KostenvoranschlaegeTab(QWidget):
                 self.cmb_customer.setCurrentIndex(idx)
         self.cmb_customer.blockSignals(False)
 
-        self._refresh_article_combos()
-
-    def _refresh_article_combos(self):
-        articles = self.article_repo.get_all()
-        for row in range(self.pos_table.rowCount()):
-            combo = self.pos_table.cellWidget(row, 0)
-            if isinstance(combo, QComboBox):
-                current_data = combo.currentData()
-                current_text = combo.currentText()
-                combo.blockSignals(True)
-                combo.clear()
-                combo.addItem("", None)
-                for a in articles:
-                    combo.addItem(a.bezeichnung, a.id)
-                if current_data:
-                    idx = combo.findData(current_data)
-                    if idx >= 0:
-                        combo.setCurrentIndex(idx)
-                elif current_text:
-                    combo.setEditText(current_text)
-                combo.blockSignals(False)
-
     def _on_supplier_changed(self, index):
         supplier_id = self.cmb_supplier.currentData()
         if supplier_id:
@@ -345,104 +320,8 @@ class KostenvoranschlaegeTab(QWidget):
         self.inp_kvnr.setText(nr)
 
     def _add_position_row(self):
-        row = self.pos_table.rowCount()
-        self.pos_table.insertRow(row)
-
-        # Artikel-Combo
-        cmb = QComboBox()
-        cmb.setEditable(True)
-        cmb.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
-        cmb.addItem("", None)
-        for a in self.article_repo.get_all():
-            cmb.addItem(a.bezeichnung, a.id)
-        cmb.currentIndexChanged.connect(lambda _, r=row: self._on_article_selected(r))
-        self.pos_table.setCellWidget(row, 0, cmb)
-
-        # Beschreibung
-        self.pos_table.setItem(row, 1, QTableWidgetItem(""))
-
-        # Menge
-        menge = NoScrollDoubleSpinBox()
-        menge.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
-        menge.setRange(0.01, 99999)
-        menge.setValue(1.0)
-        menge.setDecimals(2)
-        menge.valueChanged.connect(self._update_summen)
-        self.pos_table.setCellWidget(row, 2, menge)
-
-        # Einzelpreis
-        preis = NoScrollDoubleSpinBox()
-        preis.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
-        preis.setRange(0, 999999)
-        preis.setDecimals(2)
-        preis.setSuffix(" €")
-        preis.valueChanged.connect(self._update_summen)
-        self.pos_table.setCellWidget(row, 3, preis)
-
-        # MwSt
-        mwst = create_mwst_combo()
-        mwst.currentIndexChanged.connect(self._update_summen)
-        self.pos_table.setCellWidget(row, 4, mwst)
-
-        # Gesamt
-        self.pos_table.setItem(row, 5, QTableWidgetItem("0,00 €"))
-
-        # X-Button
-        btn_remove = QPushButton("X")
-        btn_remove.setCursor(Qt.CursorShape.PointingHandCursor)
-        btn_remove.setToolTip("Position entfernen")
-        btn_remove.setStyleSheet(
-            "QPushButton {"
-            "  color: #dc2626; background: #fee2e2; border: 1px solid #fca5a5;"
-            "  border-radius: 4px; font-size: 14px; font-weight: bold;"
-            "  padding: 2px 6px;"
-            "}"
-            "QPushButton:hover { background: #fecaca; border-color: #f87171; }"
-            "QPushButton:pressed { background: #fca5a5; }"
-        )
-        btn_remove.clicked.connect(lambda _, r=row: self._remove_position_row(r))
-        self.pos_table.setCellWidget(row, 6, btn_remove)
-
+        self.pos_model.append_row()
         self._update_position_table_height()
-        self._update_summen()
-
-    def _remove_position_row(self, row: int):
-        if row < self.pos_table.rowCount():
-            self.pos_table.removeRow(row)
-            for r in range(self.pos_table.rowCount()):
-                btn = self.pos_table.cellWidget(r, 6)
-                if isinstance(btn, QPushButton):
-                    btn.clicked.disconnect()
-                    btn.clicked.connect(lambda _, r=r: self._remove_position_row(r))
-                combo = self.pos_table.cellWidget(r, 0)
-                if isinstance(combo, QComboBox):
-                    try:
-                        combo.currentIndexChanged.disconnect()
-                    except RuntimeError:
-                        pass
-                    combo.currentIndexChanged.connect(lambda _, r=r: self._on_article_selected(r))
-            self._update_position_table_height()
-            self._update_summen()
-
-    def _on_article_selected(self, row: int):
-        combo = self.pos_table.cellWidget(row, 0)
-        if not isinstance(combo, QComboBox):
-            return
-        article_id = combo.currentData()
-        if article_id:
-            article = self.article_repo.get_by_id(article_id)
-            if article:
-                self.pos_table.item(row, 1).setText(article.bezeichnung)
-                preis_widget = self.pos_table.cellWidget(row, 3)
-                if isinstance(preis_widget, QDoubleSpinBox):
-                    preis_widget.setValue(article.preis)
-                mwst_widget = self.pos_table.cellWidget(row, 4)
-                if isinstance(mwst_widget, QComboBox):
-                    for i in range(mwst_widget.count()):
-                        if mwst_widget.itemData(i) == article.mwst:
-                            mwst_widget.setCurrentIndex(i)
-                            break
-                self._update_summen()
 
     def _toggle_rabatt(self, checked: bool):
         self.rabatt_widget.setVisible(checked)
@@ -450,40 +329,14 @@ class KostenvoranschlaegeTab(QWidget):
             self.inp_rabatt_wert.setValue(0)
         self._update_summen()
 
-    def _get_positionen_data(self) -> list[dict]:
-        positionen = []
-        for row in range(self.pos_table.rowCount()):
-            menge_w = self.pos_table.cellWidget(row, 2)
-            preis_w = self.pos_table.cellWidget(row, 3)
-            mwst_w = self.pos_table.cellWidget(row, 4)
-
-            menge = menge_w.value() if isinstance(menge_w, QDoubleSpinBox) else 1.0
-            preis = preis_w.value() if isinstance(preis_w, QDoubleSpinBox) else 0.0
-            mwst = mwst_w.currentData() if isinstance(mwst_w, QComboBox) else 19.0
-
-            gesamt = berechne_position(menge, preis)
-            positionen.append({
-                "gesamt_netto": gesamt,
-                "mwst": mwst,
-                "beguenstigt_35a": False,
-            })
-
-            item = self.pos_table.item(row, 5)
-            if item:
-                item.setText(f"{gesamt:,.2f} €".replace(",", "X").replace(".", ",").replace("X", "."))
-
-        return positionen
-
     def _update_summen(self, *_):
-        positionen = self._get_positionen_data()
-
         rabatt_typ = None
         rabatt_wert = 0.0
         if self.chk_rabatt.isChecked():
             rabatt_typ = "prozent" if self.rb_prozent.isChecked() else "betrag"
             rabatt_wert = self.inp_rabatt_wert.value()
 
-        summen = berechne_rechnung(positionen, rabatt_typ, rabatt_wert)
+        summen = self.pos_model.summen.summen(rabatt_typ, rabatt_wert)
 
         fmt = lambda v: f"{v:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
 
@@ -514,7 +367,7 @@ class KostenvoranschlaegeTab(QWidget):
         self.inp_gueltig_tage.setValue(30)
         self.inp_betreff.clear()
         self.inp_objekt.clear()
-        self.pos_table.setRowCount(0)
+        self.pos_model.set_rows([])
         self._update_position_table_height()
         self.chk_rabatt.setChecked(False)
         self.inp_rabatt_wert.setValue(0)
@@ -538,7 +391,7 @@ class KostenvoranschlaegeTab(QWidget):
             self._generate_number()
             kvnr = self.inp_kvnr.text().strip()
 
-        if self.pos_table.rowCount() == 0:
+        if self.pos_model.rowCount() == 0:
             show_error(self, "Bitte fügen Sie mindestens eine Position hinzu.")
             return None
 
@@ -566,29 +419,17 @@ class KostenvoranschlaegeTab(QWidget):
 
         # Positionen
         kv.positionen = []
-        for row in range(self.pos_table.rowCount()):
-            line = KVLine()
-            line.position = row + 1
-
-            combo = self.pos_table.cellWidget(row, 0)
-            if isinstance(combo, QComboBox):
-                line.article_id = combo.currentData()
-
-            item = self.pos_table.item(row, 1)
-            beschreibung = item.text() if item else ""
-            if not beschreibung and isinstance(combo, QComboBox) and not combo.currentData():
-                beschreibung = combo.currentText().strip()
-            line.beschreibung = beschreibung
-
-            menge_w = self.pos_table.cellWidget(row, 2)
-            line.menge = menge_w.value() if isinstance(menge_w, QDoubleSpinBox) else 1.0
-
-            preis_w = self.pos_table.cellWidget(row, 3)
-            line.einzelpreis = preis_w.value() if isinstance(preis_w, QDoubleSpinBox) else 0.0
-
-            mwst_w = self.pos_table.cellWidget(row, 4)
-            line.mwst = mwst_w.currentData() if isinstance(mwst_w, QComboBox) else 19.0
-
+        for row, pos in enumerate(self.pos_model.rows(), start=1):
+            line = KVLine(
+                id=pos.line_id,
+                position=row,
+                article_id=pos.article_id,
+                # Wenn keine Beschreibung aber Freitext im Artikel-Feld, diesen verwenden
+                beschreibung=pos.beschreibung or pos.freitext.strip(),
+                menge=pos.menge,
+                einzelpreis=pos.einzelpreis,
+                mwst=pos.mwst,
+            )
             line.berechne_gesamt()
             kv.positionen.append(line)
 
@@ -619,6 +460,7 @@ class KostenvoranschlaegeTab(QWidget):
             kv.id = self.kv_repo.create(kv)
             self.current_kv = kv
             show_success(self, f"Kostenvoranschlag {kv.kvnr} gespeichert.")
+        self.pos_model.set_line_ids([line.id for line in kv.positionen])
 
     def _export_pdf(self):
         kv = self._read_kv()
@@ -630,6 +472,7 @@ class KostenvoranschlaegeTab(QWidget):
         else:
             kv.id = self.kv_repo.create(kv)
             self.current_kv = kv
+        self.pos_model.set_line_ids([line.id for line in kv.positionen])
 
         try:
             from export.kv_pdf_generator import generate_kv_pdf
@@ -637,12 +480,12 @@ class KostenvoranschlaegeTab(QWidget):
             customer = self.customer_repo.get_by_id(kv.customer_id)
             pdf_path = generate_kv_pdf(kv, supplier, customer)
 
-            self.kv_repo.update_pdf_path(kv.id, str(pdf_path))
+            with self.db.transaction():
+                self.kv_repo.update_pdf_path(kv.id, str(pdf_path))
+                if kv.status == "offen":
+                    self.kv_repo.update_status(kv.id, "offen")
             kv.pdf_path = str(pdf_path)
 
-            if kv.status == "offen":
-                self.kv_repo.update_status(kv.id, "offen")
-
             show_success(self, f"PDF exportiert: {pdf_path}")
 
             import os
@@ -683,39 +526,16 @@ class KostenvoranschlaegeTab(QWidget):
         self.inp_dankessatz.setPlainText(kv.dankessatz or "")
         self.inp_hinweise.setPlainText(kv.hinweise or "")
 
-        self.pos_table.setRowCount(0)
-        self._update_position_table_height()
-        for line in kv.positionen:
-            self._add_position_row()
-            row = self.pos_table.rowCount() - 1
-
-            combo = self.pos_table.cellWidget(row, 0)
-            if isinstance(combo, QComboBox):
-                combo.blockSignals(True)
-                if line.article_id:
-                    idx = combo.findData(line.article_id)
-                    if idx >= 0:
-                        combo.setCurrentIndex(idx)
-                elif line.beschreibung:
-                    combo.setEditText(line.beschreibung)
-                combo.blockSignals(False)
-
-            self.pos_table.item(row, 1).setText(line.beschreibung)
-
-            menge_w = self.pos_table.cellWidget(row, 2)
-            if isinstance(menge_w, QDoubleSpinBox):
-                menge_w.setValue(line.menge)
-
-            preis_w = self.pos_table.cellWidget(row, 3)
-            if isinstance(preis_w, QDoubleSpinBox):
-                preis_w.setValue(line.einzelpreis)
-
-            mwst_w = self.pos_table.cellWidget(row, 4)
-            if isinstance(mwst_w, QComboBox):
-                for i in range(mwst_w.count()):
-                    if mwst_w.itemData(i) == line.mwst:
-                        mwst_w.setCurrentIndex(i)
-                        break
-
+        self.pos_model.set_rows([
+            PositionRow(
+                article_id=line.article_id,
+                freitext="" if line.article_id else line.beschreibung,
+                beschreibung=line.beschreibung,
+                menge=line.menge,
+                einzelpreis=line.einzelpreis,
+                mwst=line.mwst,
+                line_id=line.id,
+            )
+            for line in kv.positionen
+        ])
         self._update_position_table_height()
-        self._update_summen()
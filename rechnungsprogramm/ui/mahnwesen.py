@@ -15,9 +15,8 @@ from db.repos.customer_repo import CustomerRepo
 from db.repos.supplier_repo import SupplierRepo
 from models.invoice import Invoice
 from ui.widgets import (
-    SearchBar, StatusBadge, show_error, create_date_edit,
+    SearchBar, SearchController, StatusBadge, show_error, create_date_edit,
 )
-from export.mahnung_pdf_generator import generate_mahnung_pdf, get_mahnung_template_text
 
 
 class MahnwesenTab(QWidget):
@@ -53,8 +52,11 @@ class MahnwesenTab(QWidget):
 
         # Suche
         self.search_bar = SearchBar("Suche (Rechnungsnr., Kunde, Betreff)...")
-        self.search_bar.search_input.textChanged.connect(self._load_table)
         layout.addWidget(self.search_bar)
+        self._status_filter: str | None = None
+        self.search = SearchController(self.db, self.search_bar.search_input, self._fetch_rows, parent=self)
+        self.search.results_ready.connect(self._fill_table)
+        self.search.failed.connect(lambda message: show_error(self, message))
 
         # Splitter: Tabelle oben, Formular unten
         splitter = QSplitter(Qt.Orientation.Vertical)
@@ -147,16 +149,24 @@ class MahnwesenTab(QWidget):
         self._load_table()
 
     def _load_table(self, *_):
-        query = self.search_bar.text.strip()
-        if query:
-            invoices = self.invoice_repo.search(query)
-        else:
-            invoices = self.invoice_repo.get_all()
+        self._status_filter = self.filter_status.currentData()
+        self.search.run_now()
+
+    def _load_table_now(self):
+        """Laedt die Tabelle synchron, z.B. bevor eine Zeile selektiert wird."""
+        self.search.cancel()
+        self._fill_table(
+            self.invoice_repo.list_overview(
+                status=self.filter_status.currentData(),
+                query=self.search_bar.text.strip() or None,
+            )
+        )
 
-        status_filter = self.filter_status.currentData()
-        if status_filter:
-            invoices = [i for i in invoices if i.status == status_filter]
+    def _fetch_rows(self, db: Database, query: str):
+        # Laeuft im Such-Thread: keine Widgets anfassen.
+        return InvoiceRepo(db).list_overview(status=self._status_filter, query=query or None)
 
+    def _fill_table(self, invoices):
         self.table.setRowCount(len(invoices))
         for row, inv in enumerate(invoices):
             nr_item = QTableWidgetItem(inv.rechnungsnr)
@@ -173,14 +183,14 @@ class MahnwesenTab(QWidget):
                     datum_str = inv.datum.strftime("%d.%m.%Y")
             self.table.setItem(row, 1, QTableWidgetItem(datum_str))
 
-            customer = self.customer_repo.get_by_id(inv.customer_id)
-            kunde_name = customer.full_name if customer else f"ID {inv.customer_id}"
-            self.table.setItem(row, 2, QTableWidgetItem(kunde_name))
+            self.table.setItem(row, 2, QTableWidgetItem(inv.kunde_name))
 
             self.table.setItem(row, 3, QTableWidgetItem(inv.betreff or ""))
 
-            brutto = inv.brutto or 0
-            brutto_str = f"{brutto:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
+            if inv.brutto is None:
+                brutto_str = "-"
+            else:
+                brutto_str = f"{inv.brutto:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
             self.table.setItem(row, 4, QTableWidgetItem(brutto_str))
 
             badge = StatusBadge(inv.status)
@@ -207,7 +217,7 @@ class MahnwesenTab(QWidget):
 
     def load_invoice(self, invoice: Invoice):
         """Öffentliche Methode: Rechnung in Tabelle selektieren und Formular befüllen."""
-        self._load_table()
+        self._load_table_now()
         for row in range(self.table.rowCount()):
             item = self.table.item(row, 0)
             if item and item.data(Qt.ItemDataRole.UserRole) == invoice.id:
@@ -216,7 +226,7 @@ class MahnwesenTab(QWidget):
         else:
             # Rechnung nicht in aktuell gefilterter Liste – Filter zurücksetzen
             self.filter_status.setCurrentIndex(0)
-            self._load_table()
+            self._load_table_now()
             for row in range(self.table.rowCount()):
                 item = self.table.item(row, 0)
                 if item and item.data(Qt.ItemDataRole.UserRole) == invoice.id:
@@ -243,6 +253,8 @@ class MahnwesenTab(QWidget):
         mahnung_typ = (
             "Zahlungserinnerung" if self.radio_erinnerung.isChecked() else "2. Mahnung"
         )
+        from export.mahnung_pdf_generator import get_mahnung_template_text
+
         text = get_mahnung_template_text(mahnung_typ, customer, invoice)
         self.text_edit.setPlainText(text)
 
@@ -270,6 +282,8 @@ class MahnwesenTab(QWidget):
         body_text = self.text_edit.toPlainText()
 
         try:
+            from export.mahnung_pdf_generator import generate_mahnung_pdf
+
             pdf_path = generate_mahnung_pdf(
                 invoice=self._selected_invoice,
                 supplier=supplier,
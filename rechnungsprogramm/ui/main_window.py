@@ -1,3 +1,5 @@
+import importlib
+
 from PySide6.QtWidgets import (
     QMainWindow, QTabWidget, QStatusBar, QWidget, QVBoxLayout, QLabel,
 )
@@ -7,6 +9,31 @@ from PySide6.QtGui import QKeySequence, QShortcut
 from db.database import Database
 from ui.theme import STYLESHEET
 
+# (Attribut, Modul, Klasse, Titel) in Tab-Reihenfolge
+TAB_SPECS = (
+    ("suppliers_tab", "ui.suppliers", "SuppliersTab", "Rechnungssteller"),
+    ("customers_tab", "ui.customers", "CustomersTab", "Kunden"),
+    ("articles_tab", "ui.articles", "ArticlesTab", "Artikel"),
+    ("invoices_tab", "ui.invoices", "InvoicesTab", "Rechnung erstellen"),
+    ("kv_tab", "ui.kostenvoranschlaege", "KostenvoranschlaegeTab", "Kostenvoranschlag"),
+    ("fs_tab", "ui.firmenschreiben", "FirmenschreibenTab", "Firmenschreiben"),
+    ("text_assistant_tab", "ui.text_assistant", "TextAssistantTab", "Textassistent"),
+    ("archive_tab", "ui.archive", "ArchiveTab", "Archiv"),
+    ("mahnwesen_tab", "ui.mahnwesen", "MahnwesenTab", "Mahnwesen"),
+    ("banking_tab", "ui.banking", "BankingTab", "Bank"),
+    ("settings_tab", "ui.settings", "SettingsTab", "Einstellungen"),
+)
+TAB_INDEX = {attr: index for index, (attr, *_rest) in enumerate(TAB_SPECS)}
+
+
+class _TabPlaceholder(QWidget):
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout(self)
+        label = QLabel("Wird geladen...")
+        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(label)
+
 
 class MainWindow(QMainWindow):
     def __init__(self, db: Database):
@@ -36,41 +63,49 @@ class MainWindow(QMainWindow):
         self._setup_shortcuts()
 
     def _create_tabs(self):
-        from ui.suppliers import SuppliersTab
-        from ui.customers import CustomersTab
-        from ui.articles import ArticlesTab
-        from ui.invoices import InvoicesTab
-        from ui.kostenvoranschlaege import KostenvoranschlaegeTab
-        from ui.firmenschreiben import FirmenschreibenTab
-        from ui.text_assistant import TextAssistantTab
-        from ui.archive import ArchiveTab
-        from ui.mahnwesen import MahnwesenTab
-        from ui.banking import BankingTab
-        from ui.settings import SettingsTab
-
-        self.suppliers_tab = SuppliersTab(self.db)
-        self.customers_tab = CustomersTab(self.db)
-        self.articles_tab = ArticlesTab(self.db)
-        self.invoices_tab = InvoicesTab(self.db)
-        self.kv_tab = KostenvoranschlaegeTab(self.db)
-        self.fs_tab = FirmenschreibenTab(self.db)
-        self.text_assistant_tab = TextAssistantTab(self.db)
-        self.archive_tab = ArchiveTab(self.db)
-        self.mahnwesen_tab = MahnwesenTab(self.db)
-        self.banking_tab = BankingTab(self.db)
-        self.settings_tab = SettingsTab(self.db)
-
-        self.tabs.addTab(self.suppliers_tab, "Rechnungssteller")
-        self.tabs.addTab(self.customers_tab, "Kunden")
-        self.tabs.addTab(self.articles_tab, "Artikel")
-        self.tabs.addTab(self.invoices_tab, "Rechnung erstellen")
-        self.tabs.addTab(self.kv_tab, "Kostenvoranschlag")
-        self.tabs.addTab(self.fs_tab, "Firmenschreiben")
-        self.tabs.addTab(self.text_assistant_tab, "Textassistent")
-        self.tabs.addTab(self.archive_tab, "Archiv")
-        self.tabs.addTab(self.mahnwesen_tab, "Mahnwesen")
-        self.tabs.addTab(self.banking_tab, "Bank")
-        self.tabs.addTab(self.settings_tab, "Einstellungen")
+        # Tabs werden erst beim ersten Aktivieren gebaut; bis dahin steht ein Platzhalter im Tab.
+        self._tab_placeholders: dict[int, QWidget] = {}
+        for index, (_attr, _module, _class, label) in enumerate(TAB_SPECS):
+            placeholder = _TabPlaceholder()
+            self._tab_placeholders[index] = placeholder
+            self.tabs.addTab(placeholder, label)
+        self.tabs.currentChanged.connect(self._ensure_tab)
+        self._ensure_tab(self.tabs.currentIndex())
+
+    def _ensure_tab(self, index: int) -> QWidget | None:
+        if index < 0 or index >= len(TAB_SPECS):
+            return None
+        attr, module_name, class_name, label = TAB_SPECS[index]
+        widget = self.__dict__.get(attr)
+        if widget is not None:
+            return widget
+
+        tab_class = getattr(importlib.import_module(module_name), class_name)
+        widget = tab_class(self.db)
+        setattr(self, attr, widget)
+
+        placeholder = self._tab_placeholders.pop(index)
+        current = self.tabs.currentIndex()
+        self.tabs.blockSignals(True)
+        try:
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, widget, label)
+            self.tabs.setCurrentIndex(current)
+        finally:
+            self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+        return widget
+
+    def loaded_tab(self, attr: str) -> QWidget | None:
+        """Gibt den Tab nur zurueck, wenn er schon gebaut wurde."""
+        return self.__dict__.get(attr)
+
+    def __getattr__(self, name: str):
+        # Zugriffe wie main_window.invoices_tab bauen den Tab bei Bedarf.
+        index = TAB_INDEX.get(name)
+        if index is None:
+            raise AttributeError(name)
+        return self._ensure_tab(index)
 
     def _setup_shortcuts(self):
         for i in range(min(self.tabs.count(), 9)):
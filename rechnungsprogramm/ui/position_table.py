@@ -0,0 +1,365 @@
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Any, Callable
+
+from PySide6.QtWidgets import (
+    QAbstractItemView, QAbstractSpinBox, QHeaderView, QStyle, QStyledItemDelegate, QTableView,
+)
+from PySide6.QtCore import (
+    Qt, QAbstractTableModel, QEvent, QModelIndex, QPersistentModelIndex, QRectF,
+)
+from PySide6.QtGui import QColor, QFont, QPainter, QPen
+
+from db.repos.article_repo import ArticleRepo
+from utils.calculations import LaufendeSummen, berechne_position_cent
+from utils.money import from_cents, to_cents
+from ui.widgets import ArticleListModel, NoScrollDoubleSpinBox, create_article_combo, create_mwst_combo
+
+_keys = count()
+
+
+@dataclass(slots=True)
+class PositionRow:
+    """Eine Zeile im Positionseditor; freitext ist der Text im Artikelfeld ohne Artikel.
+
+    line_id ist die id der gespeicherten Position, damit beim Speichern nur
+    geaenderte Zeilen geschrieben werden.
+    """
+
+    line_id: int | None = None
+    article_id: int | None = None
+    freitext: str = ""
+    beschreibung: str = ""
+    menge: float = 1.0
+    einzelpreis: float = 0.0
+    mwst: float = 19.0
+    beguenstigt_35a: bool = False
+    key: int = field(default_factory=lambda: next(_keys))
+
+    @property
+    def gesamt_netto_cent(self) -> int:
+        return berechne_position_cent(self.menge, to_cents(self.einzelpreis))
+
+
+def _fmt_zahl(value: float) -> str:
+    return f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class PositionTableModel(QAbstractTableModel):
+    """Positionen einer Rechnung bzw. eines KV samt fortlaufender Summen.
+
+    Die Spalten ergeben sich aus with_35a (Rechnung mit, KV ohne §35a-Spalte).
+    on_change wird nach jeder Aenderung aufgerufen, die die Summen betrifft.
+    """
+
+    ARTIKEL, BESCHREIBUNG, MENGE, EINZELPREIS, MWST, B35A, GESAMT, ENTFERNEN = (
+        "artikel", "beschreibung", "menge", "einzelpreis", "mwst", "35a", "gesamt", "entfernen",
+    )
+    HEADERS = {
+        ARTIKEL: "Artikel", BESCHREIBUNG: "Beschreibung", MENGE: "Menge",
+        EINZELPREIS: "Einzelpreis", MWST: "MwSt", B35A: "§35a", GESAMT: "Gesamt", ENTFERNEN: "",
+    }
+
+    def __init__(
+        self,
+        article_model: ArticleListModel,
+        article_repo: ArticleRepo,
+        with_35a: bool,
+        on_change: Callable[[], None],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.article_model = article_model
+        self.article_repo = article_repo
+        self.columns = [
+            self.ARTIKEL, self.BESCHREIBUNG, self.MENGE, self.EINZELPREIS, self.MWST,
+            *([self.B35A] if with_35a else []), self.GESAMT, self.ENTFERNEN,
+        ]
+        self.summen = LaufendeSummen()
+        self._rows: list[PositionRow] = []
+        self._on_change = on_change
+
+    def column(self, name: str) -> int:
+        return self.columns.index(name)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section: int, orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[self.columns[section]]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index: QModelIndex):
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        name = self.columns[index.column()]
+        if name == self.B35A:
+            return flags | Qt.ItemFlag.ItemIsUserCheckable
+        if name not in (self.GESAMT, self.ENTFERNEN):
+            return flags | Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        pos = self._rows[index.row()]
+        name = self.columns[index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if name == self.ARTIKEL:
+                return self.article_model.name_for_id(pos.article_id) or pos.freitext
+            if name == self.BESCHREIBUNG:
+                return pos.beschreibung
+            if name == self.MENGE:
+                return _fmt_zahl(pos.menge)
+            if name == self.EINZELPREIS:
+                return f"{_fmt_zahl(pos.einzelpreis)} €"
+            if name == self.MWST:
+                return f"{pos.mwst:.0f}%"
+            if name == self.GESAMT:
+                return f"{_fmt_zahl(from_cents(pos.gesamt_netto_cent))} €"
+        elif role == Qt.ItemDataRole.EditRole:
+            return getattr(pos, name, None) if name != self.ARTIKEL else pos.article_id
+        elif role == Qt.ItemDataRole.CheckStateRole and name == self.B35A:
+            return Qt.CheckState.Checked if pos.beguenstigt_35a else Qt.CheckState.Unchecked
+        elif role == Qt.ItemDataRole.TextAlignmentRole and name in (
+            self.MENGE, self.EINZELPREIS, self.MWST, self.GESAMT,
+        ):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        elif role == Qt.ItemDataRole.ToolTipRole and name == self.ENTFERNEN:
+            return "Position entfernen"
+        return None
+
+    def setData(self, index: QModelIndex, value: Any, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        pos = self._rows[index.row()]
+        name = self.columns[index.column()]
+        if role == Qt.ItemDataRole.CheckStateRole and name == self.B35A:
+            pos.beguenstigt_35a = Qt.CheckState(value) == Qt.CheckState.Checked
+        elif role != Qt.ItemDataRole.EditRole:
+            return False
+        elif name == self.BESCHREIBUNG:
+            pos.beschreibung = str(value)
+            self.dataChanged.emit(index, index)
+            return True
+        elif name == self.MENGE:
+            pos.menge = float(value)
+        elif name == self.EINZELPREIS:
+            pos.einzelpreis = float(value)
+        elif name == self.MWST:
+            pos.mwst = float(value)
+        else:
+            return False
+        self._zeile_geaendert(index.row())
+        return True
+
+    def set_article(self, row: int, article_id: int | None, freitext: str, uebernehmen: bool):
+        """Setzt Artikel oder Freitext; uebernehmen fuellt die Zeile aus dem Artikel."""
+        pos = self._rows[row]
+        if article_id and (uebernehmen or article_id != pos.article_id):
+            article = self.article_repo.get_by_id(article_id)
+            if article:
+                pos.beschreibung = article.bezeichnung
+                pos.einzelpreis = article.preis
+                pos.mwst = article.mwst
+                pos.beguenstigt_35a = article.beguenstigt_35a
+        pos.article_id = article_id or None
+        pos.freitext = "" if article_id else freitext
+        self._zeile_geaendert(row)
+
+    def append_row(self, pos: PositionRow | None = None):
+        pos = pos or PositionRow()
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append(pos)
+        self.summen.setze(pos.key, pos.gesamt_netto_cent, pos.mwst, pos.beguenstigt_35a)
+        self.endInsertRows()
+        self._on_change()
+
+    def removeRows(self, row: int, count: int = 1, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.isValid() or row < 0 or row + count > len(self._rows):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        for pos in self._rows[row:row + count]:
+            self.summen.entferne(pos.key)
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        self._on_change()
+        return True
+
+    def set_rows(self, rows: list[PositionRow]):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.summen.leeren()
+        for pos in self._rows:
+            self.summen.setze(pos.key, pos.gesamt_netto_cent, pos.mwst, pos.beguenstigt_35a)
+        self.endResetModel()
+        self._on_change()
+
+    def rows(self) -> list[PositionRow]:
+        return list(self._rows)
+
+    def set_line_ids(self, line_ids: list[int | None]):
+        """Uebernimmt die beim Speichern vergebenen ids, in Zeilenreihenfolge."""
+        for pos, line_id in zip(self._rows, line_ids):
+            pos.line_id = line_id
+
+    def _zeile_geaendert(self, row: int):
+        pos = self._rows[row]
+        self.summen.setze(pos.key, pos.gesamt_netto_cent, pos.mwst, pos.beguenstigt_35a)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+        self._on_change()
+
+
+class PositionDelegate(QStyledItemDelegate):
+    """Editoren fuer die Positionstabelle; sie entstehen nur fuer die gerade bearbeitete Zelle.
+
+    Mengen-, Preis- und MwSt-Aenderungen werden sofort ins Modell geschrieben, damit
+    die Summen schon waehrend der Eingabe stimmen.
+    """
+
+    def __init__(self, model: PositionTableModel, parent=None):
+        super().__init__(parent)
+        self.model = model
+
+    def createEditor(self, parent, option, index: QModelIndex):
+        name = self.model.columns[index.column()]
+        target = QPersistentModelIndex(index)
+        if name == PositionTableModel.ARTIKEL:
+            editor = create_article_combo(self.model.article_model)
+            editor.setParent(parent)
+            editor.activated.connect(lambda _, e=editor: self._commit_article(e, target, True))
+            return editor
+        if name in (PositionTableModel.MENGE, PositionTableModel.EINZELPREIS):
+            editor = NoScrollDoubleSpinBox(parent)
+            editor.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
+            editor.setDecimals(2)
+            if name == PositionTableModel.MENGE:
+                editor.setRange(0.01, 99999)
+            else:
+                editor.setRange(0, 999999)
+                editor.setSuffix(" €")
+            editor.valueChanged.connect(lambda value: self._write(target, value))
+            return editor
+        if name == PositionTableModel.MWST:
+            editor = create_mwst_combo()
+            editor.setParent(parent)
+            editor.activated.connect(lambda i, e=editor: self._write(target, e.itemData(i)))
+            return editor
+        return super().createEditor(parent, option, index)
+
+    def setEditorData(self, editor, index: QModelIndex):
+        name = self.model.columns[index.column()]
+        value = index.data(Qt.ItemDataRole.EditRole)
+        if name == PositionTableModel.ARTIKEL:
+            row = self.model.article_model.row_for_id(value)
+            if row >= 0:
+                editor.setCurrentIndex(row)
+            else:
+                editor.setCurrentIndex(0)
+                editor.setEditText(index.data(Qt.ItemDataRole.DisplayRole) or "")
+        elif name in (PositionTableModel.MENGE, PositionTableModel.EINZELPREIS):
+            editor.blockSignals(True)
+            editor.setValue(value)
+            editor.blockSignals(False)
+        elif name == PositionTableModel.MWST:
+            editor.setCurrentIndex(max(0, editor.findData(value)))
+        else:
+            super().setEditorData(editor, index)
+
+    def setModelData(self, editor, model, index: QModelIndex):
+        name = self.model.columns[index.column()]
+        if name == PositionTableModel.ARTIKEL:
+            self._commit_article(editor, QPersistentModelIndex(index), False)
+        elif name in (PositionTableModel.MENGE, PositionTableModel.EINZELPREIS):
+            editor.interpretText()
+            self._write(QPersistentModelIndex(index), editor.value())
+        elif name == PositionTableModel.MWST:
+            self._write(QPersistentModelIndex(index), editor.currentData())
+        else:
+            super().setModelData(editor, model, index)
+
+    def _write(self, target: QPersistentModelIndex, value):
+        if target.isValid() and value is not None:
+            index = self.model.index(target.row(), target.column())
+            if index.data(Qt.ItemDataRole.EditRole) != value:
+                self.model.setData(index, value)
+
+    def _commit_article(self, editor, target: QPersistentModelIndex, uebernehmen: bool):
+        if target.isValid():
+            text = editor.currentText().strip()
+            article_id = editor.currentData()
+            if article_id and text != self.model.article_model.name_for_id(article_id):
+                # Text wurde nach der Auswahl ueberschrieben: als Freitext behandeln
+                article_id = None
+            self.model.set_article(target.row(), article_id, text, uebernehmen)
+
+
+class RemoveButtonDelegate(QStyledItemDelegate):
+    """Zeichnet den X-Knopf einer Zeile und entfernt sie beim Klick."""
+
+    def paint(self, painter: QPainter, option, index):
+        hovered = option.state & QStyle.StateFlag.State_MouseOver
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        size = min(28, option.rect.width() - 6, option.rect.height() - 6)
+        button = QRectF(
+            option.rect.center().x() - size / 2,
+            option.rect.center().y() - size / 2,
+            size,
+            size,
+        )
+        painter.setPen(QPen(QColor("#f87171" if hovered else "#fca5a5"), 1))
+        painter.setBrush(QColor("#fecaca" if hovered else "#fee2e2"))
+        painter.drawRoundedRect(button, 4, 4)
+        font = QFont(option.font)
+        font.setPixelSize(14)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor("#dc2626"))
+        painter.drawText(button, Qt.AlignmentFlag.AlignCenter, "X")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if (
+            event.type() == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and option.rect.contains(event.position().toPoint())
+        ):
+            model.removeRows(index.row(), 1)
+            return True
+        return False
+
+
+def create_position_table(model: PositionTableModel) -> QTableView:
+    """Positionstabelle mit den Spaltenbreiten des bisherigen Editors."""
+    table = QTableView()
+    table.setModel(model)
+    table.setEditTriggers(QAbstractItemView.EditTrigger.AllEditTriggers)
+    table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+    table.setMouseTracking(True)
+    table.setItemDelegate(PositionDelegate(model, table))
+    table.setItemDelegateForColumn(model.column(model.ENTFERNEN), RemoveButtonDelegate(table))
+    table.verticalHeader().setDefaultSectionSize(50)
+    table.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+
+    header = table.horizontalHeader()
+    widths = {
+        model.ARTIKEL: 180, model.MENGE: 80, model.EINZELPREIS: 110, model.MWST: 90,
+        model.GESAMT: 100, model.ENTFERNEN: 40,
+    }
+    for column, name in enumerate(model.columns):
+        if name == model.BESCHREIBUNG:
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.Stretch)
+        elif name == model.B35A:
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        elif name == model.ENTFERNEN:
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.Fixed)
+        else:
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.Interactive)
+        if name in widths:
+            table.setColumnWidth(column, widths[name])
+    return table
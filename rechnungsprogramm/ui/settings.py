@@ -1,8 +1,11 @@
+from pathlib import Path
+
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit, QComboBox, QCheckBox,
-    QPushButton, QHBoxLayout,
+    QPushButton, QHBoxLayout, QFileDialog,
 )
 
+from db.database import SYNCHRONOUS_MODES, TEMP_STORE_MODES, DatabaseProfile
 from services.ai_config import (
     AIPreferences,
     load_ai_config,
@@ -10,12 +13,14 @@ from services.ai_config import (
     resolve_model,
     save_ai_preferences,
 )
-from ui.widgets import FormCard, NoScrollDoubleSpinBox, NoScrollSpinBox, show_success
+from ui.widgets import FormCard, NoScrollDoubleSpinBox, NoScrollSpinBox, show_error, show_success
+from utils.db_settings import load_database_profile, save_database_profile
 
 
 class SettingsTab(QWidget):
     def __init__(self, db=None):
         super().__init__()
+        self.db = db
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
@@ -99,6 +104,70 @@ class SettingsTab(QWidget):
         self.ai_card.add_row(hint)
         layout.addWidget(self.ai_card)
 
+        self.db_card = FormCard("Datenbank-Leistung")
+        self.cmb_synchronous = QComboBox()
+        for mode in SYNCHRONOUS_MODES:
+            self.cmb_synchronous.addItem(mode, mode)
+        self.cmb_synchronous.setToolTip("NORMAL ist im WAL-Modus sicher und deutlich schneller als FULL.")
+        self.db_card.add_field("Synchronous", self.cmb_synchronous)
+
+        self.inp_cache_size = NoScrollSpinBox()
+        self.inp_cache_size.setRange(2, 1024)
+        self.inp_cache_size.setSuffix(" MB")
+        self.inp_cache_size.setToolTip("Seiten-Cache je Verbindung.")
+        self.db_card.add_field("Cache", self.inp_cache_size)
+
+        self.inp_mmap_size = NoScrollSpinBox()
+        self.inp_mmap_size.setRange(0, 4096)
+        self.inp_mmap_size.setSuffix(" MB")
+        self.inp_mmap_size.setToolTip("0 schaltet Memory-Mapped I/O ab.")
+        self.db_card.add_field("Memory-Map", self.inp_mmap_size)
+
+        self.cmb_temp_store = QComboBox()
+        for mode in TEMP_STORE_MODES:
+            self.cmb_temp_store.addItem(mode, mode)
+        self.cmb_temp_store.setToolTip("Ablage temporaerer Tabellen und Sortierungen.")
+        self.db_card.add_field("Temp-Store", self.cmb_temp_store)
+
+        self.inp_busy_timeout = NoScrollSpinBox()
+        self.inp_busy_timeout.setRange(0, 60000)
+        self.inp_busy_timeout.setSingleStep(500)
+        self.inp_busy_timeout.setSuffix(" ms")
+        self.inp_busy_timeout.setToolTip("Wartezeit bei gesperrter Datenbank, bevor ein Fehler gemeldet wird.")
+        self.db_card.add_field("Busy-Timeout", self.inp_busy_timeout)
+
+        self.chk_optimize = QCheckBox("Beim Beenden PRAGMA optimize ausfuehren")
+        self.db_card.add_row(self.chk_optimize)
+
+        self.chk_profile_queries = QCheckBox("SQL-Profiler und Slow-Log aktivieren")
+        self.chk_profile_queries.setToolTip(
+            "Zaehlt Laufzeit und Zeilen je Abfrage; nur fuer die Fehlersuche einschalten."
+        )
+        self.db_card.add_row(self.chk_profile_queries)
+
+        self.inp_slow_query = NoScrollSpinBox()
+        self.inp_slow_query.setRange(1, 60000)
+        self.inp_slow_query.setSingleStep(50)
+        self.inp_slow_query.setSuffix(" ms")
+        self.inp_slow_query.setToolTip("Abfragen ab dieser Dauer landen mit aufrufender Methode im Slow-Log.")
+        self.db_card.add_field("Slow-Log ab", self.inp_slow_query)
+
+        self.btn_export_profile = QPushButton("SQL-Statistik speichern...")
+        self.btn_export_profile.setToolTip("Statistik als Textdatei speichern, z. B. fuer einen Fehlerbericht.")
+        self.btn_export_profile.clicked.connect(self._export_query_stats)
+        self.db_card.add_row(self.btn_export_profile)
+
+        self.lbl_db_active = QLabel("")
+        self.lbl_db_active.setWordWrap(True)
+        self.lbl_db_active.setProperty("cssClass", "secondary")
+        self.db_card.add_field("Aktiv", self.lbl_db_active)
+
+        db_hint = QLabel("Aenderungen werden beim naechsten Programmstart wirksam.")
+        db_hint.setProperty("cssClass", "secondary")
+        db_hint.setWordWrap(True)
+        self.db_card.add_row(db_hint)
+        layout.addWidget(self.db_card)
+
         button_layout = QHBoxLayout()
         button_layout.addStretch()
 
@@ -140,6 +209,33 @@ class SettingsTab(QWidget):
         self.inp_temperature.setValue(preferences.temperature)
         self.inp_max_tokens.setValue(preferences.max_tokens)
 
+        profile = load_database_profile()
+        self.cmb_synchronous.setCurrentIndex(max(self.cmb_synchronous.findData(profile.synchronous.upper()), 0))
+        self.inp_cache_size.setValue(profile.cache_size_mb)
+        self.inp_mmap_size.setValue(profile.mmap_size_mb)
+        self.cmb_temp_store.setCurrentIndex(max(self.cmb_temp_store.findData(profile.temp_store.upper()), 0))
+        self.inp_busy_timeout.setValue(profile.busy_timeout_ms)
+        self.chk_optimize.setChecked(profile.optimize_on_close)
+        self.chk_profile_queries.setChecked(profile.profile_queries)
+        self.inp_slow_query.setValue(profile.slow_query_ms)
+        self.btn_export_profile.setEnabled(self.db is not None and self.db.profiler is not None)
+        self._load_active_pragmas()
+
+    def _load_active_pragmas(self):
+        if self.db is None:
+            self.lbl_db_active.setText("-")
+            return
+        pragmas = self.db.active_pragmas()
+        synchronous = {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"}.get(pragmas["synchronous"], pragmas["synchronous"])
+        temp_store = {0: "DEFAULT", 1: "FILE", 2: "MEMORY"}.get(pragmas["temp_store"], pragmas["temp_store"])
+        cache_size = pragmas["cache_size"]
+        cache_text = f"{-cache_size // 1024} MB" if cache_size < 0 else f"{cache_size} Seiten"
+        self.lbl_db_active.setText(
+            f"{pragmas['journal_mode'].upper()}, synchronous {synchronous}, Cache {cache_text}, "
+            f"mmap {pragmas['mmap_size'] // (1024 * 1024)} MB, temp_store {temp_store}, "
+            f"busy_timeout {pragmas['busy_timeout']} ms"
+        )
+
     def _save_values(self):
         preferences = AIPreferences(
             model_override=self.inp_model_override.text().strip(),
@@ -151,4 +247,38 @@ class SettingsTab(QWidget):
             max_tokens=self.inp_max_tokens.value(),
         )
         save_ai_preferences(preferences)
-        show_success(self, "KI-Einstellungen gespeichert.")
+        save_database_profile(
+            DatabaseProfile(
+                synchronous=self.cmb_synchronous.currentData(),
+                cache_size_mb=self.inp_cache_size.value(),
+                mmap_size_mb=self.inp_mmap_size.value(),
+                temp_store=self.cmb_temp_store.currentData(),
+                busy_timeout_ms=self.inp_busy_timeout.value(),
+                optimize_on_close=self.chk_optimize.isChecked(),
+                profile_queries=self.chk_profile_queries.isChecked(),
+                slow_query_ms=self.inp_slow_query.value(),
+            )
+        )
+        show_success(self, "Einstellungen gespeichert.")
+
+    def _export_query_stats(self):
+        profiler = self.db.profiler if self.db is not None else None
+        if profiler is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "SQL-Statistik speichern",
+            str(Path.home() / "sql_statistik.txt"),
+            "Textdateien (*.txt)",
+        )
+        if not path:
+            return
+        report = profiler.format_report()
+        if profiler.log_path is not None:
+            report += f"\n\nSlow-Log: {profiler.log_path}"
+        try:
+            Path(path).write_text(report + "\n", encoding="utf-8")
+        except OSError as exc:
+            show_error(self, f"Statistik konnte nicht gespeichert werden:\n{exc}")
+            return
+        show_success(self, f"SQL-Statistik gespeichert:\n{path}")
@@ -18,7 +18,7 @@ from db.repos.supplier_repo import SupplierRepo
 from services.ai_config import load_ai_preferences
 from services.ai_prompt_builder import LetterContext
 from ui.ai_workers import GenerateLetterWorker
-from ui.widgets import FormCard, show_error, show_success
+from ui.widgets import FormCard, show_error, show_success, subscribe_master_data
 
 
 class TextAssistantTab(QWidget):
@@ -30,6 +30,9 @@ class TextAssistantTab(QWidget):
         self._ai_thread: QThread | None = None
         self._ai_worker: GenerateLetterWorker | None = None
         self._pending_action = "generate"
+        # Auswahllisten nur nach Aenderungen an den Stammdaten neu aufbauen.
+        self._dropdowns_stale = True
+        subscribe_master_data(db, self, self._on_master_data_changed)
 
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
@@ -204,10 +207,17 @@ class TextAssistantTab(QWidget):
 
     def showEvent(self, event):
         super().showEvent(event)
-        self._refresh_dropdowns()
+        if self._dropdowns_stale:
+            self._refresh_dropdowns()
         self._apply_preferences()
 
+    def _on_master_data_changed(self, _table: str):
+        self._dropdowns_stale = True
+        if self.isVisible():
+            self._refresh_dropdowns()
+
     def _refresh_dropdowns(self):
+        self._dropdowns_stale = False
         current_supplier = self.cmb_supplier.currentData()
         self.cmb_supplier.blockSignals(True)
         self.cmb_supplier.clear()
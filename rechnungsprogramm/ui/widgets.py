@@ -2,10 +2,22 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QComboBox, QDateEdit, QDoubleSpinBox, QSpinBox, QTextEdit,
     QCheckBox, QPushButton, QMessageBox, QGroupBox, QFormLayout,
-    QCalendarWidget, QDialog,
+    QCalendarWidget, QDialog, QStyledItemDelegate, QStyle, QCompleter,
 )
-from PySide6.QtCore import Qt, QDate, QEvent, QRegularExpression
-from PySide6.QtGui import QRegularExpressionValidator
+import threading
+import weakref
+from typing import Any, Callable
+
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QDate, QEvent, QModelIndex, QObject, QRectF,
+    QRegularExpression, QRunnable, QThreadPool, QTimer, Signal, Slot,
+)
+from PySide6.QtGui import QColor, QFont, QPainter, QPen, QRegularExpressionValidator
+
+from db.database import Database
+from db.repos.article_repo import ArticleRepo
+from db.repos.master_data import master_data
+from ui.theme import COLORS
 
 
 class NoScrollSpinBox(QSpinBox):
@@ -187,6 +199,128 @@ class SearchBar(QWidget):
         return self.search_input.text()
 
 
+class _SearchSignals(QObject):
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class _SearchWorker(QRunnable):
+    """Fuehrt eine Suchabfrage auf der Leseverbindung des Worker-Threads aus."""
+
+    def __init__(self, generation: int, db: Database, fetch: Callable[[Database, str], Any], query: str):
+        super().__init__()
+        self.generation = generation
+        self.db = db
+        self.fetch = fetch
+        self.query = query
+        self.signals = _SearchSignals()
+        self._thread_id: int | None = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        if self._thread_id is not None:
+            self.db.interrupt(self._thread_id)
+
+    @Slot()
+    def run(self):
+        self._thread_id = threading.get_ident()
+        try:
+            result = None if self._cancelled else self.fetch(self.db, self.query)
+        except Exception as exc:
+            self.db.rollback()
+            self.signals.failed.emit(self.generation, str(exc))
+        else:
+            self.signals.finished.emit(self.generation, result)
+        finally:
+            self._thread_id = None
+
+
+class SearchController(QObject):
+    """Entprellte Suche, die die Abfrage im Hintergrund ausfuehrt.
+
+    fetch(db, query) laeuft in einem Worker-Thread auf dessen Leseverbindung und darf
+    keine Widgets anfassen. Eine neue Anfrage bricht die vorherige ab; gemeldet wird
+    nur das Ergebnis der juengsten Anfrage.
+    """
+
+    results_ready = Signal(object)
+    failed = Signal(str)
+
+    def __init__(
+        self,
+        db: Database,
+        search_input: QLineEdit,
+        fetch: Callable[[Database, str], Any],
+        delay_ms: int = 250,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.db = db
+        self.search_input = search_input
+        self.fetch = fetch
+        self._generation = 0
+        self._current: _SearchWorker | None = None
+        self._workers: set[_SearchWorker] = set()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.run_now)
+        search_input.textChanged.connect(self.schedule)
+
+    def schedule(self, *_):
+        """Startet die Suche nach Ablauf der Entprellzeit."""
+        self._timer.start()
+
+    def run_now(self):
+        """Startet die Suche sofort mit dem aktuellen Suchtext."""
+        self.cancel()
+        worker = _SearchWorker(
+            self._generation,
+            self.db,
+            self.fetch,
+            self.search_input.text().strip(),
+        )
+        worker.signals.finished.connect(
+            lambda generation, result, w=worker: self._on_finished(w, generation, result)
+        )
+        worker.signals.failed.connect(
+            lambda generation, message, w=worker: self._on_failed(w, generation, message)
+        )
+        self._workers.add(worker)
+        self._current = worker
+        self._pool.start(worker)
+
+    def cancel(self):
+        """Verwirft ausstehende und laufende Anfragen."""
+        self._timer.stop()
+        self._generation += 1
+        worker = self._current
+        self._current = None
+        if worker is None:
+            return
+        if self._pool.tryTake(worker):
+            self._workers.discard(worker)
+        else:
+            worker.cancel()
+
+    def _on_finished(self, worker: _SearchWorker, generation: int, result):
+        self._workers.discard(worker)
+        if generation == self._generation:
+            self._current = None
+            self.results_ready.emit(result)
+
+    def _on_failed(self, worker: _SearchWorker, generation: int, message: str):
+        self._workers.discard(worker)
+        if generation == self._generation:
+            self._current = None
+            self.failed.emit(message)
+
+
 class StatusBadge(QLabel):
     """Farbiges Status-Badge."""
 
@@ -216,6 +350,183 @@ class StatusBadge(QLabel):
         self.style().polish(self)
 
 
+class StatusBadgeDelegate(QStyledItemDelegate):
+    """Zeichnet das Status-Badge direkt in die Zelle statt ein Widget pro Zeile anzulegen.
+
+    Erwartet den Statuswert (z.B. "bezahlt") in der DisplayRole.
+    """
+
+    BADGE_COLORS = {
+        "badge-success": ("#F0FDF4", "#BBF7D0", COLORS["success"]),
+        "badge-warn": ("#FFFBEB", "#FDE68A", COLORS["warn"]),
+        "badge-primary": ("#EEF2FF", "#C7D2FE", COLORS["primary"]),
+    }
+
+    def paint(self, painter: QPainter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        status = index.data(Qt.ItemDataRole.DisplayRole) or ""
+        css_class = StatusBadge.STATUS_CLASSES.get(status, "badge-warn")
+        label = StatusBadge.STATUS_LABELS.get(status, status)
+        background, border, text_color = self.BADGE_COLORS[css_class]
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        font = QFont(option.font)
+        font.setPointSize(9)
+        font.setBold(True)
+        painter.setFont(font)
+
+        text_width = painter.fontMetrics().horizontalAdvance(label)
+        badge_width = min(text_width + 16, option.rect.width() - 8)
+        badge_height = min(painter.fontMetrics().height() + 4, option.rect.height() - 4)
+        badge = QRectF(
+            option.rect.center().x() - badge_width / 2,
+            option.rect.center().y() - badge_height / 2,
+            badge_width,
+            badge_height,
+        )
+        painter.setPen(QPen(QColor(border), 1))
+        painter.setBrush(QColor(background))
+        painter.drawRoundedRect(badge, 4, 4)
+        painter.setPen(QColor(text_color))
+        painter.drawText(badge, Qt.AlignmentFlag.AlignCenter, label)
+        painter.restore()
+
+
+class _MasterDataRelay(QObject):
+    """Reicht Stammdaten-Meldungen an einen Empfaenger in dessen Thread weiter."""
+
+    changed = Signal(str)
+
+    def __init__(self, cache, receiver: QObject, listener: Callable[[str], None]):
+        super().__init__(receiver)
+        self._cache = cache
+        self._listener = listener
+        # AutoConnection: direkt im GUI-Thread, aus Worker-Threads in die Event-Queue.
+        self.changed.connect(self._deliver)
+
+    def notify(self, table: str):
+        try:
+            self.changed.emit(table)
+        except RuntimeError:
+            # Empfaenger wurde zerstoert.
+            self._cache.unsubscribe(self.notify)
+
+    @Slot(str)
+    def _deliver(self, table: str):
+        self._listener(table)
+
+
+def subscribe_master_data(db: Database, receiver: QObject, listener: Callable[[str], None]):
+    """Meldet listener(table) am Stammdaten-Cache an; er laeuft immer im Thread von receiver."""
+    cache = master_data(db)
+    cache.subscribe(_MasterDataRelay(cache, receiver, listener).notify)
+
+
+class ArticleListModel(QAbstractListModel):
+    """Artikelliste, die sich alle Positions-Combos teilen.
+
+    Zeile 0 ist der leere Eintrag fuer Freitext-Positionen. Aenderungen an den
+    Artikeln werden als einzelne Einfuege-/Entfernen-Schritte eingespielt, damit
+    die angehaengten Combos ihre aktuelle Auswahl behalten.
+    """
+
+    def __init__(self, db: Database, parent: QObject | None = None):
+        super().__init__(parent)
+        self.article_repo = ArticleRepo(db)
+        self._rows: list[tuple[int, str]] = [
+            (article.id, article.bezeichnung) for article in self.article_repo.get_all()
+        ]
+        self._index_by_id: dict[int, int] = {}
+        self._reindex()
+        subscribe_master_data(db, self, self._on_master_data_changed)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows) + 1
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        row = index.row()
+        if not index.isValid() or row > len(self._rows):
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._rows[row - 1][1] if row else ""
+        if role == Qt.ItemDataRole.UserRole:
+            return self._rows[row - 1][0] if row else None
+        return None
+
+    def row_for_id(self, article_id: int | None) -> int:
+        """Zeile des Artikels oder -1, ohne die Liste zu durchsuchen."""
+        return self._index_by_id.get(article_id, -1)
+
+    def name_for_id(self, article_id: int | None) -> str:
+        row = self._index_by_id.get(article_id)
+        return self._rows[row - 1][1] if row else ""
+
+    def reload(self):
+        target = [(article.id, article.bezeichnung) for article in self.article_repo.get_all()]
+        wanted = {article_id for article_id, _ in target}
+        for position in reversed(range(len(self._rows))):
+            if self._rows[position][0] not in wanted:
+                self.beginRemoveRows(QModelIndex(), position + 1, position + 1)
+                del self._rows[position]
+                self.endRemoveRows()
+        present = {article_id for article_id, _ in self._rows}
+        added = [entry for entry in target if entry[0] not in present]
+        if added:
+            first = len(self._rows) + 1
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            self._rows.extend(added)
+            self.endInsertRows()
+        if self._rows != target:
+            # Gleiche Zeilenmenge, nur Reihenfolge/Bezeichnung neu.
+            self.layoutAboutToBeChanged.emit()
+            old_ids = [None] + [article_id for article_id, _ in self._rows]
+            new_rows = {article_id: position + 1 for position, (article_id, _) in enumerate(target)}
+            persistent = self.persistentIndexList()
+            self._rows = target
+            self.changePersistentIndexList(
+                persistent,
+                [self.index(new_rows.get(old_ids[index.row()], 0)) for index in persistent],
+            )
+            self.layoutChanged.emit()
+            self.dataChanged.emit(self.index(1), self.index(len(self._rows)))
+        self._reindex()
+
+    def _reindex(self):
+        self._index_by_id = {article_id: position + 1 for position, (article_id, _) in enumerate(self._rows)}
+
+    def _on_master_data_changed(self, table: str):
+        if table == "articles":
+            self.reload()
+
+
+_article_models: "weakref.WeakKeyDictionary[Database, ArticleListModel]" = weakref.WeakKeyDictionary()
+
+
+def shared_article_model(db: Database) -> ArticleListModel:
+    """Das gemeinsame Artikelmodell zu db (nur aus dem UI-Thread aufrufen)."""
+    model = _article_models.get(db)
+    if model is None:
+        model = _article_models[db] = ArticleListModel(db)
+    return model
+
+
+def create_article_combo(model: ArticleListModel) -> QComboBox:
+    """Editierbare Artikel-Combo auf dem gemeinsamen Modell, mit Teilwortsuche."""
+    combo = QComboBox()
+    combo.setEditable(True)
+    combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+    combo.setModel(model)
+    completer = QCompleter(model, combo)
+    completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    completer.setFilterMode(Qt.MatchFlag.MatchContains)
+    completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+    combo.setCompleter(completer)
+    return combo
+
+
 def confirm_delete(parent: QWidget, item_name: str = "diesen Eintrag") -> bool:
     reply = QMessageBox.question(
         parent,
@@ -1,4 +1,8 @@
 from dataclasses import dataclass, field
+from decimal import Decimal
+from fractions import Fraction
+
+from utils.money import from_cents, runde_cent, to_cents
 
 
 @dataclass
@@ -12,58 +16,167 @@ class RechnungsSummen:
     summe_35a: float = 0.0
 
 
+@dataclass
+class RechnungsSummenCent:
+    """Wie RechnungsSummen, alle Betraege in ganzen Cent."""
+
+    netto: int = 0
+    rabatt_betrag: int = 0
+    netto_nach_rabatt: int = 0
+    mwst_details: dict[float, int] = field(default_factory=dict)
+    mwst_gesamt: int = 0
+    brutto: int = 0
+    summe_35a: int = 0
+
+    def in_euro(self) -> RechnungsSummen:
+        return RechnungsSummen(
+            netto=from_cents(self.netto),
+            rabatt_betrag=from_cents(self.rabatt_betrag),
+            netto_nach_rabatt=from_cents(self.netto_nach_rabatt),
+            mwst_details={satz: from_cents(betrag) for satz, betrag in self.mwst_details.items()},
+            mwst_gesamt=from_cents(self.mwst_gesamt),
+            brutto=from_cents(self.brutto),
+            summe_35a=from_cents(self.summe_35a),
+        )
+
+
+def berechne_position_cent(menge: float, einzelpreis_cent: int) -> int:
+    return runde_cent(Decimal(str(menge)) * einzelpreis_cent)
+
+
 def berechne_position(menge: float, einzelpreis: float) -> float:
-    return round(menge * einzelpreis, 2)
+    return from_cents(berechne_position_cent(menge, to_cents(einzelpreis or 0)))
 
 
-def berechne_rechnung(
+def berechne_rechnung_cent(
     positionen: list[dict],
     rabatt_typ: str | None = None,
     rabatt_wert: float = 0.0,
-) -> RechnungsSummen:
+) -> RechnungsSummenCent:
     """
-    Berechnet alle Summen einer Rechnung.
+    Berechnet alle Summen einer Rechnung exakt in ganzen Cent.
 
-    positionen: Liste von dicts mit keys: gesamt_netto, mwst, beguenstigt_35a
+    positionen: Liste von dicts mit keys: gesamt_netto_cent, mwst, beguenstigt_35a
     """
-    summen = RechnungsSummen()
+    netto_je_satz: dict[float, int] = {}
+    for p in positionen:
+        satz = p["mwst"]
+        netto_je_satz[satz] = netto_je_satz.get(satz, 0) + p["gesamt_netto_cent"]
+    summe_35a = sum(p["gesamt_netto_cent"] for p in positionen if p.get("beguenstigt_35a"))
+    return _summen_aus_gruppen(netto_je_satz, summe_35a, rabatt_typ, rabatt_wert)
+
 
-    if not positionen:
+def _summen_aus_gruppen(
+    netto_je_satz: dict[float, int],
+    summe_35a: int,
+    rabatt_typ: str | None,
+    rabatt_wert: float,
+) -> RechnungsSummenCent:
+    summen = RechnungsSummenCent()
+
+    if not netto_je_satz:
         return summen
 
     # Netto gesamt
-    summen.netto = round(sum(p["gesamt_netto"] for p in positionen), 2)
+    summen.netto = sum(netto_je_satz.values())
 
     # Rabatt
     if rabatt_typ == "prozent" and rabatt_wert > 0:
-        summen.rabatt_betrag = round(summen.netto * (rabatt_wert / 100), 2)
+        summen.rabatt_betrag = runde_cent(summen.netto * Decimal(str(rabatt_wert)) / 100)
     elif rabatt_typ == "betrag" and rabatt_wert > 0:
-        summen.rabatt_betrag = round(rabatt_wert, 2)
+        summen.rabatt_betrag = to_cents(rabatt_wert)
 
-    summen.netto_nach_rabatt = round(summen.netto - summen.rabatt_betrag, 2)
+    summen.netto_nach_rabatt = summen.netto - summen.rabatt_betrag
 
     # MwSt nach Satz gruppiert, anteilig nach Rabatt
-    mwst_gruppen: dict[float, float] = {}
-    for p in positionen:
-        satz = p["mwst"]
-        mwst_gruppen[satz] = mwst_gruppen.get(satz, 0.0) + p["gesamt_netto"]
-
-    for satz, summe_satz in mwst_gruppen.items():
+    for satz, summe_satz in netto_je_satz.items():
         if summen.netto > 0:
-            anteil = summe_satz / summen.netto
+            rabatt_anteil = Fraction(summen.rabatt_betrag * summe_satz, summen.netto)
         else:
-            anteil = 0.0
-        netto_nach_rabatt_anteil = summe_satz - summen.rabatt_betrag * anteil
-        mwst_betrag = round(netto_nach_rabatt_anteil * (satz / 100), 2)
+            rabatt_anteil = Fraction(0)
+        netto_nach_rabatt_anteil = summe_satz - rabatt_anteil
+        mwst_betrag = runde_cent(netto_nach_rabatt_anteil * Fraction(Decimal(str(satz))) / 100)
         if satz > 0:
             summen.mwst_details[satz] = mwst_betrag
 
-    summen.mwst_gesamt = round(sum(summen.mwst_details.values()), 2)
-    summen.brutto = round(summen.netto_nach_rabatt + summen.mwst_gesamt, 2)
+    summen.mwst_gesamt = sum(summen.mwst_details.values())
+    summen.brutto = summen.netto_nach_rabatt + summen.mwst_gesamt
 
     # §35a Summe
-    summen.summe_35a = round(
-        sum(p["gesamt_netto"] for p in positionen if p.get("beguenstigt_35a")), 2
-    )
+    summen.summe_35a = summe_35a
 
     return summen
+
+
+def berechne_rechnung(
+    positionen: list[dict],
+    rabatt_typ: str | None = None,
+    rabatt_wert: float = 0.0,
+) -> RechnungsSummen:
+    """
+    Berechnet alle Summen einer Rechnung (Betraege in Euro, intern in Cent).
+
+    positionen: Liste von dicts mit keys: gesamt_netto, mwst, beguenstigt_35a
+    """
+    cent_positionen = [
+        {
+            "gesamt_netto_cent": to_cents(p["gesamt_netto"] or 0),
+            "mwst": p["mwst"],
+            "beguenstigt_35a": p.get("beguenstigt_35a"),
+        }
+        for p in positionen
+    ]
+    return berechne_rechnung_cent(cent_positionen, rabatt_typ, rabatt_wert).in_euro()
+
+
+class LaufendeSummen:
+    """Fortlaufende Summen der Positionen eines Editors.
+
+    Jede Zeile wird unter einem Schluessel gefuehrt; setze() und entferne()
+    verrechnen nur die Differenz dieser Zeile mit den Netto-Gruppen je MwSt-Satz
+    und der §35a-Summe. summen() liefert dasselbe Ergebnis wie berechne_rechnung()
+    ueber alle Zeilen, ohne sie erneut zu durchlaufen.
+    """
+
+    def __init__(self):
+        self._zeilen: dict[object, tuple[int, float, bool]] = {}
+        self._netto_je_satz: dict[float, int] = {}
+        self._anzahl_je_satz: dict[float, int] = {}
+        self._summe_35a = 0
+
+    def __len__(self) -> int:
+        return len(self._zeilen)
+
+    def setze(self, key, gesamt_netto_cent: int, mwst: float, beguenstigt_35a: bool = False):
+        self.entferne(key)
+        self._zeilen[key] = (gesamt_netto_cent, mwst, beguenstigt_35a)
+        self._netto_je_satz[mwst] = self._netto_je_satz.get(mwst, 0) + gesamt_netto_cent
+        self._anzahl_je_satz[mwst] = self._anzahl_je_satz.get(mwst, 0) + 1
+        if beguenstigt_35a:
+            self._summe_35a += gesamt_netto_cent
+
+    def entferne(self, key):
+        zeile = self._zeilen.pop(key, None)
+        if zeile is None:
+            return
+        cent, mwst, beguenstigt_35a = zeile
+        self._netto_je_satz[mwst] -= cent
+        self._anzahl_je_satz[mwst] -= 1
+        if not self._anzahl_je_satz[mwst]:
+            # Satz ohne Zeilen darf keine leere MwSt-Gruppe hinterlassen
+            del self._anzahl_je_satz[mwst]
+            del self._netto_je_satz[mwst]
+        if beguenstigt_35a:
+            self._summe_35a -= cent
+
+    def leeren(self):
+        self._zeilen.clear()
+        self._netto_je_satz.clear()
+        self._anzahl_je_satz.clear()
+        self._summe_35a = 0
+
+    def summen_cent(self, rabatt_typ: str | None = None, rabatt_wert: float = 0.0) -> RechnungsSummenCent:
+        return _summen_aus_gruppen(dict(self._netto_je_satz), self._summe_35a, rabatt_typ, rabatt_wert)
+
+    def summen(self, rabatt_typ: str | None = None, rabatt_wert: float = 0.0) -> RechnungsSummen:
+        return self.summen_cent(rabatt_typ, rabatt_wert).in_euro()
@@ -0,0 +1,43 @@
+from PySide6.QtCore import QSettings
+
+from db.database import DatabaseProfile
+
+
+def _settings() -> QSettings:
+    return QSettings("Rechnungsprogramm", "Rechnungsprogramm")
+
+
+def _int_value(settings: QSettings, key: str, default: int) -> int:
+    try:
+        return int(settings.value(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def load_database_profile() -> DatabaseProfile:
+    settings = _settings()
+    default = DatabaseProfile()
+    optimize = settings.value("database/optimize_on_close", default.optimize_on_close)
+    profile_queries = settings.value("database/profile_queries", default.profile_queries)
+    return DatabaseProfile(
+        synchronous=str(settings.value("database/synchronous", default.synchronous) or default.synchronous),
+        cache_size_mb=_int_value(settings, "database/cache_size_mb", default.cache_size_mb),
+        mmap_size_mb=_int_value(settings, "database/mmap_size_mb", default.mmap_size_mb),
+        temp_store=str(settings.value("database/temp_store", default.temp_store) or default.temp_store),
+        busy_timeout_ms=_int_value(settings, "database/busy_timeout_ms", default.busy_timeout_ms),
+        optimize_on_close=str(optimize).lower() not in ("false", "0", ""),
+        profile_queries=str(profile_queries).lower() not in ("false", "0", ""),
+        slow_query_ms=_int_value(settings, "database/slow_query_ms", default.slow_query_ms),
+    )
+
+
+def save_database_profile(profile: DatabaseProfile):
+    settings = _settings()
+    settings.setValue("database/synchronous", profile.synchronous)
+    settings.setValue("database/cache_size_mb", int(profile.cache_size_mb))
+    settings.setValue("database/mmap_size_mb", int(profile.mmap_size_mb))
+    settings.setValue("database/temp_store", profile.temp_store)
+    settings.setValue("database/busy_timeout_ms", int(profile.busy_timeout_ms))
+    settings.setValue("database/optimize_on_close", bool(profile.optimize_on_close))
+    settings.setValue("database/profile_queries", bool(profile.profile_queries))
+    settings.setValue("database/slow_query_ms", int(profile.slow_query_ms))
@@ -1,5 +1,7 @@
 from datetime import date
 
+from db.database import reserve_counter
+
 
 def _tagesschluessel(datum: date) -> int:
     return int(datum.strftime("%Y%m%d"))
@@ -14,24 +16,5 @@ def naechste_fsnr(db, datum: date | None = None) -> str:
     if datum is None:
         datum = date.today()
 
-    tagesschluessel = _tagesschluessel(datum)
-
-    row = db.execute(
-        "SELECT letzter_zaehler FROM fs_numbers WHERE tagesschluessel = ?", (tagesschluessel,)
-    ).fetchone()
-
-    if row is None:
-        neuer_zaehler = 1
-        db.execute(
-            "INSERT INTO fs_numbers (tagesschluessel, letzter_zaehler) VALUES (?, ?)",
-            (tagesschluessel, neuer_zaehler),
-        )
-    else:
-        neuer_zaehler = row["letzter_zaehler"] + 1
-        db.execute(
-            "UPDATE fs_numbers SET letzter_zaehler = ? WHERE tagesschluessel = ?",
-            (neuer_zaehler, tagesschluessel),
-        )
-
-    db.commit()
-    return format_fsnr(datum, neuer_zaehler)
+    zaehler = reserve_counter(db, "fs_numbers", "tagesschluessel", _tagesschluessel(datum))
+    return format_fsnr(datum, zaehler)
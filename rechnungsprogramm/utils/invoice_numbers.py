@@ -1,5 +1,7 @@
 from datetime import date
 
+from db.database import reserve_counter
+
 
 def _tagesschluessel(rechnungsdatum: date) -> int:
     return int(rechnungsdatum.strftime("%Y%m%d"))
@@ -28,24 +30,5 @@ def naechste_rechnungsnr(db, rechnungsdatum: date | None = None) -> str:
     if rechnungsdatum is None:
         rechnungsdatum = date.today()
 
-    tagesschluessel = _tagesschluessel(rechnungsdatum)
-
-    row = db.execute(
-        "SELECT letzter_zaehler FROM invoice_numbers WHERE jahr = ?", (tagesschluessel,)
-    ).fetchone()
-
-    if row is None:
-        neuer_zaehler = 1
-        db.execute(
-            "INSERT INTO invoice_numbers (jahr, letzter_zaehler) VALUES (?, ?)",
-            (tagesschluessel, neuer_zaehler),
-        )
-    else:
-        neuer_zaehler = row["letzter_zaehler"] + 1
-        db.execute(
-            "UPDATE invoice_numbers SET letzter_zaehler = ? WHERE jahr = ?",
-            (neuer_zaehler, tagesschluessel),
-        )
-
-    db.commit()
-    return format_rechnungsnr(rechnungsdatum, neuer_zaehler)
+    zaehler = reserve_counter(db, "invoice_numbers", "jahr", _tagesschluessel(rechnungsdatum))
+    return format_rechnungsnr(rechnungsdatum, zaehler)
@@ -0,0 +1,36 @@
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+
+
+def runde_cent(betrag: Fraction | Decimal | int) -> int:
+    """Rundet einen Cent-Betrag kaufmaennisch (halbe Cent vom Nullpunkt weg)."""
+    if isinstance(betrag, int):
+        return betrag
+    if isinstance(betrag, Fraction):
+        zaehler, nenner = abs(betrag.numerator), betrag.denominator
+        gerundet = (2 * zaehler + nenner) // (2 * nenner)
+        return gerundet if betrag >= 0 else -gerundet
+    return int(betrag.to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_cents(amount: float | Decimal | None) -> int | None:
+    """Euro-Betrag -> ganze Cent; Floats zaehlen mit ihrer Dezimaldarstellung (0.1 -> 10).
+
+    None (unbekannter Betrag) bleibt None und wird nicht zu 0.
+    """
+    if amount is None:
+        return None
+    return runde_cent(Decimal(str(amount)) * 100)
+
+
+def from_cents(cents: int | None) -> float | None:
+    if cents is None:
+        return None
+    return cents / 100
+
+
+def money_params(*amounts: float | None) -> tuple:
+    """SQL-Parameter fuer REAL- und Cent-Spalten: erst alle Euro-, dann alle Cent-Werte."""
+    cents = tuple(to_cents(amount) for amount in amounts)
+    # NULL bleibt in beiden Spalten NULL.
+    return tuple(from_cents(c) for c in cents) + cents
@@ -0,0 +1,53 @@
+import os
+import sys
+from time import perf_counter
+from typing import TextIO
+
+REPORT_ENV_KEY = "RECHNUNGSPROGRAMM_STARTUP_REPORT"
+BUDGET_ENV_KEY = "RECHNUNGSPROGRAMM_STARTUP_BUDGET_MS"
+DEFAULT_BUDGET_MS = 1500.0
+
+
+def get_startup_budget_ms() -> float:
+    try:
+        return float(os.environ.get(BUDGET_ENV_KEY, DEFAULT_BUDGET_MS))
+    except ValueError:
+        return DEFAULT_BUDGET_MS
+
+
+class StartupTimer:
+    """Misst die Dauer der einzelnen Startphasen bis zum ersten Fenster."""
+
+    def __init__(self):
+        self._start = perf_counter()
+        self._last = self._start
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, label: str):
+        now = perf_counter()
+        self.phases.append((label, (now - self._last) * 1000))
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self._start) * 1000
+
+    def format_report(self, budget_ms: float) -> str:
+        lines = ["Startzeit:"]
+        width = max((len(label) for label, _ in self.phases), default=0)
+        for label, duration in self.phases:
+            lines.append(f"  {label:<{width}}  {duration:8.1f} ms")
+        status = "OK" if self.total_ms <= budget_ms else "UEBERSCHRITTEN"
+        lines.append(f"  {'Gesamt':<{width}}  {self.total_ms:8.1f} ms (Budget {budget_ms:.0f} ms, {status})")
+        return "\n".join(lines)
+
+    def report(self, stream: TextIO | None = None) -> bool:
+        """Gibt den Bericht aus, wenn angefordert oder das Budget ueberschritten ist.
+
+        Liefert True, wenn der Start innerhalb des Budgets lag.
+        """
+        budget_ms = get_startup_budget_ms()
+        within_budget = self.total_ms <= budget_ms
+        if os.environ.get(REPORT_ENV_KEY) or not within_budget:
+            print(self.format_report(budget_ms), file=stream or sys.stderr)
+        return within_budget
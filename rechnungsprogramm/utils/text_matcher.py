@@ -0,0 +1,134 @@
+from collections import deque
+from typing import Hashable, Iterable
+
+
+class TextMatcher:
+    """Aho-Corasick-Automat: findet alle hinterlegten Muster eines Textes in einem Durchlauf.
+
+    Jeder Schluessel (z.B. Rechnungs- oder Kunden-ID) hat eine Menge von Mustern.
+    Aenderungen werden einzeln eingepflegt; die Fehlerverweise werden erst beim
+    naechsten scan() neu berechnet. Gross-/Kleinschreibung spielt keine Rolle.
+    """
+
+    def __init__(self):
+        self._patterns: dict[Hashable, frozenset[str]] = {}
+        self._reset_trie()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._patterns
+
+    def set_patterns(self, key: Hashable, patterns: Iterable[str]):
+        normalized = frozenset(p.lower() for p in patterns if p)
+        if self._patterns.get(key, frozenset()) == normalized:
+            return
+        self.discard(key)
+        if not normalized:
+            return
+        self._patterns[key] = normalized
+        for pattern in normalized:
+            self._outputs[self._insert(pattern)].add(key)
+
+    def discard(self, key: Hashable):
+        patterns = self._patterns.pop(key, None)
+        if not patterns:
+            return
+        for pattern in patterns:
+            self._outputs[self._node_for(pattern)].discard(key)
+        self._stale_patterns += len(patterns)
+        # Verwaiste Knoten sammeln sich an; ab einer gewissen Menge neu aufbauen.
+        if self._stale_patterns > max(64, sum(len(p) for p in self._patterns.values())):
+            self._rebuild()
+
+    def sync(self, patterns_by_key: dict[Hashable, Iterable[str]]):
+        """Gleicht den Automaten mit dem vollstaendigen Sollzustand ab."""
+        for key in [key for key in self._patterns if key not in patterns_by_key]:
+            self.discard(key)
+        for key, patterns in patterns_by_key.items():
+            self.set_patterns(key, patterns)
+
+    def scan(self, text: str) -> set[Hashable]:
+        """Liefert die Schluessel aller Muster, die in text vorkommen."""
+        if self._dirty:
+            self._link()
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        terminal = self._terminal
+        dict_link = self._dict_link
+        found: set[Hashable] = set()
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if terminal[node] else dict_link[node]
+            while match:
+                found.update(outputs[match])
+                match = dict_link[match]
+        return found
+
+    def _reset_trie(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._dict_link: list[int] = [0]
+        self._terminal: list[bool] = [False]
+        self._outputs: list[set[Hashable]] = [set()]
+        self._stale_patterns = 0
+        self._dirty = False
+
+    def _rebuild(self):
+        patterns = self._patterns
+        self._reset_trie()
+        for key, key_patterns in patterns.items():
+            for pattern in key_patterns:
+                self._outputs[self._insert(pattern)].add(key)
+
+    def _insert(self, pattern: str) -> int:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._dict_link.append(0)
+                self._terminal.append(False)
+                self._outputs.append(set())
+                self._goto[node][char] = next_node
+                self._dirty = True
+            node = next_node
+        if not self._terminal[node]:
+            self._terminal[node] = True
+            self._dirty = True
+        return node
+
+    def _node_for(self, pattern: str) -> int:
+        node = 0
+        for char in pattern:
+            node = self._goto[node][char]
+        return node
+
+    def _link(self):
+        goto = self._goto
+        fail = self._fail
+        dict_link = self._dict_link
+        terminal = self._terminal
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            dict_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                target = fail[node]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                target = goto[target].get(char, 0)
+                fail[child] = target
+                dict_link[child] = target if terminal[target] else dict_link[target]
+                queue.append(child)
+        self._dirty = False
@@ -0,0 +1,125 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database
+from db.repos.bank_account_repo import BankAccountRepo
+from db.repos.bank_connection_repo import BankConnectionRepo
+from db.repos.bank_transaction_repo import BankTransactionRepo
+from db.repos.supplier_repo import SupplierRepo
+from models.banking import BankAccount, BankConnection, BankTransaction
+from models.supplier import Supplier
+
+
+class BankTransactionRepoTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+        self.repo = BankTransactionRepo(self.db)
+        supplier_id = SupplierRepo(self.db).create(Supplier(firma="Mitscherling GmbH"))
+        connection = BankConnectionRepo(self.db).save(
+            BankConnection(
+                supplier_id=supplier_id,
+                bank_code_blz="12030000",
+                fints_url="https://bank.example/fints",
+                user_id="user1",
+            )
+        )
+        self.account_id = BankAccountRepo(self.db).save(
+            BankAccount(connection_id=connection.id, iban="DE02120300000000202051")
+        ).id
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def _transaction(self, entry_hash: str, booking_date=None, value_date=None, **kwargs) -> BankTransaction:
+        return BankTransaction(
+            account_id=self.account_id,
+            entry_hash=entry_hash,
+            booking_date=booking_date,
+            value_date=value_date,
+            **kwargs,
+        )
+
+    def test_page_walks_all_transactions_newest_first(self):
+        for number, (booking, value) in enumerate(
+            [
+                (date(2026, 3, 1), None),
+                (date(2026, 3, 1), None),
+                (None, date(2026, 3, 5)),
+                (date(2026, 2, 1), None),
+                (None, None),
+            ]
+        ):
+            self.repo.upsert(self._transaction(f"tx-{number}", booking, value))
+
+        seen = []
+        after = None
+        while True:
+            page = self.repo.page(self.account_id, after=after, limit=2)
+            if not page:
+                break
+            seen.extend(page)
+            last = page[-1]
+            after = (last.booking_date or last.value_date, last.id)
+
+        self.assertEqual([t.id for t in self.repo.get_for_account(self.account_id, limit=None)], [t.id for t in seen])
+        self.assertEqual(["tx-2", "tx-1", "tx-0", "tx-3", "tx-4"], [t.entry_hash for t in seen])
+
+    def test_page_filters_by_status(self):
+        self.repo.upsert(self._transaction("booked", date(2026, 3, 1)))
+        self.repo.upsert(self._transaction("pending", date(2026, 3, 2), status="pending"))
+
+        self.assertEqual(["pending"], [t.entry_hash for t in self.repo.page(self.account_id, status="pending")])
+
+    def test_upsert_many_counts_new_and_known_entries(self):
+        self.repo.upsert(self._transaction("known", date(2026, 3, 1), amount=10.0))
+
+        persisted, imported_count, updated_count = self.repo.upsert_many(
+            [
+                self._transaction("new", date(2026, 3, 2), amount=20.0),
+                self._transaction("known", date(2026, 3, 1), amount=15.0, purpose="korrigiert"),
+                self._transaction("new", date(2026, 3, 2), amount=25.0),
+            ]
+        )
+
+        self.assertEqual((1, 1), (imported_count, updated_count))
+        self.assertEqual(["new", "known", "new"], [t.entry_hash for t in persisted])
+        self.assertEqual(persisted[0].id, persisted[2].id)
+        self.assertEqual(date(2026, 3, 2), persisted[0].booking_date)
+        known = self.repo.get_by_entry_hash("known")
+        self.assertEqual((15.0, "korrigiert"), (known.amount, known.purpose))
+        self.assertEqual(25.0, self.repo.get_by_entry_hash("new").amount)
+        self.assertEqual(2, len(self.repo.get_for_account(self.account_id)))
+
+    def test_upsert_changes_skips_unchanged_entries(self):
+        self.repo.upsert_many(
+            [
+                self._transaction("a", date(2026, 3, 1), amount=10.0),
+                self._transaction("b", date(2026, 3, 2), amount=20.0),
+            ]
+        )
+
+        changes = self.repo.upsert_changes(
+            [
+                self._transaction("a", date(2026, 3, 1), amount=10.0),
+                self._transaction("b", date(2026, 3, 2), amount=20.0, status="pending"),
+                self._transaction("c", date(2026, 3, 3), amount=30.0),
+            ]
+        )
+
+        ids = {t.entry_hash: t.id for t in changes.transactions}
+        self.assertEqual({ids["c"]}, changes.inserted_ids)
+        self.assertEqual({ids["b"]}, changes.updated_ids)
+        self.assertEqual("pending", self.repo.get_by_entry_hash("b").status)
+
+
+if __name__ == "__main__":
+    unittest.main()
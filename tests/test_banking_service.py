@@ -261,6 +261,91 @@ class BankingServiceTests(unittest.TestCase):
 
         self.assertEqual([], suggestions)
 
+    def test_matching_suggests_invoice_number_with_different_amount(self):
+        connection = self._create_connection()
+        account = self.account_repo.save(
+            BankAccount(
+                connection_id=connection.id,
+                iban="DE02120300000000202051",
+                bic="BYLADEM1001",
+                account_number="1234",
+                subaccount="00",
+                display_name="Testkonto",
+                is_default=True,
+            )
+        )
+        invoice = self._create_invoice("RE-1001", 100.0, date(2026, 2, 20))
+        self._create_invoice("RE-1002", 80.0, date(2026, 2, 22))
+        transaction = self.service._normalize_transactions(
+            account,
+            [
+                SimpleNamespace(
+                    data={
+                        "amount": {"amount": "95.00", "currency": "EUR"},
+                        "date": "2026-03-01",
+                        "purpose": "RE-1001 abzgl. Skonto",
+                        "applicant_name": "Muster GmbH",
+                    }
+                )
+            ],
+        )[0]
+        transaction = self.service.transaction_repo.upsert(transaction)[0]
+
+        suggestions = self.service._rebuild_suggestions(connection, account, [transaction])
+
+        self.assertEqual([invoice.id], [s.invoice_id for s in suggestions])
+        self.assertIn("Abweichender Betrag", suggestions[0].reason_text)
+
+    def test_incremental_rebuild_only_rescores_affected_transactions(self):
+        connection = self._create_connection()
+        account = self.account_repo.save(
+            BankAccount(
+                connection_id=connection.id,
+                iban="DE02120300000000202051",
+                display_name="Testkonto",
+                is_default=True,
+            )
+        )
+        self._create_invoice("RE-1001", 100.0, date(2026, 2, 20))
+        self._create_invoice("RE-2001", 250.0, date(2026, 2, 20))
+        raw = [
+            SimpleNamespace(
+                data={
+                    "amount": {"amount": amount, "currency": "EUR"},
+                    "date": "2026-03-01",
+                    "purpose": "Zahlung",
+                }
+            )
+            for amount in ("100.00", "250.00")
+        ]
+        changes = self.service.transaction_repo.upsert_changes(
+            self.service._normalize_transactions(account, raw)
+        )
+        first = self.service._rebuild_suggestions(
+            connection, account, changes.transactions, changed_ids=changes.changed_ids
+        )
+        self.assertEqual(2, len(first))
+
+        changes = self.service.transaction_repo.upsert_changes(
+            self.service._normalize_transactions(account, raw)
+        )
+        self.assertEqual(set(), changes.changed_ids)
+        self.assertEqual(
+            [],
+            self.service._rebuild_suggestions(
+                connection, account, changes.transactions, changed_ids=changes.changed_ids
+            ),
+        )
+        self.assertEqual(2, len(self.service.get_suggestions_for_account(account.id)))
+
+        # Eine zweite Rechnung ueber 100 EUR macht nur den ersten Umsatz mehrdeutig.
+        self._create_invoice("RE-1002", 100.0, date(2026, 2, 21))
+        self.service._rebuild_suggestions(
+            connection, account, changes.transactions, changed_ids=changes.changed_ids
+        )
+        remaining = self.service.get_suggestions_for_account(account.id)
+        self.assertEqual([250.0], [row["amount"] for row in remaining])
+
     def test_matching_ignores_pending_and_rejected_pairs(self):
         connection = self._create_connection()
         account = self.account_repo.save(
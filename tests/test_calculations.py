@@ -0,0 +1,96 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from utils.calculations import (
+    LaufendeSummen, berechne_position, berechne_rechnung, berechne_rechnung_cent,
+)
+from utils.money import from_cents, money_params, to_cents
+
+
+class CalculationTests(unittest.TestCase):
+    def test_position_rounds_half_cent_up(self):
+        self.assertEqual(0.03, berechne_position(0.5, 0.05))
+        self.assertEqual(10.05, berechne_position(3, 3.35))
+
+    def test_unknown_amounts_stay_none(self):
+        self.assertIsNone(to_cents(None))
+        self.assertIsNone(from_cents(None))
+        self.assertEqual((None, 1.5, None, 150), money_params(None, 1.5))
+
+    def test_totals_are_exact_in_cents(self):
+        positionen = [
+            {"gesamt_netto_cent": 10, "mwst": 19.0, "beguenstigt_35a": True},
+            {"gesamt_netto_cent": 20, "mwst": 19.0, "beguenstigt_35a": False},
+            {"gesamt_netto_cent": 50, "mwst": 7.0, "beguenstigt_35a": False},
+        ]
+
+        summen = berechne_rechnung_cent(positionen)
+
+        self.assertEqual(80, summen.netto)
+        # 19 % von 0,30 = 0,057 -> 0,06; 7 % von 0,50 = 0,035 -> 0,04
+        self.assertEqual({19.0: 6, 7.0: 4}, summen.mwst_details)
+        self.assertEqual(90, summen.brutto)
+        self.assertEqual(10, summen.summe_35a)
+
+    def test_discount_is_split_across_tax_rates(self):
+        positionen = [
+            {"gesamt_netto": 100.0, "mwst": 19.0},
+            {"gesamt_netto": 50.0, "mwst": 7.0},
+        ]
+
+        summen = berechne_rechnung(positionen, "prozent", 10)
+
+        self.assertEqual(15.0, summen.rabatt_betrag)
+        self.assertEqual(135.0, summen.netto_nach_rabatt)
+        self.assertEqual({19.0: 17.1, 7.0: 3.15}, summen.mwst_details)
+        self.assertEqual(155.25, summen.brutto)
+        self.assertEqual(
+            to_cents(summen.brutto), to_cents(summen.netto_nach_rabatt) + to_cents(summen.mwst_gesamt)
+        )
+
+    def test_many_small_positions_do_not_drift(self):
+        positionen = [{"gesamt_netto": 0.1, "mwst": 0.0}] * 1000
+
+        summen = berechne_rechnung(positionen, "betrag", 0.3)
+
+        self.assertEqual(100.0, summen.netto)
+        self.assertEqual(99.7, summen.brutto)
+
+    def test_running_totals_match_full_calculation(self):
+        laufend = LaufendeSummen()
+        zeilen = {
+            "a": {"gesamt_netto_cent": 10, "mwst": 19.0, "beguenstigt_35a": True},
+            "b": {"gesamt_netto_cent": 20, "mwst": 19.0, "beguenstigt_35a": False},
+            "c": {"gesamt_netto_cent": 50, "mwst": 7.0, "beguenstigt_35a": False},
+        }
+        for key, p in zeilen.items():
+            laufend.setze(key, p["gesamt_netto_cent"], p["mwst"], p["beguenstigt_35a"])
+
+        zeilen["b"] = {"gesamt_netto_cent": 25, "mwst": 7.0, "beguenstigt_35a": True}
+        laufend.setze("b", 25, 7.0, True)
+        del zeilen["c"]
+        laufend.entferne("c")
+
+        self.assertEqual(2, len(laufend))
+        self.assertEqual(
+            berechne_rechnung_cent(list(zeilen.values()), "prozent", 10),
+            laufend.summen_cent("prozent", 10),
+        )
+        self.assertEqual(35, laufend.summen_cent().summe_35a)
+
+    def test_running_totals_drop_empty_tax_rates(self):
+        laufend = LaufendeSummen()
+        laufend.setze(1, 100, 19.0)
+        laufend.setze(1, 100, 7.0)
+
+        self.assertEqual({7.0: 7}, laufend.summen_cent().mwst_details)
+
+        laufend.leeren()
+        self.assertEqual(berechne_rechnung_cent([]), laufend.summen_cent())
+
+
+if __name__ == "__main__":
+    unittest.main()
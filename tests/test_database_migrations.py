@@ -3,11 +3,20 @@ import sqlite3
 import sys
 import tempfile
 import unittest
+from datetime import date
 from pathlib import Path
+from unittest import mock
 
 sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
 
-from db.database import Database
+import db.database as database
+from db.database import MIGRATIONS, Database, Migration
+from db.repos.customer_repo import CustomerRepo
+from db.repos.invoice_repo import InvoiceRepo
+from db.repos.supplier_repo import SupplierRepo
+from models.customer import Customer
+from models.invoice import Invoice
+from models.supplier import Supplier
 
 
 class DatabaseMigrationTests(unittest.TestCase):
@@ -89,5 +98,138 @@ class DatabaseMigrationTests(unittest.TestCase):
             db.close()
 
 
+
+class VersionedMigrationTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "test.db"
+        self.db = Database(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def _user_version(self) -> int:
+        return self.db.execute("PRAGMA user_version").fetchone()[0]
+
+    def _reopen(self):
+        self.db.close()
+        self.db = Database(self.db_path)
+
+    def test_new_database_reaches_latest_version(self):
+        self.db.initialize()
+
+        self.assertEqual(MIGRATIONS[-1].version, self._user_version())
+        self.assertEqual(list(range(1, len(MIGRATIONS) + 1)), [m.version for m in MIGRATIONS])
+
+    def test_up_to_date_database_only_reads_user_version(self):
+        self.db.initialize()
+        self._reopen()
+        statements = []
+        original = Database._open_connection
+
+        def traced(db):
+            conn = original(db)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        with mock.patch.object(Database, "_open_connection", traced):
+            self.db.initialize()
+
+        self.assertEqual(["PRAGMA user_version"], statements)
+
+    def test_legacy_database_without_user_version_is_upgraded(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "CREATE TABLE customers (id INTEGER PRIMARY KEY AUTOINCREMENT, anrede TEXT, titel TEXT, "
+            "vorname TEXT, nachname TEXT, firma TEXT, strasse TEXT, plz TEXT, ort TEXT, "
+            "email TEXT, telefon TEXT, created_at TIMESTAMP, updated_at TIMESTAMP)"
+        )
+        conn.execute("INSERT INTO customers (vorname, nachname) VALUES ('Jürgen', 'Alt')")
+        conn.commit()
+        conn.close()
+
+        self.db.initialize()
+
+        self.assertEqual(MIGRATIONS[-1].version, self._user_version())
+        self.assertEqual([1], [c.id for c in CustomerRepo(self.db).search("jür")])
+        self.assertIn("notizen", {row[1] for row in self.db.execute("PRAGMA table_info(customers)")})
+
+    def test_failed_migration_rolls_back_and_keeps_version(self):
+        self.db.initialize()
+
+        def broken(conn):
+            conn.execute("CREATE TABLE halbfertig (id INTEGER)")
+            raise sqlite3.OperationalError("kaputt")
+
+        failing = Migration(MIGRATIONS[-1].version + 1, "Fehlerhaft", apply=broken)
+        with mock.patch.object(database, "MIGRATIONS", MIGRATIONS + (failing,)):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.db.initialize()
+
+        self.assertEqual(MIGRATIONS[-1].version, self._user_version())
+        self.assertIsNone(
+            self.db.execute("SELECT name FROM sqlite_master WHERE name = 'halbfertig'").fetchone()
+        )
+        # Schreibverbindung ist wieder frei
+        self.db.execute("CREATE TABLE danach (id INTEGER)")
+        self.db.commit()
+
+    def test_backfill_runs_in_batches_across_id_gaps(self):
+        self.db.initialize()
+        supplier_id = SupplierRepo(self.db).create(Supplier(firma="Mitscherling GmbH"))
+        customer_id = CustomerRepo(self.db).create(Customer(nachname="Muster"))
+        invoice_repo = InvoiceRepo(self.db)
+        for number in range(7):
+            invoice_repo.create(
+                Invoice(
+                    supplier_id=supplier_id,
+                    customer_id=customer_id,
+                    rechnungsnr=f"RE-{number}",
+                    datum=date(2026, 1, 1),
+                    betreff="Dachrinne",
+                )
+            )
+        self.db.execute("DELETE FROM invoices WHERE rechnungsnr IN ('RE-2', 'RE-3', 'RE-4')")
+        self.db.execute("DELETE FROM invoices_fts")
+        self.db.execute("PRAGMA user_version = 2")
+        self.db.commit()
+
+        with mock.patch.object(database, "BACKFILL_BATCH_SIZE", 2):
+            self.db.initialize()
+
+        found = sorted(i.rechnungsnr for i in InvoiceRepo(self.db).search("dach"))
+        self.assertEqual(["RE-0", "RE-1", "RE-5", "RE-6"], found)
+
+
+    def test_cent_columns_are_filled_from_real_amounts(self):
+        self.db.initialize()
+        supplier_id = SupplierRepo(self.db).create(Supplier(firma="Mitscherling GmbH"))
+        customer_id = CustomerRepo(self.db).create(Customer(nachname="Muster"))
+        invoice_id = InvoiceRepo(self.db).create(
+            Invoice(
+                supplier_id=supplier_id,
+                customer_id=customer_id,
+                rechnungsnr="RE-ALT",
+                datum=date(2026, 1, 1),
+            )
+        )
+        # Stand vor den Cent-Spalten: nur die REAL-Betraege sind gefuellt.
+        self.db.execute(
+            "UPDATE invoices SET netto = 1.15, mwst_betrag = 0.22, brutto = 1.37, "
+            "netto_cent = NULL, mwst_betrag_cent = NULL, brutto_cent = NULL"
+        )
+        self.db.execute("PRAGMA user_version = 4")
+        self.db.commit()
+
+        self.db.initialize()
+
+        row = self.db.execute(
+            "SELECT netto_cent, mwst_betrag_cent, brutto_cent FROM invoices WHERE id = ?", (invoice_id,)
+        ).fetchone()
+        self.assertEqual((115, 22, 137), tuple(row))
+        self.assertEqual(1.37, InvoiceRepo(self.db).get_by_id(invoice_id).brutto)
+
+
 if __name__ == "__main__":
     unittest.main()
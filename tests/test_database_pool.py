@@ -0,0 +1,172 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database, DatabaseBusyError, DatabaseProfile
+from db.repos.customer_repo import CustomerRepo
+from models.customer import Customer
+
+
+class DatabasePoolTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+        self.repo = CustomerRepo(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def _in_thread(self, func):
+        result = {}
+
+        def run():
+            try:
+                result["value"] = func()
+            except Exception as exc:
+                result["error"] = exc
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+    def _first_nachname(self) -> str:
+        return self.db.execute("SELECT nachname FROM customers ORDER BY id").fetchone()[0]
+
+    def test_reads_in_other_threads_see_committed_state_during_write(self):
+        self.repo.create(Customer(nachname="Alt"))
+        self.db.execute("UPDATE customers SET nachname = 'Neu'")
+
+        seen_by_worker = self._in_thread(self._first_nachname)
+        seen_by_writer = self._first_nachname()
+        self.db.commit()
+
+        self.assertEqual("Alt", seen_by_worker)
+        self.assertEqual("Neu", seen_by_writer)
+        self.assertEqual("Neu", self._in_thread(self._first_nachname))
+        self.assertIsNot(self.db.reader, self._in_thread(lambda: self.db.reader))
+
+    def test_writing_cte_runs_on_writer(self):
+        self.db.execute("WITH n(x) AS (SELECT count(*) FROM customers) SELECT x FROM n").fetchone()
+        self.assertIsNone(self.db._write_owner)
+
+        self.db.execute(
+            "WITH neu(name) AS (VALUES ('Mit CTE')) INSERT INTO customers (nachname) SELECT name FROM neu"
+        )
+
+        self.assertEqual(threading.get_ident(), self.db._write_owner)
+        self.db.commit()
+        self.assertIsNone(self.db._write_owner)
+        self.assertEqual(["Mit CTE"], [c.nachname for c in self._in_thread(self.repo.get_all)])
+
+    def test_writes_from_several_threads_are_serialized(self):
+        def create_many(prefix):
+            for number in range(25):
+                self.repo.create(Customer(nachname=f"{prefix}-{number}"))
+
+        threads = [threading.Thread(target=create_many, args=(f"T{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(100, len(self.repo.get_all()))
+
+    def test_rollback_releases_writer_for_other_threads(self):
+        self.db.execute("INSERT INTO customers (nachname) VALUES ('Verworfen')")
+        self.db.rollback()
+
+        self._in_thread(lambda: self.repo.create(Customer(nachname="Worker")))
+
+        self.assertEqual(["Worker"], [c.nachname for c in self.repo.get_all()])
+
+    def test_transaction_commits_nested_repo_calls_once(self):
+        with self.db.transaction():
+            self.repo.create(Customer(nachname="Erster"))
+            self.repo.create(Customer(nachname="Zweiter"))
+            seen_by_worker = self._in_thread(lambda: len(self.repo.get_all()))
+
+        self.assertEqual(0, seen_by_worker)
+        self.assertEqual(2, self._in_thread(lambda: len(self.repo.get_all())))
+
+    def test_transaction_rolls_back_everything_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.repo.create(Customer(nachname="Verworfen"))
+                raise RuntimeError("Abbruch")
+
+        self._in_thread(lambda: self.repo.create(Customer(nachname="Worker")))
+        self.assertEqual(["Worker"], [c.nachname for c in self.repo.get_all()])
+
+    def test_failed_nested_unit_only_discards_its_own_writes(self):
+        with self.db.transaction():
+            self.repo.create(Customer(nachname="Bleibt"))
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    self.repo.create(Customer(nachname="Verworfen"))
+                    raise RuntimeError("Abbruch")
+            self.repo.create(Customer(nachname="Auch"))
+
+        self.assertEqual(["Auch", "Bleibt"], [c.nachname for c in self.repo.get_all()])
+
+    def test_waiting_for_busy_writer_times_out(self):
+        db = Database(Path(self.temp_dir.name) / "busy.db", DatabaseProfile(busy_timeout_ms=50))
+        db.initialize()
+        started = threading.Event()
+        release = threading.Event()
+
+        def hold_writer():
+            with db.transaction():
+                started.set()
+                release.wait(5)
+
+        worker = threading.Thread(target=hold_writer)
+        worker.start()
+        try:
+            started.wait(5)
+            with self.assertRaises(DatabaseBusyError):
+                CustomerRepo(db).create(Customer(nachname="Wartet"))
+        finally:
+            release.set()
+            worker.join(5)
+        CustomerRepo(db).create(Customer(nachname="Danach"))
+        self.assertEqual(["Danach"], [c.nachname for c in CustomerRepo(db).get_all()])
+        db.close()
+
+    def test_reader_of_finished_thread_is_closed(self):
+        conn = self._in_thread(lambda: self.db.reader)
+
+        self.assertNotIn(conn, self.db._readers.values())
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    def test_profile_pragmas_apply_to_reader_and_writer(self):
+        profile = DatabaseProfile(synchronous="FULL", cache_size_mb=8, mmap_size_mb=0, busy_timeout_ms=1234)
+        db = Database(Path(self.temp_dir.name) / "profile.db", profile)
+        db.initialize()
+        try:
+            reader = self._in_thread(db.active_pragmas)
+            writer = db.active_pragmas()
+        finally:
+            db.close()
+
+        for pragmas in (reader, writer):
+            self.assertEqual(2, pragmas["synchronous"])
+            self.assertEqual(-8 * 1024, pragmas["cache_size"])
+            self.assertEqual(2, pragmas["temp_store"])
+            self.assertEqual(1234, pragmas["busy_timeout"])
+
+
+if __name__ == "__main__":
+    unittest.main()
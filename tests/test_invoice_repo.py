@@ -0,0 +1,225 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database
+from db.repos.customer_repo import CustomerRepo
+from db.repos.invoice_repo import InvoiceRepo
+from db.repos.supplier_repo import SupplierRepo
+from models.customer import Customer
+from models.enums import InvoiceStatus
+from models.invoice import Invoice, InvoiceLine
+from models.supplier import Supplier
+
+
+class InvoiceRepoTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+        self.invoice_repo = InvoiceRepo(self.db)
+        self.supplier_id = SupplierRepo(self.db).create(Supplier(firma="Mitscherling GmbH"))
+        customer_repo = CustomerRepo(self.db)
+        self.customer_id = customer_repo.create(Customer(vorname="Max", nachname="Muster"))
+        self.company_id = customer_repo.create(Customer(firma="Bau AG"))
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def _create_invoice(self, number: str, invoice_date: date, customer_id: int, **kwargs) -> int:
+        return self.invoice_repo.create(
+            Invoice(
+                supplier_id=self.supplier_id,
+                customer_id=customer_id,
+                rechnungsnr=number,
+                datum=invoice_date,
+                **kwargs,
+            )
+        )
+
+    def test_list_overview_joins_customer_name_and_sorts_newest_first(self):
+        self._create_invoice("RE-1", date(2026, 1, 10), self.customer_id, brutto=119.0)
+        self._create_invoice("RE-2", date(2026, 2, 10), self.company_id, betreff="Dach")
+
+        rows = self.invoice_repo.list_overview()
+
+        self.assertEqual(["RE-2", "RE-1"], [row.rechnungsnr for row in rows])
+        self.assertEqual("Bau AG", rows[0].kunde_name)
+        self.assertEqual("Max Muster", rows[1].kunde_name)
+        self.assertEqual(date(2026, 1, 10), rows[1].datum)
+        self.assertEqual(119.0, rows[1].brutto)
+
+    def test_list_overview_filters_by_status_and_query(self):
+        self._create_invoice(
+            "RE-1", date(2026, 1, 10), self.customer_id, status=InvoiceStatus.BEZAHLT.value
+        )
+        self._create_invoice("RE-2", date(2026, 2, 10), self.company_id, betreff="Dachrinne")
+        self._create_invoice("RE-3", date(2026, 3, 10), self.customer_id, betreff="Dachfenster")
+
+        paid = self.invoice_repo.list_overview(status=InvoiceStatus.BEZAHLT.value)
+        matching = self.invoice_repo.list_overview(query="Dach")
+        combined = self.invoice_repo.list_overview(status=InvoiceStatus.ENTWURF.value, query="Muster")
+
+        self.assertEqual(["RE-1"], [row.rechnungsnr for row in paid])
+        self.assertEqual(["RE-3", "RE-2"], [row.rechnungsnr for row in matching])
+        self.assertEqual(["RE-3"], [row.rechnungsnr for row in combined])
+
+    def test_list_overview_keeps_unknown_amount_as_none(self):
+        invoice_id = self._create_invoice("RE-1", date(2026, 1, 10), self.customer_id, brutto=None)
+
+        self.assertIsNone(self.invoice_repo.list_overview()[0].brutto)
+        self.assertIsNone(self.invoice_repo.get_by_id(invoice_id).brutto)
+
+    def test_list_overview_loads_windows_after_last_row(self):
+        for number, day in enumerate((1, 1, 2, 3, 3), start=1):
+            self._create_invoice(f"RE-{number}", date(2026, 1, day), self.customer_id)
+
+        first = self.invoice_repo.list_overview(limit=2)
+        second = self.invoice_repo.list_overview(after=(first[-1].datum, first[-1].id), limit=2)
+        third = self.invoice_repo.list_overview(after=(second[-1].datum, second[-1].id), limit=2)
+
+        paged_ids = [row.id for row in first + second + third]
+        self.assertEqual([row.id for row in self.invoice_repo.list_overview()], paged_ids)
+        self.assertEqual(1, len(third))
+
+    def test_page_returns_invoices_after_cursor(self):
+        for number, day in enumerate((1, 1, 2), start=1):
+            self._create_invoice(f"RE-{number}", date(2026, 1, day), self.customer_id)
+        self._create_invoice("RE-4", date(2026, 1, 1), self.company_id)
+
+        first = self.invoice_repo.page(limit=2)
+        rest = self.invoice_repo.page(after=(first[-1].datum, first[-1].id), limit=10)
+        company = self.invoice_repo.page(customer_id=self.company_id)
+
+        self.assertEqual(["RE-3", "RE-4"], [inv.rechnungsnr for inv in first])
+        self.assertEqual(["RE-2", "RE-1"], [inv.rechnungsnr for inv in rest])
+        self.assertEqual(["RE-4"], [inv.rechnungsnr for inv in company])
+
+    def test_amounts_are_stored_as_cents(self):
+        invoice_id = self._create_invoice(
+            "RE-1",
+            date(2026, 1, 10),
+            self.customer_id,
+            netto=0.1 + 0.2,
+            mwst_betrag=0.06,
+            brutto=0.36,
+            positionen=[InvoiceLine(position=1, beschreibung="Schraube", menge=3, einzelpreis=0.1)],
+        )
+
+        row = self.invoice_repo.db.execute(
+            "SELECT netto_cent, brutto_cent FROM invoices WHERE id = ?", (invoice_id,)
+        ).fetchone()
+        line_row = self.invoice_repo.db.execute(
+            "SELECT einzelpreis_cent, gesamt_netto_cent FROM invoice_lines WHERE invoice_id = ?",
+            (invoice_id,),
+        ).fetchone()
+        invoice = self.invoice_repo.get_by_id(invoice_id)
+
+        self.assertEqual((30, 36), tuple(row))
+        self.assertEqual((10, 30), tuple(line_row))
+        self.assertEqual(0.3, invoice.netto)
+        self.assertEqual(0.3, invoice.positionen[0].gesamt_netto)
+        self.assertEqual(0.36, self.invoice_repo.list_overview()[0].brutto)
+
+    def _log_line_writes(self):
+        self.invoice_repo.db.execute("CREATE TABLE line_log (op TEXT, line_id INTEGER)")
+        for op, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            self.invoice_repo.db.execute(
+                f"""CREATE TRIGGER log_{op.lower()} AFTER {op} ON invoice_lines BEGIN
+                    INSERT INTO line_log VALUES ('{op}', {ref}.id); END"""
+            )
+        self.invoice_repo.db.commit()
+
+    def _line_writes(self) -> list[tuple[str, int]]:
+        rows = self.invoice_repo.db.execute("SELECT op, line_id FROM line_log ORDER BY rowid")
+        return [tuple(row) for row in rows]
+
+    def test_update_writes_only_changed_lines(self):
+        lines = [InvoiceLine(position=i, beschreibung=f"Pos {i}", einzelpreis=float(i)) for i in range(1, 151)]
+        invoice_id = self._create_invoice("RE-1", date(2026, 1, 10), self.customer_id, positionen=lines)
+        self._log_line_writes()
+
+        invoice = self.invoice_repo.get_by_id(invoice_id)
+        invoice.positionen[41].einzelpreis = 99.5
+        self.invoice_repo.update(invoice)
+
+        self.assertEqual([("UPDATE", invoice.positionen[41].id)], self._line_writes())
+        self.assertEqual(99.5, self.invoice_repo.get_by_id(invoice_id).positionen[41].einzelpreis)
+
+    def test_update_inserts_new_and_deletes_removed_lines(self):
+        lines = [InvoiceLine(position=i, beschreibung=f"Pos {i}") for i in (1, 2)]
+        invoice_id = self._create_invoice("RE-1", date(2026, 1, 10), self.customer_id, positionen=lines)
+        self._log_line_writes()
+
+        invoice = self.invoice_repo.get_by_id(invoice_id)
+        removed = invoice.positionen.pop()
+        invoice.positionen.append(InvoiceLine(position=2, beschreibung="Neu"))
+        invoice.positionen.append(InvoiceLine(position=3, beschreibung="Noch neu"))
+        self.invoice_repo.update(invoice)
+
+        stored = self.invoice_repo.get_by_id(invoice_id).positionen
+        self.assertEqual(["Pos 1", "Neu", "Noch neu"], [line.beschreibung for line in stored])
+        self.assertEqual([line.id for line in stored], [line.id for line in invoice.positionen])
+        self.assertEqual(
+            [("DELETE", removed.id), ("INSERT", stored[1].id), ("INSERT", stored[2].id)],
+            self._line_writes(),
+        )
+
+    def _traced_reads(self, fetch):
+        statements: list[str] = []
+        reader = self.invoice_repo.db.reader
+        reader.set_trace_callback(statements.append)
+        try:
+            return fetch(), statements
+        finally:
+            reader.set_trace_callback(None)
+
+    def test_get_many_loads_lines_in_one_query_and_keeps_order(self):
+        ids = [
+            self._create_invoice(
+                f"RE-{n}",
+                date(2026, 1, 10),
+                self.customer_id,
+                positionen=[InvoiceLine(position=p, beschreibung=f"{n}-{p}") for p in (2, 1)],
+            )
+            for n in range(3)
+        ]
+
+        invoices, statements = self._traced_reads(
+            lambda: self.invoice_repo.get_many([ids[2], 999, ids[0], ids[2]])
+        )
+
+        self.assertEqual([ids[2], ids[0]], [inv.id for inv in invoices])
+        self.assertEqual(["2-1", "2-2"], [line.beschreibung for line in invoices[0].positionen])
+        self.assertEqual(["0-1", "0-2"], [line.beschreibung for line in invoices[1].positionen])
+        self.assertEqual(2, len(statements))
+
+    def test_get_many_splits_large_batches(self):
+        db = self.invoice_repo.db
+        db.executemany(
+            "INSERT INTO invoices (supplier_id, customer_id, rechnungsnr, datum) VALUES (?, ?, ?, '2026-01-10')",
+            [(self.supplier_id, self.customer_id, f"RE-{n}") for n in range(520)],
+        )
+        db.execute(
+            """INSERT INTO invoice_lines (invoice_id, position, beschreibung, menge, einzelpreis, mwst)
+               SELECT id, 1, rechnungsnr, 1, 0, 19 FROM invoices"""
+        )
+        db.commit()
+        ids = [row[0] for row in db.execute("SELECT id FROM invoices ORDER BY id")]
+
+        invoices, statements = self._traced_reads(lambda: self.invoice_repo.get_many(ids))
+
+        self.assertEqual(ids, [inv.id for inv in invoices])
+        self.assertEqual([inv.rechnungsnr for inv in invoices], [inv.positionen[0].beschreibung for inv in invoices])
+        self.assertEqual(4, len(statements))
+        self.assertEqual([], self.invoice_repo.get_many(ids[:3], with_lines=False)[0].positionen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database
+from db.repos.article_repo import ArticleRepo
+from db.repos.customer_repo import CustomerRepo
+from db.repos.master_data import master_data
+from models.article import Article
+from models.customer import Customer
+
+
+class MasterDataCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+        self.repo = CustomerRepo(self.db)
+        self.changes: list[str] = []
+        master_data(self.db).subscribe(self.changes.append)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_reads_are_served_from_cache_after_first_load(self):
+        customer_id = self.repo.create(Customer(nachname="Muster"))
+        self.assertEqual(["Muster"], [c.nachname for c in self.repo.get_all()])
+
+        self.db.execute("UPDATE customers SET nachname = 'Direkt'")
+        self.db.commit()
+
+        self.assertEqual("Muster", CustomerRepo(self.db).get_by_id(customer_id).nachname)
+
+    def test_repo_writes_update_cache_in_order_and_notify(self):
+        self.repo.create(Customer(nachname="Meier"))
+        self.repo.get_all()
+        customer_id = self.repo.create(Customer(nachname="Albers"))
+        customer = self.repo.get_by_id(customer_id)
+        customer.nachname = "Zander"
+        self.repo.update(customer)
+
+        self.assertEqual(["Meier", "Zander"], [c.nachname for c in self.repo.get_all()])
+        self.assertIsNotNone(self.repo.get_by_id(customer_id).updated_at)
+
+        self.repo.delete(customer_id)
+
+        self.assertIsNone(self.repo.get_by_id(customer_id))
+        self.assertEqual(["customers"] * 4, self.changes)
+
+    def test_returned_models_are_copies(self):
+        article_repo = ArticleRepo(self.db)
+        article_id = article_repo.create(Article(bezeichnung="Dachrinne", preis=12.5))
+
+        article_repo.get_by_id(article_id).preis = 99.0
+
+        self.assertEqual(12.5, article_repo.get_all()[0].preis)
+
+    def test_rolled_back_writes_leave_cache_untouched(self):
+        self.repo.get_all()
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.repo.create(Customer(nachname="Verworfen"))
+                raise RuntimeError("Abbruch")
+
+        self.assertEqual([], self.repo.get_all())
+        self.assertEqual([], self.changes)
+
+
+if __name__ == "__main__":
+    unittest.main()
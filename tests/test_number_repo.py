@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database
+from db.repos.number_repo import NumberRepo
+from utils.fs_numbers import naechste_fsnr
+from utils.kv_numbers import naechste_kvnr
+
+
+class NumberRepoTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+        self.repo = NumberRepo(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_numbers_count_up_per_day(self):
+        tag = date(2026, 3, 1)
+
+        self.assertEqual("RE-2026-0301-001", self.repo.naechste_nummer(tag))
+        self.assertEqual("RE-2026-0301-002", self.repo.naechste_nummer(tag))
+        self.assertEqual("RE-2026-0302-001", self.repo.naechste_nummer(date(2026, 3, 2)))
+        self.assertEqual(2, self.repo.aktueller_zaehler(tag))
+
+    def test_reserves_contiguous_block(self):
+        tag = date(2026, 3, 1)
+        self.repo.naechste_nummer(tag)
+
+        block = self.repo.reserviere_nummern(1000, tag)
+
+        self.assertEqual(1000, len(block))
+        self.assertEqual("RE-2026-0301-002", block[0])
+        self.assertEqual("RE-2026-0301-1001", block[-1])
+        self.assertEqual("RE-2026-0301-1002", self.repo.naechste_nummer(tag))
+
+    def test_kv_and_fs_numbers_use_their_own_counters(self):
+        tag = date(2026, 3, 1)
+        self.repo.naechste_nummer(tag)
+
+        self.assertEqual("KV-2026-0301-001", naechste_kvnr(self.db, tag))
+        self.assertEqual("FS-2026-0301-001", naechste_fsnr(self.db, tag))
+        self.assertEqual("KV-2026-0301-002", naechste_kvnr(self.db, tag))
+
+    def test_concurrent_allocation_never_hands_out_a_number_twice(self):
+        tag = date(2026, 3, 1)
+        numbers: list[str] = []
+        lock = threading.Lock()
+
+        def allocate():
+            for _ in range(50):
+                nummer = self.repo.naechste_nummer(tag)
+                with lock:
+                    numbers.append(nummer)
+
+        threads = [threading.Thread(target=allocate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(200, len(set(numbers)))
+        self.assertEqual(200, self.repo.aktueller_zaehler(tag))
+
+
+if __name__ == "__main__":
+    unittest.main()
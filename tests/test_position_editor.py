@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from db.database import Database
+from ui.invoices import InvoicesTab
+from ui.kostenvoranschlaege import KostenvoranschlaegeTab
+
+
+class PositionEditorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_removing_a_row_shrinks_the_table(self):
+        for tab_class in (InvoicesTab, KostenvoranschlaegeTab):
+            with self.subTest(tab=tab_class.__name__):
+                tab = tab_class(self.db)
+                # Erst ab einigen Zeilen liegt die Hoehe ueber dem Minimum von 200.
+                for _ in range(5):
+                    tab._add_position_row()
+                full_height = tab.pos_table.height()
+
+                tab.pos_model.removeRows(0)
+
+                self.assertEqual(4, tab.pos_model.rowCount())
+                self.assertLess(tab.pos_table.height(), full_height)
+                tab.deleteLater()
+
+
+if __name__ == "__main__":
+    unittest.main()
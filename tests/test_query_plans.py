@@ -0,0 +1,104 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database
+from db.repos.bank_match_repo import BankMatchRepo
+from db.repos.bank_transaction_repo import BankTransactionRepo
+from db.repos.customer_repo import CustomerRepo
+from db.repos.fs_repo import FSRepo
+from db.repos.invoice_repo import InvoiceRepo
+from db.repos.kv_repo import KVRepo
+from db.repos.supplier_repo import SupplierRepo
+from models.customer import Customer
+from models.invoice import Invoice, InvoiceLine
+from models.kostenvoranschlag import Kostenvoranschlag, KVLine
+from models.supplier import Supplier
+
+
+class QueryPlanTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+        supplier_id = SupplierRepo(self.db).create(Supplier(firma="Mitscherling GmbH"))
+        self.customer_id = CustomerRepo(self.db).create(Customer(nachname="Muster"))
+        self.invoice_id = InvoiceRepo(self.db).create(
+            Invoice(
+                supplier_id=supplier_id,
+                customer_id=self.customer_id,
+                rechnungsnr="RE-1",
+                datum=date(2026, 1, 10),
+                positionen=[InvoiceLine(position=1, beschreibung="Dach")],
+            )
+        )
+        self.kv_id = KVRepo(self.db).create(
+            Kostenvoranschlag(
+                supplier_id=supplier_id,
+                customer_id=self.customer_id,
+                kvnr="KV-1",
+                datum=date(2026, 1, 10),
+                positionen=[KVLine(position=1, beschreibung="Rinne")],
+            )
+        )
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def _plans(self, fetch) -> dict[str, list[str]]:
+        statements: list[str] = []
+        reader = self.db.reader
+        reader.set_trace_callback(statements.append)
+        try:
+            fetch()
+        finally:
+            reader.set_trace_callback(None)
+        return {
+            sql: [row[3] for row in reader.execute("EXPLAIN QUERY PLAN " + sql)]
+            for sql in statements
+        }
+
+    def test_hot_queries_need_no_temp_sort(self):
+        invoices = InvoiceRepo(self.db)
+        kvs = KVRepo(self.db)
+        letters = FSRepo(self.db)
+        transactions = BankTransactionRepo(self.db)
+        after = (date(2026, 2, 1), 10)
+        hot_queries = {
+            "invoices.get_all": invoices.get_all,
+            "invoices.page": lambda: invoices.page(after=after),
+            "invoices.page status": lambda: invoices.page(status="versendet", after=after),
+            "invoices.page customer": lambda: invoices.page(customer_id=self.customer_id),
+            "invoices.list_overview status": lambda: invoices.list_overview(status="bezahlt"),
+            "invoices.get_matchable_invoices": lambda: invoices.get_matchable_invoices(1),
+            "invoices.get_many": lambda: invoices.get_many([self.invoice_id]),
+            "kvs.page status": lambda: kvs.page(status="offen", after=after),
+            "kvs.page customer": lambda: kvs.page(customer_id=self.customer_id),
+            "kvs.get_many": lambda: kvs.get_many([self.kv_id]),
+            "letters.page status": lambda: letters.page(status="entwurf"),
+            "letters.page customer": lambda: letters.page(customer_id=self.customer_id),
+            "transactions.page": lambda: transactions.page(1, after=(None, 10), status="booked"),
+            "matches.list_suggestions_for_account": (
+                lambda: BankMatchRepo(self.db).list_suggestions_for_account(1)
+            ),
+        }
+
+        for name, fetch in hot_queries.items():
+            plans = self._plans(fetch)
+            self.assertTrue(plans, name)
+            for sql, plan in plans.items():
+                with self.subTest(query=name, sql=sql):
+                    self.assertFalse(
+                        [step for step in plan if "TEMP B-TREE" in step],
+                        "\n".join(plan),
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import SLOW_QUERY_LOG_NAME, Database, DatabaseProfile
+from db.profiler import normalize_sql
+from db.repos.customer_repo import CustomerRepo
+from db.repos.invoice_repo import InvoiceRepo
+from db.repos.supplier_repo import SupplierRepo
+from models.customer import Customer
+from models.invoice import Invoice, InvoiceLine
+from models.supplier import Supplier
+
+
+class QueryProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = Path(self.temp_dir.name) / "test.db"
+
+    def _open(self, **profile) -> Database:
+        db = Database(self.path, DatabaseProfile(**profile))
+        db.initialize()
+        self.addCleanup(db.close)
+        return db
+
+    def test_profiler_is_off_by_default(self):
+        self.assertIsNone(self._open().profiler)
+
+    def test_normalize_groups_literals_and_in_lists(self):
+        self.assertEqual(
+            "SELECT * FROM t WHERE id IN (?, ...) AND s = ? LIMIT ?",
+            normalize_sql("SELECT *\n  FROM t WHERE id IN (?,?, ?) AND s = 'a''b' LIMIT 20"),
+        )
+        self.assertEqual(normalize_sql("SELECT 1 WHERE x IN (?, ?)"), normalize_sql("SELECT 7 WHERE x in (?)"))
+
+    def test_collects_counts_and_rows_per_statement(self):
+        db = self._open(profile_queries=True)
+        supplier_id = SupplierRepo(db).create(Supplier(firma="Mitscherling GmbH"))
+        customer_id = CustomerRepo(db).create(Customer(nachname="Muster"))
+        repo = InvoiceRepo(db)
+        for n in range(3):
+            repo.create(
+                Invoice(
+                    supplier_id=supplier_id,
+                    customer_id=customer_id,
+                    rechnungsnr=f"RE-{n}",
+                    datum=date(2026, 1, 10),
+                    positionen=[InvoiceLine(position=1, beschreibung="Dach")],
+                )
+            )
+        db.profiler.reset()
+
+        repo.get_all()
+        repo.get_all()
+        repo.get_many([1, 2])
+        repo.get_many([3])
+
+        stats = {s.sql: s for s in db.profiler.stats()}
+        get_all = stats["SELECT * FROM invoices ORDER BY datum DESC, id DESC"]
+        self.assertEqual((2, 6), (get_all.count, get_all.rows))
+        lines = next(s for s in stats.values() if "FROM invoice_lines WHERE invoice_id IN" in s.sql)
+        self.assertEqual((2, 3), (lines.count, lines.rows))
+        self.assertGreaterEqual(get_all.p95_ms, 0.0)
+        self.assertIn(get_all.sql, db.profiler.format_report())
+
+    def test_slow_statements_are_logged_with_repo_method(self):
+        db = self._open(profile_queries=True, slow_query_ms=0)
+
+        InvoiceRepo(db).get_all()
+
+        log = (self.path.parent / SLOW_QUERY_LOG_NAME).read_text(encoding="utf-8")
+        self.assertIn("InvoiceRepo.get_all  SELECT * FROM invoices ORDER BY datum DESC, id DESC", log)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database, RowMapper
+from models.article import Article
+from models.invoice import Invoice
+
+
+class RowMapperTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.temp_dir.name) / "test.db")
+        self.db.initialize()
+        self.db.execute("INSERT INTO suppliers (firma) VALUES ('Mitscherling GmbH')")
+        self.db.execute("INSERT INTO customers (vorname, nachname) VALUES ('Max', 'Muster')")
+        self.db.execute(
+            """INSERT INTO invoices (supplier_id, customer_id, rechnungsnr, datum, brutto, brutto_cent)
+               VALUES (1, 1, 'RE-1', '2026-01-10', 119.0, 11900)"""
+        )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_maps_full_rows_and_prefers_cent_columns(self):
+        self.db.execute("UPDATE invoices SET brutto = 1.0")
+        mapper = RowMapper(Invoice, "invoices")
+
+        invoice = mapper.one(self.db.execute("SELECT * FROM invoices"))
+
+        self.assertEqual("RE-1", invoice.rechnungsnr)
+        self.assertEqual(date(2026, 1, 10), invoice.datum)
+        self.assertEqual(119.0, invoice.brutto)
+        self.assertEqual([], invoice.positionen)
+
+    def test_maps_column_subsets_in_any_order(self):
+        mapper = RowMapper(Invoice, "invoices")
+
+        invoice = mapper.one(self.db.execute("SELECT status, brutto_cent, id FROM invoices"))
+
+        self.assertEqual(1, invoice.id)
+        self.assertEqual(119.0, invoice.brutto)
+        self.assertEqual("", invoice.rechnungsnr)
+
+    def test_falls_back_to_real_amount_without_cents(self):
+        self.db.execute("UPDATE invoices SET brutto_cent = NULL")
+        mapper = RowMapper(Invoice, "invoices")
+
+        self.assertEqual([119.0], [i.brutto for i in mapper.all(self.db.execute("SELECT * FROM invoices"))])
+        self.assertIsNone(mapper.one(self.db.execute("SELECT * FROM invoices WHERE id = 0")))
+
+    def test_applies_converters_and_reuses_layouts(self):
+        self.db.execute(
+            "INSERT INTO articles (bezeichnung, preis, preis_cent, beguenstigt_35a) VALUES ('Dach', 10.5, 1050, 1)"
+        )
+        mapper = RowMapper(Article, "articles", {"beguenstigt_35a": bool})
+
+        first = mapper.all(self.db.execute("SELECT * FROM articles"))
+        second = mapper.all(self.db.execute("SELECT * FROM articles"))
+
+        self.assertIs(True, first[0].beguenstigt_35a)
+        self.assertEqual(10.5, second[0].preis)
+        self.assertEqual(1, len(mapper._layouts))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from db.database import Database, build_fts_query
+from db.repos.customer_repo import CustomerRepo
+from db.repos.fs_repo import FSRepo
+from db.repos.invoice_repo import InvoiceRepo
+from db.repos.kv_repo import KVRepo
+from db.repos.supplier_repo import SupplierRepo
+from models.customer import Customer
+from models.firmenschreiben import Firmenschreiben
+from models.invoice import Invoice
+from models.kostenvoranschlag import Kostenvoranschlag
+from models.supplier import Supplier
+
+
+class SearchIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.temp_dir.name) / "test.db"
+        self.db = Database(self.db_path)
+        self.db.initialize()
+        self.customer_repo = CustomerRepo(self.db)
+        self.invoice_repo = InvoiceRepo(self.db)
+        self.supplier_id = SupplierRepo(self.db).create(Supplier(firma="Mitscherling GmbH"))
+        self.customer_id = self.customer_repo.create(
+            Customer(vorname="Jürgen", nachname="Müller", firma="Müller Bau", ort="Köln")
+        )
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_build_fts_query_uses_prefix_terms(self):
+        self.assertEqual('"re"* "2026"*', build_fts_query("RE-2026"))
+        self.assertIsNone(build_fts_query(" - "))
+
+    def test_search_matches_prefixes_across_documents(self):
+        self.invoice_repo.create(
+            Invoice(
+                supplier_id=self.supplier_id,
+                customer_id=self.customer_id,
+                rechnungsnr="RE-2026-0301-001",
+                datum=date(2026, 3, 1),
+                betreff="Dachrinne reinigen",
+            )
+        )
+        KVRepo(self.db).create(
+            Kostenvoranschlag(
+                supplier_id=self.supplier_id,
+                customer_id=self.customer_id,
+                kvnr="KV-2026-0301-001",
+                datum=date(2026, 3, 1),
+                betreff="Fassade",
+            )
+        )
+        FSRepo(self.db).create(
+            Firmenschreiben(customer_id=self.customer_id, fsnr="FS-2026-0301-001", datum=date(2026, 3, 1))
+        )
+
+        self.assertEqual(["RE-2026-0301-001"], [i.rechnungsnr for i in self.invoice_repo.search("dach")])
+        self.assertEqual(["RE-2026-0301-001"], [i.rechnungsnr for i in self.invoice_repo.search("RE-2026-03")])
+        self.assertEqual(["RE-2026-0301-001"], [i.rechnungsnr for i in self.invoice_repo.search("Mül")])
+        self.assertEqual(["KV-2026-0301-001"], [k.kvnr for k in KVRepo(self.db).search("Jür Fass")])
+        self.assertEqual(["FS-2026-0301-001"], [f.fsnr for f in FSRepo(self.db).search("Müller Bau")])
+        self.assertEqual([self.customer_id], [c.id for c in self.customer_repo.search("köl")])
+        self.assertEqual([], self.invoice_repo.search("Fassade"))
+
+    def test_renaming_customer_updates_document_index(self):
+        self.invoice_repo.create(
+            Invoice(
+                supplier_id=self.supplier_id,
+                customer_id=self.customer_id,
+                rechnungsnr="RE-1",
+                datum=date(2026, 3, 1),
+            )
+        )
+        customer = self.customer_repo.get_by_id(self.customer_id)
+        customer.nachname = "Schmidt"
+        customer.firma = "Schmidt Bau"
+        self.customer_repo.update(customer)
+
+        self.assertEqual([], self.invoice_repo.search("Müller"))
+        self.assertEqual(["RE-1"], [i.rechnungsnr for i in self.invoice_repo.search("Schmidt")])
+        self.assertEqual([], [r.rechnungsnr for r in self.invoice_repo.list_overview(query="Müller")])
+
+    def test_company_only_customer_is_found_by_firma(self):
+        company_id = self.customer_repo.create(Customer(firma="Dachdeckerei Hoffmann"))
+        self.invoice_repo.create(
+            Invoice(supplier_id=self.supplier_id, customer_id=company_id, rechnungsnr="RE-1", datum=date(2026, 3, 1))
+        )
+        KVRepo(self.db).create(
+            Kostenvoranschlag(supplier_id=self.supplier_id, customer_id=company_id, kvnr="KV-1", datum=date(2026, 3, 1))
+        )
+
+        self.assertEqual(["RE-1"], [i.rechnungsnr for i in self.invoice_repo.search("Hoffm")])
+        self.assertEqual(["KV-1"], [k.kvnr for k in KVRepo(self.db).search("Dachdeckerei")])
+
+        company = self.customer_repo.get_by_id(company_id)
+        company.firma = "Zimmerei Hoffmann"
+        self.customer_repo.update(company)
+
+        self.assertEqual(["RE-1"], [i.rechnungsnr for i in self.invoice_repo.search("Zimmerei")])
+        self.assertEqual([], KVRepo(self.db).search("Dachdeckerei"))
+
+    def test_upgrade_adds_firma_to_existing_document_index(self):
+        company_id = self.customer_repo.create(Customer(firma="Dachdeckerei Hoffmann"))
+        self.invoice_repo.create(
+            Invoice(supplier_id=self.supplier_id, customer_id=company_id, rechnungsnr="RE-1", datum=date(2026, 3, 1))
+        )
+        self.db.close()
+        conn = sqlite3.connect(self.db_path)
+        # Stand vor Version 7: Kundenfeld ohne Firmenname
+        conn.execute("UPDATE invoices_fts SET kunde = ' '")
+        conn.execute("PRAGMA user_version = 6")
+        conn.commit()
+        conn.close()
+
+        self.db = Database(self.db_path)
+        self.db.initialize()
+
+        self.assertEqual(["RE-1"], [i.rechnungsnr for i in InvoiceRepo(self.db).search("Hoffmann")])
+
+    def test_upgrade_backfills_index_for_existing_rows(self):
+        self.invoice_repo.create(
+            Invoice(
+                supplier_id=self.supplier_id,
+                customer_id=self.customer_id,
+                rechnungsnr="RE-ALT",
+                datum=date(2025, 12, 1),
+            )
+        )
+        self.db.close()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP TABLE invoices_fts")
+        # Stand vor Einfuehrung der Suchindizes
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+        conn.close()
+
+        self.db = Database(self.db_path)
+        self.db.initialize()
+
+        self.assertEqual(["RE-ALT"], [i.rechnungsnr for i in InvoiceRepo(self.db).search("alt")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath("rechnungsprogramm"))
+
+from utils.text_matcher import TextMatcher
+
+
+class TextMatcherTests(unittest.TestCase):
+    def test_scan_finds_overlapping_patterns_case_insensitive(self):
+        matcher = TextMatcher()
+        matcher.set_patterns(1, ["RE-2026-001"])
+        matcher.set_patterns(2, ["2026"])
+        matcher.set_patterns(3, ["Müller", "Bau GmbH"])
+        matcher.set_patterns(4, ["RE-2026-002"])
+
+        self.assertEqual({1, 2, 3}, matcher.scan("Zahlung re-2026-001 MÜLLER"))
+        self.assertEqual({2}, matcher.scan("Abschlag 2026"))
+        self.assertEqual(set(), matcher.scan(""))
+
+    def test_patterns_can_be_changed_incrementally(self):
+        matcher = TextMatcher()
+        matcher.sync({1: ["RE-1"], 2: ["RE-2"]})
+        self.assertEqual({1}, matcher.scan("re-1 bezahlt"))
+
+        matcher.sync({2: ["RE-2"], 3: ["RE-3"]})
+        matcher.set_patterns(2, ["RE-22"])
+
+        self.assertEqual(set(), matcher.scan("re-1 re-2"))
+        self.assertEqual({2, 3}, matcher.scan("re-22 und re-3"))
+        self.assertEqual(2, len(matcher))
+
+    def test_many_removals_keep_results_correct(self):
+        matcher = TextMatcher()
+        for number in range(200):
+            matcher.set_patterns(number, [f"RE-{number:04d}"])
+        for number in range(199):
+            matcher.discard(number)
+
+        self.assertEqual({199}, matcher.scan("re-0001 re-0199"))
+
+
+if __name__ == "__main__":
+    unittest.main()